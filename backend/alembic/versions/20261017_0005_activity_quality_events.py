@@ -0,0 +1,38 @@
+"""Add persisted spike/stop event index per activity."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0005"
+down_revision = "20260220_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_quality_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("activity_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=16), nullable=False),
+        sa.Column("start_seq", sa.Integer(), nullable=False),
+        sa.Column("end_seq", sa.Integer(), nullable=False),
+        sa.Column("start_time_s", sa.Integer(), nullable=False),
+        sa.Column("end_time_s", sa.Integer(), nullable=False),
+        sa.Column("peak_speed_mps", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["activity_id"], ["activities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_activity_quality_events_activity_id_event_type",
+        "activity_quality_events",
+        ["activity_id", "event_type"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_quality_events_activity_id_event_type", table_name="activity_quality_events")
+    op.drop_table("activity_quality_events")
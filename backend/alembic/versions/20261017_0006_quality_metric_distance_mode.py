@@ -0,0 +1,27 @@
+"""Record the distance model used for each quality metric row."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0006"
+down_revision = "20261017_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "activity_quality_metrics",
+        sa.Column(
+            "distance_mode",
+            sa.String(length=16),
+            nullable=False,
+            server_default="haversine",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("activity_quality_metrics", "distance_mode")
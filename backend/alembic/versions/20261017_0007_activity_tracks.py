@@ -0,0 +1,33 @@
+"""Add packed per-activity track storage."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0007"
+down_revision = "20261017_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_tracks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("activity_id", sa.Integer(), nullable=False),
+        sa.Column("point_count", sa.Integer(), nullable=False),
+        sa.Column("lat", sa.LargeBinary(), nullable=False),
+        sa.Column("lon", sa.LargeBinary(), nullable=False),
+        sa.Column("time_s", sa.LargeBinary(), nullable=False),
+        sa.Column("ele_m", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["activity_id"], ["activities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_activity_tracks_activity_id", "activity_tracks", ["activity_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_tracks_activity_id", table_name="activity_tracks")
+    op.drop_table("activity_tracks")
@@ -0,0 +1,27 @@
+"""Record the Strava stream resolution each activity was ingested at."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0009"
+down_revision = "20261017_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("activities", sa.Column("stream_resolution", sa.String(length=16), nullable=True))
+    # Everything ingested so far used full-resolution streams.
+    op.execute(
+        """
+        UPDATE activities SET stream_resolution = 'full'
+        WHERE EXISTS (SELECT 1 FROM activity_points p WHERE p.activity_id = activities.id)
+           OR EXISTS (SELECT 1 FROM activity_tracks t WHERE t.activity_id = activities.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("activities", "stream_resolution")
@@ -0,0 +1,30 @@
+"""Add shared Strava rate-limit state."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0010"
+down_revision = "20261017_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "strava_rate_limit_state",
+        sa.Column("scope", sa.String(length=64), nullable=False),
+        sa.Column("limit_15m", sa.Integer(), nullable=False),
+        sa.Column("limit_day", sa.Integer(), nullable=False),
+        sa.Column("usage_15m", sa.Integer(), nullable=False),
+        sa.Column("usage_day", sa.Integer(), nullable=False),
+        sa.Column("window_15m_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("day_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("next_request_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("strava_rate_limit_state")
@@ -0,0 +1,27 @@
+"""Add per-user incremental activity sync cursors."""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0012"
+down_revision = "20261017_0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_sync_cursors",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("last_start_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_strava_activity_id", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("activity_sync_cursors")
@@ -12,12 +12,48 @@ class Settings(BaseSettings):
     STRAVA_CLIENT_SECRET: str
     STRAVA_REDIRECT_URI: str
     STRAVA_SCOPES: str = "read,activity:read_all"
+    STRAVA_API_BASE_URL: str = "https://www.strava.com/api/v3"
+    STRAVA_TOKEN_URL: str = "https://www.strava.com/oauth/token"
+    # Pooled HTTP client shared by Strava API calls (HTTP/2 needs the optional h2 package)
+    STRAVA_HTTP_MAX_CONNECTIONS: int = 20
+    STRAVA_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    STRAVA_HTTP_KEEPALIVE_EXPIRY_S: float = 30.0
+    STRAVA_HTTP2: bool = False
+    # Shared Strava quota pacing: "postgres" (all processes), "memory" (this process) or "off"
+    STRAVA_RATE_LIMIT_BACKEND: str = "postgres"
+    STRAVA_RATE_LIMIT_HEADROOM: int = 5
+    STRAVA_RATE_LIMIT_BURST_FRACTION: float = 0.25
+    STRAVA_RATE_LIMIT_MAX_WAIT_S: float | None = 30.0
+    # Single-flight token refresh per user: "postgres" (advisory lock, all processes), "memory" or "off"
+    STRAVA_TOKEN_REFRESH_BACKEND: str = "postgres"
+    # Background sync job runners per app process (0: only standalone `python -m app.services.sync_jobs`)
+    SYNC_WORKER_THREADS: int = 1
+    SYNC_WORKER_POLL_INTERVAL_S: float = 2.0
+    # Running jobs without a heartbeat (page written or quota wait tick) for this long are orphaned and re-run
+    SYNC_JOB_STALE_AFTER_S: float = 1200.0
+    # Incremental syncs re-read this much before the cursor to catch activities uploaded late
+    SYNC_CURSOR_OVERLAP_S: int = 86400
+    # History imports fetch this many date windows concurrently (1: page sequentially)
+    SYNC_SHARD_CONCURRENCY: int = 4
+    SYNC_SHARD_WINDOWS: int = 24
+    # Fetched pages that may wait for the database writer
+    SYNC_SHARD_QUEUE_SIZE: int = 8
+    # Unix time of the oldest activity a full import looks for
+    SYNC_HISTORY_START: int = 1230768000
     AUTH_SUCCESS_REDIRECT_URL: str = "/"
     SESSION_SECRET: str = "dev-session-secret-change-me"
     SESSION_COOKIE_NAME: str = "srq_session"
     SESSION_COOKIE_SECURE: bool = False
     SESSION_MAX_AGE_SECONDS: int = 60 * 60 * 24 * 30
 
+    # Track storage for ingested streams: "points" (one row per sample) or "packed" (one row per activity)
+    TRACK_STORAGE: str = "points"
+
+    # On-disk cache of raw Strava stream payloads; disabled when STREAM_CACHE_DIR is unset
+    STREAM_CACHE_DIR: str | None = None
+    STREAM_CACHE_MAX_BYTES: int = 5 * 1024**3
+    STREAM_CACHE_CODEC: str = "zstd"
+
     # Observability
     LOG_LEVEL: str = "INFO"
     SENTRY_DSN: str | None = None
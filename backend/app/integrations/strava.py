@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from datetime import datetime, timezone
 
 import httpx
 
+from app.integrations.strava_cache import StreamCache
+from app.integrations.strava_rate_limit import StravaRateLimiter
+from app.integrations.strava_token_refresh import StoredToken, TokenRefreshCoordinator
+
 logger = logging.getLogger(__name__)
 
+# Optional down-sampling of activity streams (Strava returns at most ~100/1000/10000 points).
+STREAM_RESOLUTIONS = ("low", "medium", "high")
+STREAM_SERIES_TYPES = ("time", "distance")
+
 
 class StravaClient:
     BASE_URL = "https://www.strava.com/api/v3"
@@ -25,6 +34,12 @@ class StravaClient:
         max_retries: int = 3,
         backoff_base_s: float = 0.5,
         refresh_leeway_s: int = 60,
+        base_url: str | None = None,
+        token_url: str | None = None,
+        stream_cache: StreamCache | None = None,
+        http_client: httpx.Client | None = None,
+        rate_limiter: StravaRateLimiter | None = None,
+        token_refresh: TokenRefreshCoordinator | None = None,
     ):
         self.access_token = access_token
         self.refresh_token = refresh_token
@@ -35,6 +50,15 @@ class StravaClient:
         self.max_retries = max_retries
         self.backoff_base_s = backoff_base_s
         self.refresh_leeway_s = refresh_leeway_s
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.token_url = token_url or self.TOKEN_URL
+        self.stream_cache = stream_cache
+        # Pooled keep-alive client (see `app.integrations.strava_http`); None opens a connection per call.
+        self.http_client = http_client
+        # Paces API calls against the shared quota; token refreshes do not count against it.
+        self.rate_limiter = rate_limiter
+        # Shares refreshes with other clients of the same user; it also stores the new token.
+        self.token_refresh = token_refresh
         self._token_was_refreshed = False
 
     def _headers(self):
@@ -42,6 +66,7 @@ class StravaClient:
 
     @property
     def token_was_refreshed(self) -> bool:
+        """True when the client holds a refreshed token the caller still has to persist."""
         return self._token_was_refreshed
 
     def _can_refresh(self) -> bool:
@@ -56,28 +81,58 @@ class StravaClient:
     def _ensure_valid_token(self) -> None:
         if self._token_is_expired_or_near_expiry() and self._can_refresh():
             logger.info("Strava token near expiry; refreshing before API request")
-            self.refresh_access_token()
+            self.refresh_access_token(stale_access_token=self.access_token)
+
+    def refresh_access_token(self, *, stale_access_token: str | None = None) -> dict | None:
+        """Replace the access token; returns Strava's response, or None when reused.
 
-    def refresh_access_token(self) -> dict:
+        With a `token_refresh` coordinator a token another client stored after
+        `stale_access_token` was issued is adopted instead of refreshing again.
+        """
         if not self._can_refresh():
             raise RuntimeError("Cannot refresh Strava token without refresh credentials")
 
-        payload = {
+        if self.token_refresh is None:
+            return self._apply_refreshed_token(self._post_refresh(self.refresh_token))
+        token, data = self.token_refresh.refresh(
+            stale_access_token=stale_access_token or self.access_token,
+            refresh_token=self.refresh_token,
+            fetch=self._post_refresh,
+        )
+        self._adopt_token(token)
+        return data
+
+    def _post_refresh(self, refresh_token: str) -> dict:
+        r = self._http().post(self.token_url, data=self._refresh_payload(refresh_token), timeout=self.timeout_s)
+        r.raise_for_status()
+        return r.json()
+
+    def _http(self):
+        # httpx.Client and the httpx module share the request/post signatures.
+        return self.http_client if self.http_client is not None else httpx
+
+    def _refresh_payload(self, refresh_token: str) -> dict:
+        return {
             "client_id": self.client_id,
             "client_secret": self.client_secret,
             "grant_type": "refresh_token",
-            "refresh_token": self.refresh_token,
+            "refresh_token": refresh_token,
         }
-        r = httpx.post(self.TOKEN_URL, data=payload, timeout=self.timeout_s)
-        r.raise_for_status()
-        data = r.json()
 
+    def _apply_refreshed_token(self, data: dict) -> dict:
         self.access_token = data["access_token"]
         self.refresh_token = data.get("refresh_token", self.refresh_token)
         self.expires_at = data.get("expires_at", self.expires_at)
         self._token_was_refreshed = True
         return data
 
+    def _adopt_token(self, token: StoredToken) -> None:
+        # Already persisted by the coordinator, so `token_was_refreshed` stays untouched.
+        self.access_token = token.access_token
+        self.refresh_token = token.refresh_token
+        if token.expires_at is not None:
+            self.expires_at = token.expires_at
+
     @staticmethod
     def _retry_after_seconds(response: httpx.Response) -> float | None:
         value = response.headers.get("Retry-After")
@@ -88,20 +143,26 @@ class StravaClient:
         except ValueError:
             return None
 
-    def _sleep_before_retry(self, attempt: int, reason: str, retry_after_s: float | None = None) -> None:
+    def _retry_delay(self, attempt: int, reason: str, retry_after_s: float | None = None) -> float:
         delay = retry_after_s if retry_after_s is not None else self.backoff_base_s * (2**attempt)
         delay = min(delay, 30.0)
         logger.warning("Retrying Strava request after %s (attempt=%s delay=%.2fs)", reason, attempt + 1, delay)
-        time.sleep(delay)
+        return delay
+
+    def _sleep_before_retry(self, attempt: int, reason: str, retry_after_s: float | None = None) -> None:
+        time.sleep(self._retry_delay(attempt, reason, retry_after_s))
 
     def _request_json(self, method: str, path: str, *, params: dict | None = None) -> dict | list:
         self._ensure_valid_token()
-        url = f"{self.BASE_URL}/{path.lstrip('/')}"
+        url = f"{self.base_url}/{path.lstrip('/')}"
         refreshed_after_401 = False
 
         for attempt in range(self.max_retries + 1):
+            sent_token = self.access_token
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
             try:
-                r = httpx.request(
+                r = self._http().request(
                     method=method,
                     url=url,
                     headers=self._headers(),
@@ -114,9 +175,12 @@ class StravaClient:
                 self._sleep_before_retry(attempt, reason=exc.__class__.__name__)
                 continue
 
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(r.headers, r.status_code)
+
             if r.status_code == 401 and not refreshed_after_401 and self._can_refresh():
                 logger.warning("Strava returned 401 for %s; refreshing token and retrying", path)
-                self.refresh_access_token()
+                self.refresh_access_token(stale_access_token=sent_token)
                 refreshed_after_401 = True
                 continue
 
@@ -147,9 +211,169 @@ class StravaClient:
             params["before"] = before
         return self._request_json("GET", "/athlete/activities", params=params)
 
-    def get_activity_streams(self, activity_id: int, keys: str = "latlng,time,altitude"):
+    @staticmethod
+    def _stream_params(keys: str, resolution: str | None = None, series_type: str | None = None) -> dict:
         params = {
             "keys": keys,
             "key_by_type": "true",
         }
-        return self._request_json("GET", f"/activities/{activity_id}/streams", params=params)
+        if resolution is not None:
+            if resolution not in STREAM_RESOLUTIONS:
+                raise ValueError(f"resolution must be one of: {', '.join(STREAM_RESOLUTIONS)}")
+            params["resolution"] = resolution
+        if series_type is not None:
+            if series_type not in STREAM_SERIES_TYPES:
+                raise ValueError(f"series_type must be one of: {', '.join(STREAM_SERIES_TYPES)}")
+            params["series_type"] = series_type
+        return params
+
+    def get_activity_streams(
+        self,
+        activity_id: int,
+        keys: str = "latlng,time,altitude",
+        *,
+        resolution: str | None = None,
+        series_type: str | None = None,
+        refresh: bool = False,
+    ):
+        """Streams of one activity; served from `stream_cache` unless `refresh` is set.
+
+        `resolution` (`low`/`medium`/`high`) asks Strava for a down-sampled
+        stream along `series_type`; None returns every recorded point.
+        """
+        params = self._stream_params(keys, resolution, series_type)
+        if self.stream_cache is not None and not refresh:
+            cached = self.stream_cache.get(activity_id, params)
+            if cached is not None:
+                return cached
+        streams = self._request_json("GET", f"/activities/{activity_id}/streams", params=params)
+        if self.stream_cache is not None:
+            self.stream_cache.put(activity_id, params, streams)
+        return streams
+
+
+class AsyncStravaClient(StravaClient):
+    """`StravaClient` with awaitable requests over a shared `httpx.AsyncClient`.
+
+    Token state, refresh and retry policy are the same as the sync client; the
+    async methods carry an `a` prefix. One instance per athlete can serve many
+    concurrent requests: a refresh triggered by one of them is reused by the
+    others through `_refresh_lock`.
+    """
+
+    def __init__(self, access_token: str, *, http_client: httpx.AsyncClient, **kwargs):
+        super().__init__(access_token, **kwargs)
+        self.http_client = http_client
+        self._refresh_lock = asyncio.Lock()
+
+    def _http(self):
+        # `http_client` is async here; the rare sync call falls back to a one-off connection.
+        return httpx
+
+    async def _apost_refresh(self, refresh_token: str) -> dict:
+        r = await self.http_client.post(
+            self.token_url,
+            data=self._refresh_payload(refresh_token),
+            timeout=self.timeout_s,
+        )
+        r.raise_for_status()
+        return r.json()
+
+    async def arefresh_access_token(self, *, stale_access_token: str | None = None) -> dict | None:
+        if not self._can_refresh():
+            raise RuntimeError("Cannot refresh Strava token without refresh credentials")
+
+        async with self._refresh_lock:
+            if stale_access_token is not None and self.access_token != stale_access_token:
+                # Another request refreshed while this one waited for the lock.
+                return None
+            if self.token_refresh is None:
+                return self._apply_refreshed_token(await self._apost_refresh(self.refresh_token))
+
+            # The coordinator blocks on its lock, so it runs in a thread; the token
+            # request itself is scheduled back onto this loop's pooled client.
+            loop = asyncio.get_running_loop()
+
+            def _fetch(refresh_token: str) -> dict:
+                return asyncio.run_coroutine_threadsafe(self._apost_refresh(refresh_token), loop).result()
+
+            token, data = await asyncio.to_thread(
+                self.token_refresh.refresh,
+                stale_access_token=stale_access_token or self.access_token,
+                refresh_token=self.refresh_token,
+                fetch=_fetch,
+            )
+            self._adopt_token(token)
+            return data
+
+    async def _aensure_valid_token(self) -> None:
+        if self._token_is_expired_or_near_expiry() and self._can_refresh():
+            logger.info("Strava token near expiry; refreshing before API request")
+            await self.arefresh_access_token(stale_access_token=self.access_token)
+
+    async def _arequest_json(self, method: str, path: str, *, params: dict | None = None) -> dict | list:
+        await self._aensure_valid_token()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        refreshed_after_401 = False
+
+        for attempt in range(self.max_retries + 1):
+            sent_token = self.access_token
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire()
+            try:
+                r = await self.http_client.request(
+                    method=method,
+                    url=url,
+                    headers=self._headers(),
+                    params=params,
+                    timeout=self.timeout_s,
+                )
+            except (httpx.TimeoutException, httpx.NetworkError) as exc:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, reason=exc.__class__.__name__))
+                continue
+
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aobserve(r.headers, r.status_code)
+
+            if r.status_code == 401 and not refreshed_after_401 and self._can_refresh():
+                logger.warning("Strava returned 401 for %s; refreshing token and retrying", path)
+                await self.arefresh_access_token(stale_access_token=sent_token)
+                refreshed_after_401 = True
+                continue
+
+            if r.status_code in self.RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                await asyncio.sleep(
+                    self._retry_delay(
+                        attempt,
+                        reason=f"HTTP {r.status_code}",
+                        retry_after_s=self._retry_after_seconds(r),
+                    )
+                )
+                continue
+
+            r.raise_for_status()
+            return r.json()
+
+        raise RuntimeError("Strava request retry loop ended unexpectedly")
+
+    async def aget_activity_streams(
+        self,
+        activity_id: int,
+        keys: str = "latlng,time,altitude",
+        *,
+        resolution: str | None = None,
+        series_type: str | None = None,
+        refresh: bool = False,
+    ):
+        params = self._stream_params(keys, resolution, series_type)
+        # Cache reads/writes (de)compress whole payloads; keep them off the event loop.
+        if self.stream_cache is not None and not refresh:
+            cached = await asyncio.to_thread(self.stream_cache.get, activity_id, params)
+            if cached is not None:
+                return cached
+        streams = await self._arequest_json("GET", f"/activities/{activity_id}/streams", params=params)
+        if self.stream_cache is not None:
+            await asyncio.to_thread(self.stream_cache.put, activity_id, params, streams)
+        return streams
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+CODECS = (CODEC_ZSTD, CODEC_GZIP)
+
+_SUFFIXES = {CODEC_ZSTD: ".json.zst", CODEC_GZIP: ".json.gz"}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _compress(codec: str, raw: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        return _zstandard().ZstdCompressor(level=10).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        return _zstandard().ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+@dataclass
+class StreamCacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+
+class StreamCache:
+    """Raw Strava stream payloads on local disk, compressed and LRU size-bounded.
+
+    Entries are keyed by Strava activity id plus a digest of the request
+    parameters (stream keys, resolution), so payloads fetched with different
+    parameters never alias. Recency is the file mtime, bumped on every hit;
+    when a write pushes the directory past `max_bytes` the least recently used
+    entries are deleted. Writes go through a temp file and `os.replace`, so
+    concurrent readers never see a partial entry.
+
+    `codec` is `zstd` (needs the optional `zstandard` package; falls back to
+    gzip with a warning when it is missing) or `gzip`. Entries written with
+    either codec are readable regardless of the configured one.
+    """
+
+    def __init__(self, directory: str | Path, *, max_bytes: int, codec: str = CODEC_ZSTD):
+        if codec not in CODECS:
+            allowed = ", ".join(CODECS)
+            raise ValueError(f"codec must be one of: {allowed}")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if codec == CODEC_ZSTD and _zstandard() is None:
+            logger.warning("zstandard is not installed; stream cache falls back to gzip")
+            codec = CODEC_GZIP
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.codec = codec
+        self.stats = StreamCacheStats()
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    @staticmethod
+    def _params_digest(params: dict) -> str:
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def _path(self, activity_id: int, params: dict, codec: str) -> Path:
+        return self.directory / f"{activity_id}-{self._params_digest(params)}{_SUFFIXES[codec]}"
+
+    def _readable_codecs(self) -> list[str]:
+        # Configured codec first; zstd entries are skipped when the package is missing.
+        return [self.codec] + [c for c in CODECS if c != self.codec and (c != CODEC_ZSTD or _zstandard())]
+
+    def get(self, activity_id: int, params: dict) -> dict | list | None:
+        for codec in self._readable_codecs():
+            path = self._path(activity_id, params, codec)
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            try:
+                payload = json.loads(_decompress(codec, data))
+            except (OSError, ValueError, EOFError) as exc:
+                logger.warning("Dropping unreadable stream cache entry %s: %s", path.name, exc)
+                with self._lock:
+                    self._remove(path)
+                continue
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self.stats.hits += 1
+            return payload
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def put(self, activity_id: int, params: dict, payload: dict | list) -> None:
+        data = _compress(self.codec, json.dumps(payload, separators=(",", ":")).encode())
+        path = self._path(activity_id, params, self.codec)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self.stats.writes += 1
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - previous
+            self._evict_locked(keep=path)
+
+    def _remove(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+        return size
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.iterdir():
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_locked(self, *, keep: Path) -> None:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Rescan so entries written by other processes are accounted for too.
+        entries = sorted(self._entries())
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for _, _, path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                self.stats.evictions += 1
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
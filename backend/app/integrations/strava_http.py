@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HttpPoolMetrics:
+    """Counters showing how often pooled clients reuse a kept-alive connection.
+
+    `connections_opened` counts TCP connects and `tls_handshakes` TLS setups,
+    both reported by httpcore's `trace` extension; every request that did not
+    open a connection rode on an existing one.
+    """
+
+    requests: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _bump(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record_trace(self, name: str) -> None:
+        if name == "connection.connect_tcp.complete":
+            self._bump("connections_opened")
+        elif name == "connection.start_tls.complete":
+            self._bump("tls_handshakes")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests, opened, tls = self.requests, self.connections_opened, self.tls_handshakes
+        reused = max(requests - opened, 0)
+        return {
+            "requests": requests,
+            "connections_opened": opened,
+            "tls_handshakes": tls,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / requests, 3) if requests else None,
+        }
+
+
+def _http2_enabled(requested: bool) -> bool:
+    if not requested:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP/2 requested for Strava client but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _limits(max_connections: int, max_keepalive_connections: int, keepalive_expiry_s: float) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry_s,
+    )
+
+
+def build_http_client(
+    *,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry_s: float = 30.0,
+    http2: bool = False,
+    timeout_s: float = 20.0,
+    metrics: HttpPoolMetrics | None = None,
+) -> httpx.Client:
+    """Keep-alive `httpx.Client` whose requests are counted in `metrics`."""
+
+    def _trace(name: str, info: dict) -> None:
+        metrics._record_trace(name)
+
+    def _on_request(request: httpx.Request) -> None:
+        metrics._bump("requests")
+        request.extensions["trace"] = _trace
+
+    return httpx.Client(
+        limits=_limits(max_connections, max_keepalive_connections, keepalive_expiry_s),
+        http2=_http2_enabled(http2),
+        timeout=timeout_s,
+        event_hooks={"request": [_on_request]} if metrics is not None else None,
+    )
+
+
+def build_async_http_client(
+    *,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry_s: float = 30.0,
+    http2: bool = False,
+    timeout_s: float = 20.0,
+    metrics: HttpPoolMetrics | None = None,
+) -> httpx.AsyncClient:
+    """Async twin of `build_http_client`.
+
+    An `AsyncClient` pools connections on the event loop that opened them, so
+    create one per loop (e.g. per `asyncio.run`) rather than per process.
+    """
+
+    async def _trace(name: str, info: dict) -> None:
+        metrics._record_trace(name)
+
+    async def _on_request(request: httpx.Request) -> None:
+        metrics._bump("requests")
+        request.extensions["trace"] = _trace
+
+    return httpx.AsyncClient(
+        limits=_limits(max_connections, max_keepalive_connections, keepalive_expiry_s),
+        http2=_http2_enabled(http2),
+        timeout=timeout_s,
+        event_hooks={"request": [_on_request]} if metrics is not None else None,
+    )
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Mapping, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Strava's default application quota; replaced by X-RateLimit-Limit once a response is seen.
+DEFAULT_LIMIT_15M = 200
+DEFAULT_LIMIT_DAY = 2000
+
+WINDOW_15M = timedelta(minutes=15)
+WINDOW_DAY = timedelta(days=1)
+
+
+class RateLimitExhaustedError(RuntimeError):
+    """The next free Strava request slot is further away than the caller may wait."""
+
+    def __init__(self, wait_s: float):
+        super().__init__(f"Strava rate limit exhausted; next request allowed in {wait_s:.0f}s")
+        self.wait_s = wait_s
+
+
+def _window_start(now: datetime, window: timedelta) -> datetime:
+    # Strava windows are aligned: 15-minute ones to :00/:15/:30/:45, daily ones to midnight UTC.
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return epoch + ((now - epoch) // window) * window
+
+
+def _parse_pair(value: str | None) -> tuple[int, int] | None:
+    if not value:
+        return None
+    try:
+        short, long = (int(part) for part in value.split(","))
+    except ValueError:
+        return None
+    return short, long
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> tuple[tuple[int, int], tuple[int, int]] | None:
+    """`((limit_15m, limit_day), (usage_15m, usage_day))` from a Strava response.
+
+    When the read-specific `X-ReadRateLimit-*` pair is present as well, the one
+    with less remaining 15-minute quota wins, since both apply to reads.
+    """
+    candidates = []
+    for prefix in ("X-RateLimit", "X-ReadRateLimit"):
+        limits = _parse_pair(headers.get(f"{prefix}-Limit"))
+        usage = _parse_pair(headers.get(f"{prefix}-Usage"))
+        if limits and usage:
+            candidates.append((limits, usage))
+    if not candidates:
+        return None
+    return min(candidates, key=lambda pair: pair[0][0] - pair[1][0])
+
+
+@dataclass
+class RateLimitState:
+    """Quota usage of one Strava application in the current 15-minute and daily windows."""
+
+    window_15m_start: datetime
+    day_start: datetime
+    limit_15m: int = DEFAULT_LIMIT_15M
+    limit_day: int = DEFAULT_LIMIT_DAY
+    usage_15m: int = 0
+    usage_day: int = 0
+    next_request_at: datetime | None = None
+
+    @classmethod
+    def fresh(cls, now: datetime) -> RateLimitState:
+        return cls(window_15m_start=_window_start(now, WINDOW_15M), day_start=_window_start(now, WINDOW_DAY))
+
+    def roll(self, now: datetime) -> None:
+        window_15m_start = _window_start(now, WINDOW_15M)
+        if window_15m_start != self.window_15m_start:
+            self.window_15m_start = window_15m_start
+            self.usage_15m = 0
+        day_start = _window_start(now, WINDOW_DAY)
+        if day_start != self.day_start:
+            self.day_start = day_start
+            self.usage_day = 0
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`headroom` requests per window stay unused to absorb in-flight calls;
+    pacing starts once less than `burst_fraction` of a window's quota is left.
+    """
+
+    headroom: int = 5
+    burst_fraction: float = 0.25
+
+
+def plan_request(state: RateLimitState, now: datetime, policy: RateLimitPolicy) -> tuple[bool, float]:
+    """Reserve a request slot in `state`; returns `(reserved, wait_s)`.
+
+    While plenty of quota is left requests go out immediately. Once less than
+    `burst_fraction` of a window remains, reserved slots are spaced evenly over
+    the rest of that window so the quota lasts exactly until it resets. The
+    spacing is measured from the last granted slot (`next_request_at`), not
+    from `now`, so callers arriving together queue up one interval apart. With
+    no usable quota left nothing is reserved and `wait_s` is the time until the
+    exhausted window resets.
+    """
+    state.roll(now)
+    windows = (
+        (state.limit_15m, state.usage_15m, state.window_15m_start + WINDOW_15M),
+        (state.limit_day, state.usage_day, state.day_start + WINDOW_DAY),
+    )
+
+    slot_at = now
+    if state.next_request_at is not None and state.next_request_at > slot_at:
+        slot_at = state.next_request_at
+
+    interval_s = 0.0
+    for limit, usage, window_end in windows:
+        remaining = limit - policy.headroom - usage
+        if remaining <= 0:
+            return False, max((window_end - now).total_seconds(), 0.0)
+        if remaining <= limit * policy.burst_fraction:
+            interval_s = max(interval_s, max((window_end - slot_at).total_seconds(), 0.0) / remaining)
+
+    state.next_request_at = slot_at + timedelta(seconds=interval_s)
+    state.usage_15m += 1
+    state.usage_day += 1
+    return True, (slot_at - now).total_seconds()
+
+
+def apply_response(state: RateLimitState, now: datetime, headers: Mapping[str, str], status_code: int) -> None:
+    """Fold Strava's view of the quota into `state`.
+
+    Header usage is authoritative but never lowers local reservations made in
+    the same window, which may belong to requests still in flight. A 429
+    marks the 15-minute window as exhausted.
+    """
+    state.roll(now)
+    parsed = parse_rate_limit_headers(headers)
+    if parsed is not None:
+        (limit_15m, limit_day), (usage_15m, usage_day) = parsed
+        state.limit_15m, state.limit_day = limit_15m, limit_day
+        state.usage_15m = max(state.usage_15m, usage_15m)
+        state.usage_day = max(state.usage_day, usage_day)
+    if status_code == 429:
+        state.usage_15m = max(state.usage_15m, state.limit_15m)
+
+
+class RateLimitStore(Protocol):
+    """Holds the shared `RateLimitState` and applies updates atomically."""
+
+    def reserve(self, now: datetime, policy: RateLimitPolicy) -> tuple[bool, float]: ...
+
+    def observe(self, now: datetime, headers: Mapping[str, str], status_code: int) -> None: ...
+
+
+class InMemoryRateLimitStore:
+    """Per-process store; every worker sees only its own requests."""
+
+    def __init__(self, state: RateLimitState | None = None):
+        self.state = state or RateLimitState.fresh(datetime.now(timezone.utc))
+        self._lock = threading.Lock()
+
+    def reserve(self, now: datetime, policy: RateLimitPolicy) -> tuple[bool, float]:
+        with self._lock:
+            return plan_request(self.state, now, policy)
+
+    def observe(self, now: datetime, headers: Mapping[str, str], status_code: int) -> None:
+        with self._lock:
+            apply_response(self.state, now, headers, status_code)
+
+
+class StravaRateLimiter:
+    """Paces Strava API requests against a shared quota store.
+
+    Call `acquire` (or `aacquire`) before each request and `observe` with its
+    response. `max_wait_s` bounds how long a caller may be held back; a longer
+    wait raises `RateLimitExhaustedError` instead (None waits indefinitely).
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        *,
+        policy: RateLimitPolicy | None = None,
+        max_wait_s: float | None = None,
+        clock: Callable[[], datetime] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.store = store
+        self.policy = policy or RateLimitPolicy()
+        self.max_wait_s = max_wait_s
+        self._clock = clock or (lambda: datetime.now(timezone.utc))
+        self._sleep = sleep
+
+    def _next_wait(self) -> tuple[bool, float]:
+        reserved, wait_s = self.store.reserve(self._clock(), self.policy)
+        if self.max_wait_s is not None and wait_s > self.max_wait_s:
+            raise RateLimitExhaustedError(wait_s)
+        if wait_s > 0:
+            logger.info("Pacing Strava request for %.2fs (reserved=%s)", wait_s, reserved)
+        return reserved, wait_s
+
+    def acquire(self) -> None:
+        while True:
+            reserved, wait_s = self._next_wait()
+            if wait_s > 0:
+                self._sleep(wait_s)
+            if reserved:
+                return
+
+    async def aacquire(self) -> None:
+        while True:
+            reserved, wait_s = await asyncio.to_thread(self._next_wait)
+            if wait_s > 0:
+                await asyncio.sleep(wait_s)
+            if reserved:
+                return
+
+    def observe(self, headers: Mapping[str, str], status_code: int) -> None:
+        self.store.observe(self._clock(), headers, status_code)
+
+    async def aobserve(self, headers: Mapping[str, str], status_code: int) -> None:
+        await asyncio.to_thread(self.observe, headers, status_code)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StoredToken:
+    access_token: str
+    refresh_token: str
+    expires_at: int | None = None
+
+    def is_fresh(self, now_ts: int, leeway_s: int) -> bool:
+        return self.expires_at is None or now_ts < self.expires_at - leeway_s
+
+
+class TokenSlot(Protocol):
+    """One user's stored token, readable and writable while its lock is held."""
+
+    def load(self) -> StoredToken | None: ...
+
+    def save(self, token: StoredToken) -> None: ...
+
+
+class TokenStore(Protocol):
+    """Serializes token refreshes per user; `locked` holds the lock for the whole block."""
+
+    def locked(self, user_id: int) -> AbstractContextManager[TokenSlot]: ...
+
+
+class _MemorySlot:
+    def __init__(self, tokens: dict[int, StoredToken], user_id: int):
+        self._tokens = tokens
+        self._user_id = user_id
+
+    def load(self) -> StoredToken | None:
+        return self._tokens.get(self._user_id)
+
+    def save(self, token: StoredToken) -> None:
+        self._tokens[self._user_id] = token
+
+
+class InMemoryTokenStore:
+    """Per-process store; refreshes are single-flight only within this process."""
+
+    def __init__(self):
+        self._tokens: dict[int, StoredToken] = {}
+        self._locks: dict[int, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def locked(self, user_id: int) -> Iterator[TokenSlot]:
+        with self._guard:
+            lock = self._locks.setdefault(user_id, threading.Lock())
+        with lock:
+            yield _MemorySlot(self._tokens, user_id)
+
+
+class TokenRefreshCoordinator:
+    """Single-flight refresh of one user's Strava token across clients sharing `store`.
+
+    The first caller to take the user's lock calls Strava and stores the new
+    token before releasing it. Callers that queued behind it find a fresh token
+    that differs from the one they were using and adopt it without calling
+    Strava. Strava rotates refresh tokens, so a refresh always starts from the
+    stored refresh token rather than the caller's possibly outdated copy.
+    """
+
+    def __init__(
+        self,
+        store: TokenStore,
+        *,
+        user_id: int,
+        leeway_s: int = 60,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.user_id = user_id
+        self.leeway_s = leeway_s
+        self._clock = clock
+
+    def refresh(
+        self,
+        *,
+        stale_access_token: str,
+        refresh_token: str,
+        fetch: Callable[[str], dict],
+    ) -> tuple[StoredToken, dict | None]:
+        """`(token, response)`; `response` is None when a stored token was reused.
+
+        `fetch(refresh_token)` performs the token request and returns Strava's
+        JSON response; it runs with the user's lock held.
+        """
+        with self.store.locked(self.user_id) as slot:
+            stored = slot.load()
+            if (
+                stored is not None
+                and stored.access_token != stale_access_token
+                and stored.is_fresh(int(self._clock()), self.leeway_s)
+            ):
+                logger.info("Reusing Strava token refreshed by another worker (user_id=%s)", self.user_id)
+                return stored, None
+
+            if stored is not None:
+                refresh_token = stored.refresh_token
+            data = fetch(refresh_token)
+            token = StoredToken(
+                access_token=data["access_token"],
+                refresh_token=data.get("refresh_token", refresh_token),
+                expires_at=data.get("expires_at", stored.expires_at if stored is not None else None),
+            )
+            slot.save(token)
+            return token, data
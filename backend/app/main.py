@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.core.config import settings
+from app.core.db import SessionLocal
 from app.core.logging_setup import configure_logging
 from app.core.observability import setup_observability
 from app.routes.auth import router as auth_router
@@ -10,10 +13,21 @@ from app.routes.sync import router as sync_router
 from app.routes.activities import router as activities_router
 from app.routes.streams import router as streams_router
 from app.routes.ml import router as ml_router
+from app.services.sync_jobs import start_sync_worker, stop_sync_worker
 
 configure_logging(settings.LOG_LEVEL)
 
-app = FastAPI(title="LiveMap Coach")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_sync_worker(SessionLocal)
+    try:
+        yield
+    finally:
+        stop_sync_worker()
+
+
+app = FastAPI(title="LiveMap Coach", lifespan=lifespan)
 app.add_middleware(
     SessionMiddleware,
     secret_key=settings.SESSION_SECRET,
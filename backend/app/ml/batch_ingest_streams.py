@@ -1,24 +1,47 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
+import queue
+import threading
+import time
+from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
 
-from sqlalchemy.orm import Session
+import httpx
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.db import SessionLocal
+from app.integrations.strava import STREAM_RESOLUTIONS, STREAM_SERIES_TYPES
 from app.models.activity import Activity
 from app.models.activity_quality_metric import ActivityQualityMetric
+from app.models.strava_token import StravaToken
+from app.services.ingest_pipeline import IngestItem, PipelineStage, StreamFetchJob, run_ingest_pipeline
+from app.services.strava_session import (
+    build_async_strava_client,
+    build_strava_async_http_client,
+    get_strava_rate_limiter,
+    get_stream_cache,
+    persist_refreshed_token,
+    strava_http_metrics,
+)
 from app.services.stream_ingest import (
+    STREAM_RESOLUTION_FULL,
     ActivityNotFoundError,
     MissingStreamDataError,
     MissingTokenError,
     ingest_streams_for_activity,
+    parse_activity_streams,
+    write_parsed_streams,
 )
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
 DEFAULT_SUMMARY_PATH = ROOT_DIR / "artifacts/ml/ingest_summary.json"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PARSE_WORKERS = 2
+DEFAULT_WRITE_WORKERS = 1
 
 
 def _parse_dt(value: str | None) -> datetime | None:
@@ -48,6 +71,8 @@ def _query_target_activity_ids(
     before: datetime | None,
     limit: int | None,
     offset: int,
+    resolution: str | None = None,
+    only_coarse: bool = False,
 ) -> list[int]:
     q = db.query(Activity.id)
 
@@ -61,6 +86,11 @@ def _query_target_activity_ids(
         q = q.filter(Activity.start_date.is_not(None)).filter(Activity.start_date >= after)
     if before:
         q = q.filter(Activity.start_date.is_not(None)).filter(Activity.start_date <= before)
+    if only_coarse:
+        q = q.filter(Activity.stream_resolution.in_(STREAM_RESOLUTIONS))
+    if resolution is not None:
+        # Never replace a full-resolution track with a down-sampled one.
+        q = q.filter(Activity.stream_resolution.is_distinct_from(STREAM_RESOLUTION_FULL))
 
     q = q.order_by(Activity.start_date.desc().nullslast(), Activity.id.desc()).offset(offset)
     if limit is not None:
@@ -68,6 +98,162 @@ def _query_target_activity_ids(
     return [row[0] for row in q.all()]
 
 
+def _record_error(summary: dict, counter: str, activity_id: int, error: str) -> None:
+    summary[counter] += 1
+    summary["error_examples"].append({"activity_id": activity_id, "error": error})
+
+
+def _backfill_sequentially(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    summary: dict,
+    refresh_streams: bool,
+    resolution: str | None,
+    series_type: str | None,
+) -> None:
+    for activity_id in activity_ids:
+        try:
+            result = ingest_streams_for_activity(
+                db,
+                activity_id=activity_id,
+                commit=True,
+                refresh_streams=refresh_streams,
+                resolution=resolution,
+                series_type=series_type,
+            )
+            if result.unchanged:
+                summary["unchanged"] += 1
+            else:
+                summary["ingested"] += 1
+                summary["total_points_written"] += result.points
+        except MissingStreamDataError as exc:
+            db.rollback()
+            _record_error(summary, "missing_stream_data", activity_id, str(exc))
+        except MissingTokenError as exc:
+            db.rollback()
+            _record_error(summary, "missing_token", activity_id, str(exc))
+        except ActivityNotFoundError as exc:
+            db.rollback()
+            _record_error(summary, "not_found", activity_id, str(exc))
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            _record_error(summary, "failed", activity_id, f"{type(exc).__name__}: {exc}")
+
+
+async def _backfill_concurrently(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    summary: dict,
+    concurrency: int,
+    parse_workers: int,
+    write_workers: int,
+    queue_size: int | None,
+    refresh_streams: bool,
+    resolution: str | None,
+    series_type: str | None,
+    http_client: httpx.AsyncClient | None,
+) -> None:
+    activities = {a.id: a for a in db.query(Activity).filter(Activity.id.in_(activity_ids)).all()}
+    user_ids = {a.user_id for a in activities.values()}
+    tokens = {t.user_id: t for t in db.query(StravaToken).filter(StravaToken.user_id.in_(user_ids)).all()}
+
+    jobs: list[StreamFetchJob] = []
+    for activity_id in activity_ids:
+        activity = activities.get(activity_id)
+        if activity is None:
+            _record_error(summary, "not_found", activity_id, "Activity not found")
+        elif activity.user_id not in tokens:
+            _record_error(summary, "missing_token", activity_id, "No Strava token found for activity user")
+        else:
+            jobs.append(
+                StreamFetchJob(activity_id, activity.strava_activity_id, activity.user_id, activity.stream_hash)
+            )
+
+    owns_http_client = http_client is None
+    if owns_http_client:
+        http_client = build_strava_async_http_client(max_connections=concurrency)
+    # One client per athlete so concurrent requests share a single token refresh.
+    clients = {user_id: build_async_strava_client(token, http_client) for user_id, token in tokens.items()}
+    token_ids = {user_id: token.id for user_id, token in tokens.items()}
+
+    # Each writer thread checks out its own session; the first one is the caller's, the
+    # others are opened in the `try` below with the same settings as `SessionLocal`.
+    sessions: queue.SimpleQueue[Session] = queue.SimpleQueue()
+    sessions.put(db)
+    writer_session = sessionmaker(bind=db.get_bind(), autoflush=False, autocommit=False)
+    extra_sessions: list[Session] = []
+    summary_lock = threading.Lock()
+
+    async def _fetch(item: IngestItem) -> None:
+        item.streams = await clients[item.job.user_id].aget_activity_streams(
+            item.job.strava_activity_id,
+            resolution=resolution,
+            series_type=series_type,
+            refresh=refresh_streams,
+        )
+
+    def _parse(item: IngestItem) -> None:
+        item.parsed = parse_activity_streams(item.streams, known_hash=item.job.stream_hash)
+        item.streams = None
+
+    def _write(item: IngestItem) -> None:
+        job = item.job
+        if item.error is not None:
+            exc = item.error
+            with summary_lock:
+                if isinstance(exc, MissingStreamDataError):
+                    _record_error(summary, "missing_stream_data", job.activity_id, str(exc))
+                else:
+                    _record_error(summary, "failed", job.activity_id, f"{type(exc).__name__}: {exc}")
+            return
+        session = sessions.get()
+        try:
+            result = write_parsed_streams(
+                session,
+                activity=session.get(Activity, job.activity_id),
+                parsed=item.parsed,
+                resolution=resolution,
+                commit=False,
+            )
+            persist_refreshed_token(session, session.get(StravaToken, token_ids[job.user_id]), clients[job.user_id])
+            session.commit()
+        except Exception as exc:  # noqa: BLE001
+            session.rollback()
+            with summary_lock:
+                _record_error(summary, "failed", job.activity_id, f"{type(exc).__name__}: {exc}")
+            return
+        finally:
+            sessions.put(session)
+        with summary_lock:
+            if result.unchanged:
+                summary["unchanged"] += 1
+            else:
+                summary["ingested"] += 1
+                summary["total_points_written"] += result.points
+
+    stages = [
+        PipelineStage("fetch", _fetch, workers=concurrency),
+        PipelineStage("parse", _parse, workers=parse_workers, blocking=True),
+        PipelineStage("write", _write, workers=write_workers, blocking=True),
+    ]
+    started = time.perf_counter()
+    try:
+        for _ in range(write_workers - 1):
+            extra_sessions.append(writer_session())
+            sessions.put(extra_sessions[-1])
+        stats = await run_ingest_pipeline(jobs, stages, queue_size=queue_size or 2 * concurrency)
+    finally:
+        if owns_http_client:
+            await http_client.aclose()
+        for session in extra_sessions:
+            session.close()
+    elapsed_s = time.perf_counter() - started
+    summary["stages"] = {stage.name: stage.to_summary(elapsed_s) for stage in stats}
+    summary["max_in_flight"] = stats[0].max_in_flight
+
+
 def backfill_activity_streams(
     db: Session,
     *,
@@ -77,8 +263,36 @@ def backfill_activity_streams(
     before: datetime | None = None,
     limit: int | None = None,
     offset: int = 0,
+    concurrency: int = 1,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
+    write_workers: int = DEFAULT_WRITE_WORKERS,
+    queue_size: int | None = None,
+    refresh_streams: bool = False,
+    resolution: str | None = None,
+    series_type: str | None = None,
+    only_coarse: bool = False,
+    http_client: httpx.AsyncClient | None = None,
     output_path: str | Path | None = DEFAULT_SUMMARY_PATH,
 ) -> dict:
+    """Ingest streams for the selected activities.
+
+    With `concurrency` > 1, ingest runs as a fetch → parse → write pipeline
+    (see `run_ingest_pipeline`): `concurrency` Strava requests in flight,
+    `parse_workers` threads building tracks and quality reports and
+    `write_workers` threads (one session each) storing them, connected by
+    queues of `queue_size` items (default 2 * concurrency). Per-stage
+    throughput, utilization and queue depth land in `summary["stages"]`.
+    Otherwise activities are ingested one by one.
+
+    Raw payloads come from the stream cache when it is enabled
+    (`STREAM_CACHE_DIR`) unless `refresh_streams` is set.
+
+    `resolution`/`series_type` ingest down-sampled streams for quick triage;
+    activities already stored at full resolution are then left out.
+    `only_coarse` selects activities stored down-sampled, so a run without
+    `resolution` upgrades them to full resolution. `http_client` overrides the
+    shared async HTTP client (tests).
+    """
     activity_ids = _query_target_activity_ids(
         db,
         only_missing_metrics=only_missing_metrics,
@@ -87,17 +301,27 @@ def backfill_activity_streams(
         before=before,
         limit=limit,
         offset=offset,
+        resolution=resolution,
+        only_coarse=only_coarse,
     )
 
     summary = {
         "ok": True,
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "selected_activities": len(activity_ids),
+        "concurrency": concurrency,
+        "parse_workers": parse_workers if concurrency > 1 else None,
+        "write_workers": write_workers if concurrency > 1 else None,
+        "refresh_streams": refresh_streams,
+        "resolution": resolution or STREAM_RESOLUTION_FULL,
+        "series_type": series_type,
+        "only_coarse": only_coarse,
         "only_missing_metrics": only_missing_metrics,
         "sport_type": sport_type,
         "after": after.isoformat() if after else None,
         "before": before.isoformat() if before else None,
         "ingested": 0,
+        "unchanged": 0,
         "missing_stream_data": 0,
         "missing_token": 0,
         "not_found": 0,
@@ -106,31 +330,42 @@ def backfill_activity_streams(
         "error_examples": [],
     }
 
-    for activity_id in activity_ids:
-        try:
-            result = ingest_streams_for_activity(
+    started = time.perf_counter()
+    if concurrency > 1:
+        asyncio.run(
+            _backfill_concurrently(
                 db,
-                activity_id=activity_id,
-                commit=True,
+                activity_ids=activity_ids,
+                summary=summary,
+                concurrency=concurrency,
+                parse_workers=parse_workers,
+                write_workers=write_workers,
+                queue_size=queue_size,
+                refresh_streams=refresh_streams,
+                resolution=resolution,
+                series_type=series_type,
+                http_client=http_client,
             )
-            summary["ingested"] += 1
-            summary["total_points_written"] += result.points
-        except MissingStreamDataError as exc:
-            db.rollback()
-            summary["missing_stream_data"] += 1
-            summary["error_examples"].append({"activity_id": activity_id, "error": str(exc)})
-        except MissingTokenError as exc:
-            db.rollback()
-            summary["missing_token"] += 1
-            summary["error_examples"].append({"activity_id": activity_id, "error": str(exc)})
-        except ActivityNotFoundError as exc:
-            db.rollback()
-            summary["not_found"] += 1
-            summary["error_examples"].append({"activity_id": activity_id, "error": str(exc)})
-        except Exception as exc:  # noqa: BLE001
-            db.rollback()
-            summary["failed"] += 1
-            summary["error_examples"].append({"activity_id": activity_id, "error": f"{type(exc).__name__}: {exc}"})
+        )
+    else:
+        _backfill_sequentially(
+            db,
+            activity_ids=activity_ids,
+            summary=summary,
+            refresh_streams=refresh_streams,
+            resolution=resolution,
+            series_type=series_type,
+        )
+    summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+    summary["strava_http"] = strava_http_metrics.snapshot()
+    stream_cache = get_stream_cache()
+    if stream_cache is not None:
+        summary["stream_cache"] = {
+            **asdict(stream_cache.stats),
+            "directory": str(stream_cache.directory),
+            "size_bytes": stream_cache.size_bytes(),
+        }
 
     # Keep artifact compact while still useful for debugging.
     if len(summary["error_examples"]) > 20:
@@ -168,6 +403,52 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         default=None,
         help="ISO datetime upper bound for activity.start_date, e.g. 2023-05-31T23:59:59Z.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Stream fetches in flight; 1 ingests activities strictly one after another.",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=DEFAULT_PARSE_WORKERS,
+        help="Threads building tracks and quality reports (pipeline mode).",
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=DEFAULT_WRITE_WORKERS,
+        help="Database writer threads, one session each (pipeline mode).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Capacity of each inter-stage queue (default: 2 x --concurrency).",
+    )
+    parser.add_argument(
+        "--refresh-streams",
+        action="store_true",
+        help="Re-download streams from Strava instead of reading the local stream cache.",
+    )
+    parser.add_argument(
+        "--resolution",
+        choices=(*STREAM_RESOLUTIONS, STREAM_RESOLUTION_FULL),
+        default=STREAM_RESOLUTION_FULL,
+        help="Strava stream resolution; reduced resolutions skip activities already stored at full.",
+    )
+    parser.add_argument(
+        "--series-type",
+        choices=STREAM_SERIES_TYPES,
+        default=None,
+        help="Axis Strava down-samples along when --resolution is reduced (Strava default: distance).",
+    )
+    parser.add_argument(
+        "--only-coarse",
+        action="store_true",
+        help="Select only activities stored at a reduced resolution (use with --no-only-missing-metrics to upgrade).",
+    )
     parser.add_argument(
         "--output",
         default=str(DEFAULT_SUMMARY_PATH),
@@ -182,6 +463,11 @@ def main() -> int:
     after = _parse_dt(args.after)
     before = _parse_dt(args.before)
 
+    rate_limiter = get_strava_rate_limiter()
+    if rate_limiter is not None:
+        # A batch job waits for quota to free up instead of failing activities.
+        rate_limiter.max_wait_s = None
+
     with SessionLocal() as db:
         summary = backfill_activity_streams(
             db,
@@ -191,6 +477,14 @@ def main() -> int:
             before=before,
             limit=args.limit,
             offset=args.offset,
+            concurrency=args.concurrency,
+            parse_workers=args.parse_workers,
+            write_workers=args.write_workers,
+            queue_size=args.queue_size,
+            refresh_streams=args.refresh_streams,
+            resolution=None if args.resolution == STREAM_RESOLUTION_FULL else args.resolution,
+            series_type=args.series_type,
+            only_coarse=args.only_coarse,
             output_path=args.output,
         )
 
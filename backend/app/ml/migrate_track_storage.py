@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from geoalchemy2.functions import ST_X, ST_Y
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models.activity_point import ActivityPoint
+from app.models.activity_track import ActivityTrack
+from app.services.point_loader import store_track
+from app.services.track import (
+    TRACK_STORAGE_MODES,
+    TRACK_STORAGE_PACKED,
+    TRACK_STORAGE_POINTS,
+    Track,
+    load_packed_tracks,
+)
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_SUMMARY_PATH = ROOT_DIR / "artifacts/ml/migrate_track_storage_summary.json"
+DEFAULT_CHUNK_SIZE = 100
+
+
+def _query_source_activity_ids(db: Session, *, target: str, limit: int | None) -> list[int]:
+    if target == TRACK_STORAGE_PACKED:
+        q = db.query(ActivityPoint.activity_id).distinct().order_by(ActivityPoint.activity_id.asc())
+    else:
+        q = db.query(ActivityTrack.activity_id).order_by(ActivityTrack.activity_id.asc())
+    if limit is not None:
+        q = q.limit(limit)
+    return [row[0] for row in q.all()]
+
+
+def _load_point_tracks(db: Session, *, activity_ids: list[int]) -> dict[int, Track]:
+    rows = (
+        db.query(
+            ActivityPoint.activity_id,
+            ST_Y(ActivityPoint.geom),
+            ST_X(ActivityPoint.geom),
+            ActivityPoint.time_s,
+            ActivityPoint.ele_m,
+        )
+        .filter(ActivityPoint.activity_id.in_(activity_ids))
+        .order_by(ActivityPoint.activity_id.asc(), ActivityPoint.seq.asc())
+        .all()
+    )
+    if not rows:
+        return {}
+    data = np.array(rows, dtype=np.float64)
+    point_activity_ids = data[:, 0].astype(np.int64)
+    boundaries = np.flatnonzero(point_activity_ids[1:] != point_activity_ids[:-1]) + 1
+    tracks = {}
+    for part in np.split(data, boundaries):
+        tracks[int(part[0, 0])] = Track(part[:, 1], part[:, 2], part[:, 3].astype(np.int32), part[:, 4])
+    return tracks
+
+
+def _write_summary(summary: dict, output_path: str | Path) -> Path:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def migrate_track_storage(
+    db: Session,
+    *,
+    target: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    output_path: str | Path | None = DEFAULT_SUMMARY_PATH,
+) -> dict:
+    """Move stored tracks into `target` storage, one transaction per chunk.
+
+    `packed` converts `activity_points` rows into one `activity_tracks` row per
+    activity; `points` reverses it. Reads serve both layouts throughout, so
+    the migration can run against a live database and be resumed.
+    """
+    if target not in TRACK_STORAGE_MODES:
+        allowed = ", ".join(TRACK_STORAGE_MODES)
+        raise ValueError(f"target must be one of: {allowed}")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    activity_ids = _query_source_activity_ids(db, target=target, limit=limit)
+    summary = {
+        "ok": True,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "target": target,
+        "chunk_size": chunk_size,
+        "selected_activities": len(activity_ids),
+        "migrated_activities": 0,
+        "migrated_points": 0,
+        "failed_chunks": 0,
+        "error_examples": [],
+    }
+
+    for chunk_start in range(0, len(activity_ids), chunk_size):
+        chunk = activity_ids[chunk_start : chunk_start + chunk_size]
+        try:
+            if target == TRACK_STORAGE_PACKED:
+                tracks = _load_point_tracks(db, activity_ids=chunk)
+            else:
+                tracks = load_packed_tracks(db, activity_ids=chunk)
+            for activity_id, track in tracks.items():
+                store_track(db, activity_id=activity_id, track=track, storage=target)
+                summary["migrated_points"] += len(track)
+            db.commit()
+            summary["migrated_activities"] += len(tracks)
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            summary["failed_chunks"] += 1
+            if len(summary["error_examples"]) < 20:
+                summary["error_examples"].append(
+                    {"first_activity_id": chunk[0], "error": f"{type(exc).__name__}: {exc}"}
+                )
+
+    summary["ok"] = summary["failed_chunks"] == 0
+    if output_path is not None:
+        path = _write_summary(summary, output_path=output_path)
+        summary["summary_path"] = str(path)
+    return summary
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert stored tracks between per-point rows and packed per-activity rows.",
+    )
+    parser.add_argument(
+        "--to",
+        dest="target",
+        choices=TRACK_STORAGE_MODES,
+        default=TRACK_STORAGE_PACKED,
+        help=f"Target storage (default: {TRACK_STORAGE_PACKED}; '{TRACK_STORAGE_POINTS}' reverts).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Activities converted per transaction.",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Max number of activities to convert.")
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_SUMMARY_PATH),
+        help="Path for migration summary JSON artifact.",
+    )
+    return parser
+
+
+def main() -> int:
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        summary = migrate_track_storage(
+            db,
+            target=args.target,
+            chunk_size=args.chunk_size,
+            limit=args.limit,
+            output_path=args.output,
+        )
+    print(json.dumps(summary, indent=2, sort_keys=True))
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.db import SessionLocal, engine
+from app.models.activity import Activity
+from app.services.quality import DISTANCE_MODES
+from app.services.track import stored_track_exists
+from app.services.quality_metrics import (
+    DEFAULT_BATCH_CHUNK_SIZE,
+    DEFAULT_DISTANCE_MODE,
+    DEFAULT_SPIKE_SPEED_MPS,
+    DEFAULT_STOP_MIN_DURATION_S,
+    DEFAULT_STOP_SPEED_MPS,
+    upsert_quality_metrics_from_points_batch,
+)
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_SUMMARY_PATH = ROOT_DIR / "artifacts/ml/recompute_summary.json"
+
+# Per-process session factory, created by `_init_worker` so no connection crosses a fork.
+_worker_session_factory: sessionmaker | None = None
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_session_factory
+    worker_engine = create_engine(database_url, pool_pre_ping=True, pool_size=1, max_overflow=0)
+    _worker_session_factory = sessionmaker(bind=worker_engine, autoflush=False, autocommit=False)
+
+
+def _recompute_chunk(activity_ids: list[int], thresholds: dict) -> dict:
+    if _worker_session_factory is None:
+        raise RuntimeError("Worker session factory is not initialized")
+
+    with _worker_session_factory() as db:
+        # Events are rebuilt under the same thresholds and committed with the metrics.
+        metrics = upsert_quality_metrics_from_points_batch(
+            db,
+            activity_ids=activity_ids,
+            record_events=True,
+            **thresholds,
+        )
+        db.commit()
+    return {
+        "selected": len(activity_ids),
+        "recomputed": len(metrics),
+        "skipped_without_points": len(activity_ids) - len(metrics),
+    }
+
+
+def shard_activity_ids(activity_ids: list[int], chunk_size: int) -> list[list[int]]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return [activity_ids[i : i + chunk_size] for i in range(0, len(activity_ids), chunk_size)]
+
+
+def _query_target_activity_ids(
+    db: Session,
+    *,
+    sport_type: str | None,
+    limit: int | None,
+    offset: int,
+) -> list[int]:
+    q = db.query(Activity.id).filter(stored_track_exists(Activity.id))
+    if sport_type:
+        q = q.filter(Activity.sport_type == sport_type)
+    q = q.order_by(Activity.id.asc()).offset(offset)
+    if limit is not None:
+        q = q.limit(limit)
+    return [row[0] for row in q.all()]
+
+
+def _write_summary(summary: dict, output_path: str | Path) -> Path:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def _report_progress(done_chunks: int, total_chunks: int, done_activities: int, total: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rate = done_activities / elapsed if elapsed > 0 else 0.0
+    print(
+        f"[recompute] chunks {done_chunks}/{total_chunks} "
+        f"activities {done_activities}/{total} ({rate:.1f}/s)",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def recompute_quality_metrics(
+    *,
+    database_url: str,
+    activity_ids: list[int],
+    workers: int = 1,
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    progress: bool = True,
+    output_path: str | Path | None = DEFAULT_SUMMARY_PATH,
+) -> dict:
+    """Recompute `activity_quality_metrics` from stored points, sharded across processes.
+
+    Each chunk of `chunk_size` activities is one task; every worker owns its
+    own engine and session and writes a chunk's metrics, together with the
+    rebuilt `activity_quality_events`, in one transaction.
+    `workers=1` runs inline without a pool.
+    """
+    thresholds = {
+        "spike_speed_mps": spike_speed_mps,
+        "stop_speed_mps": stop_speed_mps,
+        "stop_min_duration_s": stop_min_duration_s,
+        "distance_mode": distance_mode,
+    }
+    chunks = shard_activity_ids(activity_ids, chunk_size)
+    summary = {
+        "ok": True,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "chunks": len(chunks),
+        "thresholds": thresholds,
+        "selected_activities": len(activity_ids),
+        "recomputed": 0,
+        "skipped_without_points": 0,
+        "failed_chunks": 0,
+        "error_examples": [],
+    }
+
+    started = time.perf_counter()
+    done_chunks = 0
+    done_activities = 0
+
+    def _collect(chunk: list[int], result: dict | None, exc: BaseException | None) -> None:
+        nonlocal done_chunks, done_activities
+        done_chunks += 1
+        done_activities += len(chunk)
+        if exc is not None:
+            summary["failed_chunks"] += 1
+            if len(summary["error_examples"]) < 20:
+                summary["error_examples"].append(
+                    {"first_activity_id": chunk[0], "error": f"{type(exc).__name__}: {exc}"}
+                )
+        else:
+            summary["recomputed"] += result["recomputed"]
+            summary["skipped_without_points"] += result["skipped_without_points"]
+        if progress:
+            _report_progress(done_chunks, len(chunks), done_activities, len(activity_ids), started)
+
+    if workers <= 1:
+        _init_worker(database_url)
+        try:
+            for chunk in chunks:
+                try:
+                    _collect(chunk, _recompute_chunk(chunk, thresholds), None)
+                except Exception as exc:  # noqa: BLE001
+                    _collect(chunk, None, exc)
+        finally:
+            _worker_session_factory.kw["bind"].dispose()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(database_url,),
+        ) as pool:
+            futures = {pool.submit(_recompute_chunk, chunk, thresholds): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    _collect(chunk, future.result(), None)
+                except Exception as exc:  # noqa: BLE001
+                    _collect(chunk, None, exc)
+
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["activities_per_s"] = round(len(activity_ids) / elapsed, 2) if elapsed > 0 else None
+    summary["ok"] = summary["failed_chunks"] == 0
+
+    if output_path is not None:
+        path = _write_summary(summary, output_path=output_path)
+        summary["summary_path"] = str(path)
+    return summary
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Recompute activity_quality_metrics from stored tracks using a process pool.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: all cores). 1 runs inline.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_BATCH_CHUNK_SIZE,
+        help="Activities per task; each task is one query, one vectorized pass and one commit.",
+    )
+    parser.add_argument("--sport-type", default=None, help="Optional exact sport_type filter (e.g. Run).")
+    parser.add_argument("--limit", type=int, default=None, help="Max number of activities to process.")
+    parser.add_argument("--offset", type=int, default=0, help="Offset into the ordered activity set.")
+    parser.add_argument("--spike-speed-mps", type=float, default=DEFAULT_SPIKE_SPEED_MPS)
+    parser.add_argument("--stop-speed-mps", type=float, default=DEFAULT_STOP_SPEED_MPS)
+    parser.add_argument("--stop-min-duration-s", type=int, default=DEFAULT_STOP_MIN_DURATION_S)
+    parser.add_argument(
+        "--distance-mode",
+        choices=DISTANCE_MODES,
+        default=DEFAULT_DISTANCE_MODE,
+        help="Pair distance model; 'equirectangular' is faster with a bounded relative error.",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Disable per-chunk progress lines on stderr.",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_SUMMARY_PATH),
+        help="Path for recompute summary JSON artifact.",
+    )
+    return parser
+
+
+def main() -> int:
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        activity_ids = _query_target_activity_ids(
+            db,
+            sport_type=args.sport_type,
+            limit=args.limit,
+            offset=args.offset,
+        )
+    # Drop parent connections before forking workers.
+    engine.dispose()
+
+    summary = recompute_quality_metrics(
+        database_url=settings.DATABASE_URL,
+        activity_ids=activity_ids,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        spike_speed_mps=args.spike_speed_mps,
+        stop_speed_mps=args.stop_speed_mps,
+        stop_min_duration_s=args.stop_min_duration_s,
+        distance_mode=args.distance_mode,
+        progress=not args.no_progress,
+        output_path=args.output,
+    )
+    print(json.dumps(summary, indent=2, sort_keys=True))
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
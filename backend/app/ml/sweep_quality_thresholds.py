@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.ml.bootstrap_labels import evaluate_weak_label
+from app.models.activity import Activity
+from app.services.quality_metrics import (
+    DEFAULT_SPIKE_SPEED_MPS,
+    DEFAULT_STOP_MIN_DURATION_S,
+    DEFAULT_STOP_SPEED_MPS,
+)
+from app.services.quality_sweep import ThresholdGrid, sweep_quality_thresholds
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_TABLE_PATH = ROOT_DIR / "artifacts/ml/threshold_sweep.csv"
+DEFAULT_SUMMARY_PATH = ROOT_DIR / "artifacts/ml/threshold_sweep_summary.json"
+
+TABLE_COLUMNS = (
+    "activity_id",
+    "spike_speed_mps",
+    "stop_speed_mps",
+    "stop_min_duration_s",
+    "point_count",
+    "duration_s",
+    "distance_m",
+    "max_speed_mps",
+    "spike_count",
+    "stopped_time_s",
+    "stop_segments",
+    "jitter_score",
+    "weak_label_bad",
+)
+
+
+def _parse_float_list(value: str) -> tuple[float, ...]:
+    return tuple(float(token) for token in value.split(",") if token.strip())
+
+
+def _parse_int_list(value: str) -> tuple[int, ...]:
+    return tuple(int(token) for token in value.split(",") if token.strip())
+
+
+def _query_activities(
+    db: Session,
+    *,
+    sport_type: str | None,
+    limit: int | None,
+    offset: int,
+) -> dict[int, float | None]:
+    q = db.query(Activity.id, Activity.distance_m)
+    if sport_type:
+        q = q.filter(Activity.sport_type == sport_type)
+    q = q.order_by(Activity.id.asc()).offset(offset)
+    if limit is not None:
+        q = q.limit(limit)
+    return {row[0]: row[1] for row in q.all()}
+
+
+def _label_rows(rows: list[dict], official_distances: dict[int, float | None]) -> None:
+    for row in rows:
+        decision = evaluate_weak_label(
+            SimpleNamespace(
+                distance_m_gps=row["distance_m"],
+                spike_count=row["spike_count"],
+                jitter_score=row["jitter_score"],
+                max_speed_mps=row["max_speed_mps"],
+            ),
+            official_distance_m=official_distances.get(row["activity_id"]),
+        )
+        row["weak_label_bad"] = decision.label_bad
+
+
+def _summarize_combinations(rows: list[dict]) -> list[dict]:
+    grouped: dict[tuple, list[dict]] = defaultdict(list)
+    for row in rows:
+        grouped[(row["spike_speed_mps"], row["stop_speed_mps"], row["stop_min_duration_s"])].append(row)
+
+    combinations = []
+    for (spike_speed, stop_speed, min_duration), group in sorted(grouped.items()):
+        n = len(group)
+        combinations.append(
+            {
+                "spike_speed_mps": spike_speed,
+                "stop_speed_mps": stop_speed,
+                "stop_min_duration_s": min_duration,
+                "activities": n,
+                "mean_spike_count": round(sum(r["spike_count"] for r in group) / n, 4),
+                "mean_stop_segments": round(sum(r["stop_segments"] for r in group) / n, 4),
+                "mean_stopped_time_s": round(sum(r["stopped_time_s"] for r in group) / n, 2),
+                "weak_bad_ratio": round(sum(1 for r in group if r["weak_label_bad"]) / n, 4),
+            }
+        )
+    return combinations
+
+
+def _write_table(rows: list[dict], output_path: str | Path) -> Path:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _write_summary(summary: dict, output_path: str | Path) -> Path:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def run_threshold_sweep(
+    db: Session,
+    *,
+    grid: ThresholdGrid,
+    sport_type: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    table_path: str | Path | None = DEFAULT_TABLE_PATH,
+    output_path: str | Path | None = DEFAULT_SUMMARY_PATH,
+) -> dict:
+    official_distances = _query_activities(db, sport_type=sport_type, limit=limit, offset=offset)
+    rows = sweep_quality_thresholds(db, activity_ids=list(official_distances), grid=grid)
+    _label_rows(rows, official_distances)
+
+    summary = {
+        "ok": True,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "selected_activities": len(official_distances),
+        "activities_with_points": len({row["activity_id"] for row in rows}),
+        "combinations": grid.size,
+        "rows": len(rows),
+        "sport_type": sport_type,
+        "grid": {
+            "spike_speeds_mps": list(grid.spike_speeds_mps),
+            "stop_speeds_mps": list(grid.stop_speeds_mps),
+            "stop_min_durations_s": list(grid.stop_min_durations_s),
+        },
+        "by_combination": _summarize_combinations(rows),
+    }
+
+    if table_path is not None:
+        summary["table_path"] = str(_write_table(rows, table_path))
+    if output_path is not None:
+        path = _write_summary(summary, output_path=output_path)
+        summary["summary_path"] = str(path)
+    return summary
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Evaluate a grid of quality thresholds over stored points in one pass per activity chunk.",
+    )
+    parser.add_argument(
+        "--spike-speeds",
+        type=_parse_float_list,
+        default=(DEFAULT_SPIKE_SPEED_MPS,),
+        help="Comma-separated spike speed thresholds in m/s, e.g. 8,10,12.",
+    )
+    parser.add_argument(
+        "--stop-speeds",
+        type=_parse_float_list,
+        default=(DEFAULT_STOP_SPEED_MPS,),
+        help="Comma-separated stop speed thresholds in m/s, e.g. 0.4,0.6,0.8.",
+    )
+    parser.add_argument(
+        "--stop-min-durations",
+        type=_parse_int_list,
+        default=(DEFAULT_STOP_MIN_DURATION_S,),
+        help="Comma-separated minimum stop durations in seconds, e.g. 5,10,20.",
+    )
+    parser.add_argument("--sport-type", default=None, help="Optional exact sport_type filter (e.g. Run).")
+    parser.add_argument("--limit", type=int, default=None, help="Max number of activities to scan.")
+    parser.add_argument("--offset", type=int, default=0, help="Offset in ordered activities list.")
+    parser.add_argument(
+        "--table-output",
+        default=str(DEFAULT_TABLE_PATH),
+        help="Path for the per-activity, per-combination CSV table.",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_SUMMARY_PATH),
+        help="Path for the JSON summary artifact.",
+    )
+    return parser
+
+
+def main() -> int:
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+    grid = ThresholdGrid(
+        spike_speeds_mps=args.spike_speeds,
+        stop_speeds_mps=args.stop_speeds,
+        stop_min_durations_s=args.stop_min_durations,
+    )
+
+    with SessionLocal() as db:
+        summary = run_threshold_sweep(
+            db,
+            grid=grid,
+            sport_type=args.sport_type,
+            limit=args.limit,
+            offset=args.offset,
+            table_path=args.table_output,
+            output_path=args.output,
+        )
+    print(json.dumps(summary, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,6 +6,11 @@ from app.models.activity_point import ActivityPoint
 from app.models.activity_quality_metric import ActivityQualityMetric
 from app.models.activity_quality_label import ActivityQualityLabel
 from app.models.activity_ml_feature import ActivityMLFeature
+from app.models.activity_quality_event import ActivityQualityEvent
+from app.models.activity_track import ActivityTrack
+from app.models.strava_rate_limit import StravaRateLimitState
+from app.models.sync_job import SyncJob
+from app.models.sync_cursor import SyncCursor
 
 __all__ = [
     "Base",
@@ -16,4 +21,9 @@ __all__ = [
     "ActivityQualityMetric",
     "ActivityQualityLabel",
     "ActivityMLFeature",
+    "ActivityQualityEvent",
+    "ActivityTrack",
+    "StravaRateLimitState",
+    "SyncJob",
+    "SyncCursor",
 ]
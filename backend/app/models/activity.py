@@ -28,3 +28,8 @@ class Activity(Base):
     distance_m: Mapped[float | None] = mapped_column(Float, nullable=True)
     moving_time_s: Mapped[int | None] = mapped_column(Integer, nullable=True)
     elevation_gain_m: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # SHA-256 of the last ingested stream (`Track.content_hash`); lets re-ingest skip unchanged streams.
+    stream_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Strava stream resolution of the stored track: "full", or "low"/"medium"/"high" when down-sampled.
+    stream_resolution: Mapped[str | None] = mapped_column(String(16), nullable=True)
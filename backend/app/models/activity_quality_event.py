@@ -0,0 +1,33 @@
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base
+
+
+class ActivityQualityEvent(Base):
+    """A spike or stop segment located by point sequence range."""
+
+    __tablename__ = "activity_quality_events"
+    __table_args__ = (
+        Index("ix_activity_quality_events_activity_id_event_type", "activity_id", "event_type"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    activity_id: Mapped[int] = mapped_column(
+        ForeignKey("activities.id", ondelete="CASCADE"),
+    )
+    activity = relationship("Activity")
+
+    # "spike" or "stop"
+    event_type: Mapped[str] = mapped_column(String(16))
+
+    # inclusive activity_points.seq range covered by the event
+    start_seq: Mapped[int] = mapped_column(Integer)
+    end_seq: Mapped[int] = mapped_column(Integer)
+
+    start_time_s: Mapped[int] = mapped_column(Integer)
+    end_time_s: Mapped[int] = mapped_column(Integer)
+
+    # fastest pair speed inside the event
+    peak_speed_mps: Mapped[float] = mapped_column(Float)
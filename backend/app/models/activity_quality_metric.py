@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -30,6 +30,7 @@ class ActivityQualityMetric(Base):
     spike_speed_threshold_mps: Mapped[float] = mapped_column(Float)
     stop_speed_threshold_mps: Mapped[float] = mapped_column(Float)
     stop_min_duration_s: Mapped[int] = mapped_column(Integer)
+    distance_mode: Mapped[str] = mapped_column(String(16), server_default="haversine")
 
     computed_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base
+
+
+class ActivityTrack(Base):
+    """Whole stream of one activity packed into a single row.
+
+    Columns hold little-endian arrays: float64 lat/lon, int32 time_s and
+    float64 ele_m (NaN where missing). Alternative to one `activity_points`
+    row per sample; see `app.services.track`.
+    """
+
+    __tablename__ = "activity_tracks"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    activity_id: Mapped[int] = mapped_column(
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        unique=True,
+        index=True,
+    )
+    activity = relationship("Activity")
+
+    point_count: Mapped[int] = mapped_column(Integer)
+
+    lat: Mapped[bytes] = mapped_column(LargeBinary)
+    lon: Mapped[bytes] = mapped_column(LargeBinary)
+    time_s: Mapped[bytes] = mapped_column(LargeBinary)
+    ele_m: Mapped[bytes] = mapped_column(LargeBinary)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class StravaRateLimitState(Base):
+    """Shared Strava quota usage per application (`scope` = client id).
+
+    Every process reserves request slots against this row under
+    `SELECT ... FOR UPDATE`; see `app.services.strava_rate_limit`.
+    """
+
+    __tablename__ = "strava_rate_limit_state"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    limit_15m: Mapped[int] = mapped_column(Integer)
+    limit_day: Mapped[int] = mapped_column(Integer)
+    usage_15m: Mapped[int] = mapped_column(Integer)
+    usage_day: Mapped[int] = mapped_column(Integer)
+
+    window_15m_start: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    day_start: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    next_request_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class SyncCursor(Base):
+    """Newest Strava activity a user's incremental syncs have seen.
+
+    Default syncs ask Strava only for activities after `last_start_date`;
+    see `app.services.activity_sync.sync_user_activities`.
+    """
+
+    __tablename__ = "activity_sync_cursors"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    last_start_date: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_strava_activity_id: Mapped[int] = mapped_column(BigInteger)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
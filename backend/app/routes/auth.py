@@ -59,7 +59,7 @@ def strava_callback(
     except (BadSignature, SignatureExpired):
         raise HTTPException(status_code=400, detail="Invalid OAuth state")
 
-    token_url = "https://www.strava.com/oauth/token"
+    token_url = settings.STRAVA_TOKEN_URL
     payload = {
         "client_id": settings.STRAVA_CLIENT_ID,
         "client_secret": settings.STRAVA_CLIENT_SECRET,
@@ -9,6 +9,7 @@ from app.models.activity_quality_label import ActivityQualityLabel
 from app.models.user import User
 from app.schemas.ml_label import ActivityQualityLabelOut, ActivityQualityLabelUpsertIn
 from app.services.ml_features import FEATURE_VERSION_V1, build_activity_features
+from app.services.quality_metrics import compute_missing_quality_metrics
 
 router = APIRouter(prefix="/ml", tags=["ml"])
 
@@ -93,6 +94,9 @@ def rebuild_ml_features(
         q = q.limit(limit)
     activity_ids = [row[0] for row in q.all()]
 
+    # Fill missing metrics in one vectorized pass instead of one compute per activity.
+    compute_missing_quality_metrics(db, activity_ids=activity_ids)
+
     rebuilt = 0
     skipped = 0
     skipped_activity_ids: list[int] = []
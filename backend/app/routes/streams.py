@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from geoalchemy2.functions import ST_X, ST_Y
-from sqlalchemy import text
 
 from app.core.auth import get_current_user, get_user_activity_or_404
 from app.core.db import get_db
+from app.integrations.strava_rate_limit import RateLimitExhaustedError
 from app.models.activity import Activity
-from app.models.activity_point import ActivityPoint
 from app.models.user import User
 from app.services.ml_features import build_activity_features
 from app.services.quality_metrics import (
+    DEFAULT_SPIKE_SPEED_MPS,
+    DEFAULT_STOP_MIN_DURATION_S,
+    DEFAULT_STOP_SPEED_MPS,
     get_or_compute_quality_metric,
 )
+from app.services.quality import QUALITY_EVENT_TYPES
+from app.services.quality_events import list_quality_events
+from app.services.quality_timeline import get_quality_timeline
+from app.services.track import Track, load_track
 from app.services.stream_ingest import (
     ActivityNotFoundError,
     MissingStreamDataError,
@@ -41,12 +49,34 @@ def _quality_payload(activity: Activity, metric) -> dict:
             "spike_speed_threshold_mps": metric.spike_speed_threshold_mps,
             "stop_speed_threshold_mps": metric.stop_speed_threshold_mps,
             "stop_min_duration_s": metric.stop_min_duration_s,
+            "distance_mode": metric.distance_mode,
         },
     }
 
+
+def _point_features(activity_id: int, track: Track) -> list[dict]:
+    has_ele = ~np.isnan(track.ele)
+    return [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "activity_id": activity_id,
+                "seq": seq,
+                "time_s": time_s,
+                "ele_m": int(ele_m) if known else None,
+            },
+        }
+        for seq, (lon, lat, time_s, ele_m, known) in enumerate(
+            zip(track.lon.tolist(), track.lat.tolist(), track.time.tolist(), track.ele.tolist(), has_ele.tolist())
+        )
+    ]
+
+
 @router.post("/{activity_id}/ingest_streams")
 def ingest_activity_streams(
     activity_id: int,
+    refresh: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -57,6 +87,7 @@ def ingest_activity_streams(
             db,
             activity_id=activity_id,
             commit=True,
+            refresh_streams=refresh,
         )
     except ActivityNotFoundError:
         raise HTTPException(status_code=404, detail="Activity not found")
@@ -66,6 +97,9 @@ def ingest_activity_streams(
     except MissingStreamDataError as exc:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(exc))
+    except RateLimitExhaustedError as exc:
+        db.rollback()
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(math.ceil(exc.wait_s))})
 
     return {"ok": True, "points": result.points}
 
@@ -78,27 +112,17 @@ def get_activity_track(
 ):
     activity = get_user_activity_or_404(db, current_user=current_user, activity_id=activity_id)
 
-    # Ensure points exist
-    count = db.query(ActivityPoint).filter(ActivityPoint.activity_id == activity_id).count()
+    track = load_track(db, activity_id=activity_id)
+    count = len(track)
     if count == 0:
         raise HTTPException(status_code=404, detail="No points found. Ingest streams first.")
 
-    # Build a LineString in PostGIS from ordered points
-    # ST_MakeLine over ordered points gives us a geometry LINESTRING
-    sql = text("""
-        SELECT ST_AsGeoJSON(
-            ST_MakeLine(geom ORDER BY seq)
-        ) AS geojson
-        FROM activity_points
-        WHERE activity_id = :activity_id
-    """)
-
-    row = db.execute(sql, {"activity_id": activity_id}).mappings().one()
-    linestring_geojson = row["geojson"]
-
     feature = {
         "type": "Feature",
-        "geometry": None if linestring_geojson is None else __import__("json").loads(linestring_geojson),
+        "geometry": {
+            "type": "LineString",
+            "coordinates": np.column_stack([track.lon, track.lat]).tolist(),
+        },
         "properties": {
             "activity_id": activity_id,
             "name": activity.name,
@@ -119,40 +143,11 @@ def get_activity_points_geojson(
 ):
     activity = get_user_activity_or_404(db, current_user=current_user, activity_id=activity_id)
 
-    rows = (
-        db.query(
-            ST_X(ActivityPoint.geom),
-            ST_Y(ActivityPoint.geom),
-            ActivityPoint.seq,
-            ActivityPoint.time_s,
-            ActivityPoint.ele_m,
-        )
-        .filter(ActivityPoint.activity_id == activity_id)
-        .order_by(ActivityPoint.seq.asc())
-        .all()
-    )
-    if not rows:
+    track = load_track(db, activity_id=activity_id)
+    if not len(track):
         raise HTTPException(status_code=404, detail="No points found. Ingest streams first.")
 
-    features = []
-    for row in rows:
-        lon = float(row[0])
-        lat = float(row[1])
-        seq = int(row[2])
-        time_s = int(row[3])
-        ele_m = int(row[4]) if row[4] is not None else None
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {"type": "Point", "coordinates": [lon, lat]},
-                "properties": {
-                    "activity_id": activity_id,
-                    "seq": seq,
-                    "time_s": time_s,
-                    "ele_m": ele_m,
-                },
-            }
-        )
+    features = _point_features(activity_id, track)
 
     return {
         "type": "FeatureCollection",
@@ -187,6 +182,76 @@ def activity_quality(
     return _quality_payload(activity, metric)
 
 
+@router.get("/{activity_id}/quality/timeline")
+def activity_quality_timeline(
+    activity_id: int,
+    window_s: int = Query(default=60, ge=5, le=86_400),
+    spike_speed_mps: float = Query(default=DEFAULT_SPIKE_SPEED_MPS, gt=0),
+    stop_speed_mps: float = Query(default=DEFAULT_STOP_SPEED_MPS, ge=0),
+    stop_min_duration_s: int = Query(default=DEFAULT_STOP_MIN_DURATION_S, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    get_user_activity_or_404(db, current_user=current_user, activity_id=activity_id)
+
+    try:
+        windows = get_quality_timeline(
+            db,
+            activity_id=activity_id,
+            window_s=window_s,
+            spike_speed_mps=spike_speed_mps,
+            stop_speed_mps=stop_speed_mps,
+            stop_min_duration_s=stop_min_duration_s,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+    return {
+        "activity_id": activity_id,
+        "window_s": window_s,
+        "window_count": len(windows),
+        "notes": {
+            "spike_speed_threshold_mps": spike_speed_mps,
+            "stop_speed_threshold_mps": stop_speed_mps,
+            "stop_min_duration_s": stop_min_duration_s,
+        },
+        "windows": windows,
+    }
+
+
+@router.get("/{activity_id}/quality/events")
+def activity_quality_events(
+    activity_id: int,
+    event_type: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    get_user_activity_or_404(db, current_user=current_user, activity_id=activity_id)
+
+    if event_type is not None and event_type not in QUALITY_EVENT_TYPES:
+        allowed = ", ".join(QUALITY_EVENT_TYPES)
+        raise HTTPException(status_code=400, detail=f"event_type must be one of: {allowed}")
+
+    events = list_quality_events(db, activity_id=activity_id, event_type=event_type)
+    return {
+        "activity_id": activity_id,
+        "event_type": event_type,
+        "event_count": len(events),
+        "events": [
+            {
+                "event_type": event.event_type,
+                "start_seq": event.start_seq,
+                "end_seq": event.end_seq,
+                "start_time_s": event.start_time_s,
+                "end_time_s": event.end_time_s,
+                "duration_s": event.end_time_s - event.start_time_s,
+                "peak_speed_mps": event.peak_speed_mps,
+            }
+            for event in events
+        ],
+    }
+
+
 @router.get("/{activity_id}/features")
 def activity_features(
     activity_id: int,
@@ -4,21 +4,15 @@ from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
 from app.core.db import get_db
-from app.models.activity import Activity
 from app.models.strava_token import StravaToken
+from app.models.sync_job import SyncJob
 from app.models.user import User
-from app.services.strava_session import build_strava_client, persist_refreshed_token
+from app.services.activity_sync import SYNC_MODE_FULL, SYNC_MODE_INCREMENTAL, SYNC_MODE_RANGE, SyncParams
+from app.services.sync_jobs import enqueue_sync_job, job_summary, wake_sync_worker
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
-def parse_start_date(s: str | None):
-    if not s:
-        return None
-    # Strava returns ISO 8601 like "2024-01-01T12:34:56Z"
-    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
-
-
 def to_unix_timestamp(value: datetime | None) -> int | None:
     if value is None:
         return None
@@ -29,7 +23,7 @@ def to_unix_timestamp(value: datetime | None) -> int | None:
     return int(value.timestamp())
 
 
-@router.post("/activities")
+@router.post("/activities", status_code=202)
 def sync_activities(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -39,97 +33,47 @@ def sync_activities(
     before: datetime | None = None,
     sport_type: str | None = None,
     name_contains: str | None = None,
+    full_resync: bool = False,
 ):
+    """
+    Queue an activity sync and return its job; poll `GET /sync/jobs/{job_id}` for progress.
+
+    Without `after`/`before` or filters only activities newer than the user's
+    sync cursor are fetched; `full_resync` re-reads the whole history instead.
+    While a sync of the user is queued or running, that job is returned instead.
+    """
     if after and before and after >= before:
         raise HTTPException(status_code=400, detail="'after' must be earlier than 'before'")
+    explicit_range = any(value is not None for value in (after, before, sport_type, name_contains))
+    if full_resync and explicit_range:
+        raise HTTPException(status_code=400, detail="'full_resync' cannot be combined with a date range or filters")
 
     token = db.query(StravaToken).filter(StravaToken.user_id == current_user.id).one_or_none()
     if not token:
         raise HTTPException(status_code=404, detail="No Strava token found. Login with Strava first.")
 
-    client = build_strava_client(token)
-    after_ts = to_unix_timestamp(after)
-    before_ts = to_unix_timestamp(before)
-    sport_filter = sport_type.lower() if sport_type else None
-    name_filter = name_contains.lower() if name_contains else None
-
-    fetched = 0
-    inserted = 0
-    updated = 0
-    skipped = 0
-    pages = 0
-
-    page = 1
-    while True:
-        if max_pages is not None and page > max_pages:
-            break
-
-        items = client.list_activities(
-            per_page=per_page,
-            page=page,
-            after=after_ts,
-            before=before_ts,
-        )
-        if not isinstance(items, list):
-            raise HTTPException(status_code=502, detail="Unexpected response from Strava activities API")
-
-        pages += 1
-        fetched += len(items)
-        if not items:
-            break
-
-        for a in items:
-            name = a.get("name") or ""
-            sport = a.get("sport_type") or a.get("type") or ""
-
-            if sport_filter and sport.lower() != sport_filter:
-                skipped += 1
-                continue
-            if name_filter and name_filter not in name.lower():
-                skipped += 1
-                continue
-
-            strava_id = a.get("id")
-            if strava_id is None:
-                skipped += 1
-                continue
-
-            activity = (
-                db.query(Activity)
-                .filter(
-                    Activity.strava_activity_id == strava_id,
-                    Activity.user_id == current_user.id,
-                )
-                .one_or_none()
-            )
-            if activity is None:
-                activity = Activity(strava_activity_id=strava_id, user_id=current_user.id)
-                db.add(activity)
-                inserted += 1
-            else:
-                updated += 1
-
-            activity.name = name or None
-            activity.sport_type = sport or None
-            activity.start_date = parse_start_date(a.get("start_date"))
-            activity.distance_m = a.get("distance")
-            activity.moving_time_s = a.get("moving_time")
-            activity.elevation_gain_m = a.get("total_elevation_gain")
-
-        if len(items) < per_page:
-            break
-
-        page += 1
-
-    persist_refreshed_token(db, token, client, commit=False)
-    db.commit()
-    upserted = inserted + updated
-    return {
-        "ok": True,
-        "count": upserted,
-        "fetched": fetched,
-        "inserted": inserted,
-        "updated": updated,
-        "skipped": skipped,
-        "pages": pages,
-    }
+    params = SyncParams(
+        per_page=per_page,
+        max_pages=max_pages,
+        after=to_unix_timestamp(after),
+        before=to_unix_timestamp(before),
+        sport_type=sport_type,
+        name_contains=name_contains,
+        mode=SYNC_MODE_RANGE if explicit_range else SYNC_MODE_FULL if full_resync else SYNC_MODE_INCREMENTAL,
+    )
+    job, created = enqueue_sync_job(db, user_id=current_user.id, params=params)
+    if created:
+        wake_sync_worker()
+    return {**job_summary(job), "deduplicated": not created}
+
+
+@router.get("/jobs/{job_id}")
+def get_sync_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = db.get(SyncJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job_summary(job)
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from typing import Callable, Iterator
+
+from sqlalchemy import Boolean, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.integrations.strava import StravaClient
+from app.models.activity import Activity
+from app.models.sync_cursor import SyncCursor
+
+logger = logging.getLogger(__name__)
+
+# "range": exactly the caller's after/before window; "incremental": after the user's
+# cursor (everything on the first sync); "full": the whole history. The last two move the cursor.
+SYNC_MODE_RANGE = "range"
+SYNC_MODE_INCREMENTAL = "incremental"
+SYNC_MODE_FULL = "full"
+SYNC_MODES = (SYNC_MODE_RANGE, SYNC_MODE_INCREMENTAL, SYNC_MODE_FULL)
+
+# Summary columns a sync overwrites on every upsert; stream-derived columns are left alone.
+SYNCED_COLUMNS = ("name", "sport_type", "start_date", "distance_m", "moving_time_s", "elevation_gain_m")
+
+
+def parse_start_date(s: str | None):
+    if not s:
+        return None
+    # Strava returns ISO 8601 like "2024-01-01T12:34:56Z"
+    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def activity_row(item: dict, *, user_id: int) -> dict:
+    """`activities` column values for one Strava activity summary."""
+    return {
+        "strava_activity_id": item["id"],
+        "user_id": user_id,
+        "name": item.get("name") or None,
+        "sport_type": item.get("sport_type") or item.get("type") or None,
+        "start_date": parse_start_date(item.get("start_date")),
+        "distance_m": item.get("distance"),
+        "moving_time_s": item.get("moving_time"),
+        "elevation_gain_m": item.get("total_elevation_gain"),
+    }
+
+
+def upsert_activities(db: Session, rows: list[dict]) -> tuple[int, int, int]:
+    """Insert or update `rows` in one statement; returns `(inserted, updated, rejected)`.
+
+    `INSERT ... ON CONFLICT (strava_activity_id) DO UPDATE ... RETURNING
+    (xmax = 0)` is true for freshly inserted rows and false for updated ones.
+    A Strava id already stored for a different user is left untouched and
+    counted as rejected. When a page repeats an id the last copy wins and the
+    earlier ones count as updates, as if they had been written one by one.
+    """
+    if not rows:
+        return 0, 0, 0
+    unique = {row["strava_activity_id"]: row for row in rows}
+    duplicates = len(rows) - len(unique)
+
+    stmt = insert(Activity).values(list(unique.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Activity.strava_activity_id],
+        set_={name: stmt.excluded[name] for name in SYNCED_COLUMNS},
+        where=Activity.user_id == stmt.excluded.user_id,
+    ).returning(literal_column("(xmax = 0)", type_=Boolean))
+    flags = db.execute(stmt).scalars().all()
+
+    inserted = sum(1 for flag in flags if flag)
+    updated = len(flags) - inserted + duplicates
+    return inserted, updated, len(unique) - len(flags)
+
+
+class UnexpectedStravaResponseError(ValueError):
+    """Strava answered a list request with something other than a list."""
+
+
+@dataclass(frozen=True)
+class SyncParams:
+    per_page: int = 30
+    max_pages: int | None = None
+    # Unix timestamps, as Strava's `after`/`before` filters take them.
+    after: int | None = None
+    before: int | None = None
+    sport_type: str | None = None
+    name_contains: str | None = None
+    mode: str = SYNC_MODE_RANGE
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class SyncProgress:
+    pages: int = 0
+    fetched: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    # Newest `(start_date, strava id)` among fetched activities, and whether paging reached the end.
+    latest: tuple[datetime, int] | None = None
+    complete: bool = False
+
+    @property
+    def count(self) -> int:
+        return self.inserted + self.updated
+
+    def observe(self, rows: list[dict]) -> None:
+        for row in rows:
+            if row["start_date"] is None:
+                continue
+            key = (row["start_date"], row["strava_activity_id"])
+            if self.latest is None or key > self.latest:
+                self.latest = key
+
+
+def select_rows(items: list[dict], *, user_id: int, params: SyncParams) -> tuple[list[dict], int]:
+    """Rows to upsert from one page of summaries, and how many were filtered out."""
+    sport_filter = params.sport_type.lower() if params.sport_type else None
+    name_filter = params.name_contains.lower() if params.name_contains else None
+    rows = []
+    skipped = 0
+    for a in items:
+        name = a.get("name") or ""
+        sport = a.get("sport_type") or a.get("type") or ""
+
+        if sport_filter and sport.lower() != sport_filter:
+            skipped += 1
+            continue
+        if name_filter and name_filter not in name.lower():
+            skipped += 1
+            continue
+        if a.get("id") is None:
+            skipped += 1
+            continue
+        rows.append(activity_row(a, user_id=user_id))
+    return rows, skipped
+
+
+@dataclass(frozen=True)
+class ShardPlan:
+    """How a sync without `max_pages` splits its date range for parallel fetching.
+
+    The range `(after or history_start, before or now)` is cut into `windows`
+    equal time slices, newest first; `concurrency` threads each page through
+    one window at a time, and up to `queue_size` fetched pages wait for the
+    writer, so every thread already requests its next page while the current
+    one is written.
+    """
+
+    windows: int = 24
+    concurrency: int = 4
+    queue_size: int = 8
+    # Unix time before which no activity is expected (Strava launched in 2009).
+    history_start: int = 1_230_768_000
+
+    def __post_init__(self):
+        if self.windows <= 0 or self.concurrency <= 0 or self.queue_size <= 0:
+            raise ValueError("windows, concurrency and queue_size must be positive")
+
+
+def split_windows(after: int, before: int, count: int) -> list[tuple[int, int]]:
+    """Adjacent `(after, before)` Strava filters that together cover `(after, before)`.
+
+    Strava's filters are exclusive at both ends; every window but the first
+    starts one second before its boundary, so each start time lands in exactly
+    one window. Newest window first.
+    """
+    if before <= after:
+        return []
+    count = max(1, min(count, before - after))
+    bounds = [after + (before - after) * i // count for i in range(count + 1)]
+    windows = [(bounds[i] - 1 if i else after, bounds[i + 1]) for i in range(count)]
+    return windows[::-1]
+
+
+def iter_activity_pages(client: StravaClient, params: SyncParams, progress: SyncProgress) -> Iterator[list[dict]]:
+    """Pages of `params`' range one request at a time, counting them in `progress`."""
+    page = 1
+    while params.max_pages is None or page <= params.max_pages:
+        items = client.list_activities(
+            per_page=params.per_page,
+            page=page,
+            after=params.after,
+            before=params.before,
+        )
+        if not isinstance(items, list):
+            raise UnexpectedStravaResponseError("Unexpected response from Strava activities API")
+
+        progress.pages += 1
+        progress.fetched += len(items)
+        if not items:
+            progress.complete = True
+            return
+        yield items
+
+        if len(items) < params.per_page:
+            progress.complete = True
+            return
+        page += 1
+
+
+_WINDOW_WORKER_DONE = object()
+
+
+def iter_window_pages(
+    client: StravaClient,
+    params: SyncParams,
+    progress: SyncProgress,
+    plan: ShardPlan,
+) -> Iterator[list[dict]]:
+    """Pages of `params`' range fetched concurrently per `plan`, in arrival order.
+
+    Windows do not overlap, and pages are yielded in no particular order;
+    upserting them is idempotent, so a window fetched twice (e.g. after a
+    retried job) merges cleanly. The first fetch error stops all threads and
+    is re-raised once they have finished; closing the generator stops and
+    joins them too. Requests go through `client`, so they share its rate
+    limiter and token refresh.
+    """
+    after = params.after if params.after is not None else plan.history_start
+    before = params.before if params.before is not None else int(time.time()) + 86_400
+    todo: queue.SimpleQueue[tuple[int, int]] = queue.SimpleQueue()
+    windows = split_windows(after, before, plan.windows)
+    for window in windows:
+        todo.put(window)
+    fetched: queue.Queue = queue.Queue(maxsize=plan.queue_size)
+    stop = threading.Event()
+
+    def _fetch_windows() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    window_after, window_before = todo.get_nowait()
+                except queue.Empty:
+                    return
+                page = 1
+                while not stop.is_set():
+                    items = client.list_activities(
+                        per_page=params.per_page,
+                        page=page,
+                        after=window_after,
+                        before=window_before,
+                    )
+                    if not isinstance(items, list):
+                        raise UnexpectedStravaResponseError("Unexpected response from Strava activities API")
+                    fetched.put(items)
+                    if len(items) < params.per_page:
+                        break
+                    page += 1
+        except Exception as exc:  # noqa: BLE001
+            fetched.put(exc)
+        finally:
+            fetched.put(_WINDOW_WORKER_DONE)
+
+    threads = [
+        threading.Thread(target=_fetch_windows, name=f"sync-window-{i}", daemon=True)
+        for i in range(min(plan.concurrency, len(windows)))
+    ]
+    for thread in threads:
+        thread.start()
+
+    finished = 0
+    error: Exception | None = None
+    try:
+        while finished < len(threads):
+            item = fetched.get()
+            if item is _WINDOW_WORKER_DONE:
+                finished += 1
+            elif isinstance(item, Exception):
+                error = error or item
+                stop.set()
+            else:
+                progress.pages += 1
+                progress.fetched += len(item)
+                if item and error is None:
+                    yield item
+        if error is not None:
+            raise error
+        progress.complete = True
+    finally:
+        # Also reached when the consumer stops early: drain so blocked fetchers can exit.
+        stop.set()
+        while finished < len(threads):
+            if fetched.get() is _WINDOW_WORKER_DONE:
+                finished += 1
+        for thread in threads:
+            thread.join()
+
+
+def sync_activity_pages(
+    db: Session,
+    client: StravaClient,
+    *,
+    user_id: int,
+    params: SyncParams,
+    on_page: Callable[[SyncProgress], None] | None = None,
+    shard: ShardPlan | None = None,
+) -> SyncProgress:
+    """Page through the athlete's activities and upsert each page.
+
+    With a `shard` plan (ignored when `max_pages` is set) the range is fetched
+    as concurrent date windows; otherwise page after page. `on_page` runs
+    after every page is written, so a caller can commit and report progress.
+    Nothing is committed here.
+    """
+    progress = SyncProgress()
+    if shard is not None and params.max_pages is None:
+        pages = iter_window_pages(client, params, progress, shard)
+    else:
+        pages = iter_activity_pages(client, params, progress)
+
+    try:
+        for items in pages:
+            rows, skipped = select_rows(items, user_id=user_id, params=params)
+            progress.observe(rows)
+            inserted, updated, rejected = upsert_activities(db, rows)
+            progress.inserted += inserted
+            progress.updated += updated
+            progress.skipped += skipped + rejected
+            if on_page is not None:
+                on_page(progress)
+    finally:
+        # A failed write must not leave window fetchers spending quota on a dead sync.
+        pages.close()
+    return progress
+
+
+def load_sync_cursor(db: Session, user_id: int) -> SyncCursor | None:
+    return db.get(SyncCursor, user_id)
+
+
+def advance_sync_cursor(db: Session, *, user_id: int, latest: tuple[datetime, int]) -> None:
+    """Move the user's cursor to `latest` unless it already points further."""
+    start_date, strava_id = latest
+    stmt = insert(SyncCursor).values(
+        user_id=user_id,
+        last_start_date=start_date,
+        last_strava_activity_id=strava_id,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SyncCursor.user_id],
+        set_={
+            "last_start_date": stmt.excluded.last_start_date,
+            "last_strava_activity_id": stmt.excluded.last_strava_activity_id,
+            "updated_at": func.now(),
+        },
+        where=tuple_(SyncCursor.last_start_date, SyncCursor.last_strava_activity_id)
+        < tuple_(stmt.excluded.last_start_date, stmt.excluded.last_strava_activity_id),
+    )
+    db.execute(stmt)
+
+
+def sync_user_activities(
+    db: Session,
+    client: StravaClient,
+    *,
+    user_id: int,
+    params: SyncParams,
+    cursor_overlap_s: int = 0,
+    on_page: Callable[[SyncProgress], None] | None = None,
+    shard: ShardPlan | None = None,
+) -> SyncProgress:
+    """`sync_activity_pages` for any `params.mode`, keeping the user's cursor up to date.
+
+    An incremental sync asks Strava for activities starting after the cursor
+    minus `cursor_overlap_s`, which Strava returns oldest first, so even a
+    sync cut short by `max_pages` advances the cursor past exactly what it
+    wrote. Without a cursor, and for a full resync, pages come newest first
+    and the cursor only moves once paging reached the oldest activity.
+
+    `shard` applies to history imports: full resyncs, first incremental syncs
+    and explicit ranges. A routine incremental sync is one or two pages and
+    is always fetched sequentially.
+    """
+    if params.mode not in SYNC_MODES:
+        raise ValueError(f"sync mode must be one of: {', '.join(SYNC_MODES)}")
+    if params.mode == SYNC_MODE_INCREMENTAL:
+        cursor = load_sync_cursor(db, user_id)
+        if cursor is not None:
+            after = int(cursor.last_start_date.timestamp()) - max(cursor_overlap_s, 1)
+            params = replace(params, after=after)
+            shard = None
+            logger.info("Incremental sync for user %s after %s", user_id, after)
+
+    progress = sync_activity_pages(db, client, user_id=user_id, params=params, on_page=on_page, shard=shard)
+
+    # Windows arrive in any order, so a sharded sync only moves the cursor once complete.
+    ascending = params.after is not None and (shard is None or params.max_pages is not None)
+    if params.mode != SYNC_MODE_RANGE and progress.latest is not None and (ascending or progress.complete):
+        advance_sync_cursor(db, user_id=user_id, latest=progress.latest)
+    return progress
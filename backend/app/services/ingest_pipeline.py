@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+
+@dataclass(frozen=True)
+class StreamFetchJob:
+    activity_id: int
+    strava_activity_id: int
+    user_id: int
+    # Hash of the track already stored for the activity, if any (see `Activity.stream_hash`).
+    stream_hash: str | None = None
+
+
+@dataclass
+class IngestItem:
+    """One activity moving through the pipeline; stages fill in their outputs."""
+
+    job: StreamFetchJob
+    streams: dict | None = None
+    parsed: Any = None
+    error: BaseException | None = None
+
+
+@dataclass(frozen=True)
+class PipelineStage:
+    """A pipeline stage: `workers` concurrent calls of `handler(item)`.
+
+    Async handlers run on the event loop; `blocking` handlers (CPU or DB work)
+    run in worker threads so they overlap with each other and with I/O.
+    """
+
+    name: str
+    handler: Callable[[IngestItem], Any]
+    workers: int = 1
+    blocking: bool = False
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    queue_size: int | None
+    processed: int = 0
+    errors: int = 0
+    passed_through: int = 0
+    busy_s: float = 0.0
+    max_in_flight: int = 0
+    max_queue_depth: int = 0
+    _in_flight: int = field(default=0, repr=False)
+    _depth_total: int = field(default=0, repr=False)
+    _depth_samples: int = field(default=0, repr=False)
+
+    def sample_queue_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def to_summary(self, elapsed_s: float) -> dict:
+        """Counters plus throughput, utilization and input queue depth for a run summary."""
+        capacity_s = self.workers * elapsed_s
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "errors": self.errors,
+            "passed_through": self.passed_through,
+            "busy_s": round(self.busy_s, 3),
+            "throughput_per_s": round(self.processed / elapsed_s, 2) if elapsed_s > 0 else None,
+            "utilization": round(self.busy_s / capacity_s, 3) if capacity_s > 0 else None,
+            "max_in_flight": self.max_in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+        }
+
+
+async def run_ingest_pipeline(
+    jobs: Iterable[StreamFetchJob],
+    stages: list[PipelineStage],
+    *,
+    queue_size: int,
+) -> list[StageStats]:
+    """Push jobs through `stages` connected by bounded queues.
+
+    Every stage runs its workers concurrently, so with fetch → parse → write
+    stages the network, CPU and database are busy at the same time; each
+    inter-stage queue holds at most `queue_size` items, which applies
+    backpressure to upstream stages when a downstream one falls behind. The
+    first stage's input queue holds the whole job list.
+
+    A handler exception in any stage but the last is stored on `item.error`;
+    later stages pass such items through untouched except the last, which
+    always sees every item so it can record the failure. An exception raised
+    by the last stage aborts the pipeline and is re-raised.
+    """
+    if not stages:
+        raise ValueError("at least one stage is required")
+    if queue_size <= 0:
+        raise ValueError("queue_size must be positive")
+    for stage in stages:
+        if stage.workers <= 0:
+            raise ValueError(f"stage {stage.name!r} needs at least one worker")
+
+    queues: list[asyncio.Queue[IngestItem | None]] = [asyncio.Queue()]
+    queues += [asyncio.Queue(maxsize=queue_size) for _ in stages[1:]]
+    stats = [
+        StageStats(name=stage.name, workers=stage.workers, queue_size=None if i == 0 else queue_size)
+        for i, stage in enumerate(stages)
+    ]
+    for job in jobs:
+        queues[0].put_nowait(IngestItem(job=job))
+    for _ in range(stages[0].workers):
+        queues[0].put_nowait(None)
+
+    async def _worker(index: int) -> None:
+        stage, stage_stats, inbox = stages[index], stats[index], queues[index]
+        is_last = index == len(stages) - 1
+        outbox = None if is_last else queues[index + 1]
+        while True:
+            stage_stats.sample_queue_depth(inbox.qsize())
+            item = await inbox.get()
+            if item is None:
+                return
+            if item.error is not None and not is_last:
+                stage_stats.passed_through += 1
+            else:
+                stage_stats._in_flight += 1
+                stage_stats.max_in_flight = max(stage_stats.max_in_flight, stage_stats._in_flight)
+                started = time.perf_counter()
+                try:
+                    if stage.blocking:
+                        await asyncio.to_thread(stage.handler, item)
+                    else:
+                        await stage.handler(item)
+                    stage_stats.processed += 1
+                except Exception as exc:  # noqa: BLE001
+                    if is_last:
+                        raise
+                    item.error = exc
+                    stage_stats.errors += 1
+                finally:
+                    stage_stats._in_flight -= 1
+                    stage_stats.busy_s += time.perf_counter() - started
+            if outbox is not None:
+                await outbox.put(item)
+
+    async def _run_stage(index: int) -> None:
+        await asyncio.gather(*(_worker(index) for _ in range(stages[index].workers)))
+        if index + 1 < len(stages):
+            for _ in range(stages[index + 1].workers):
+                await queues[index + 1].put(None)
+
+    tasks = [asyncio.create_task(_run_stage(i)) for i in range(len(stages))]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
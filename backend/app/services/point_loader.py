@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import numpy as np
+import psycopg
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.activity_point import ActivityPoint
+from app.models.activity_track import ActivityTrack
+from app.services.track import TRACK_STORAGE_MODES, TRACK_STORAGE_PACKED, Track
+
+LOADER_COPY = "copy"
+LOADER_ORM = "orm"
+
+POINT_SRID = 4326
+
+# PostgreSQL binary COPY framing: signature, flags, header extension length / trailer.
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+_COPY_TRAILER = (-1).to_bytes(2, "big", signed=True)
+
+# Little-endian EWKB point with an SRID: byte order, type | SRID flag, srid, x, y.
+_EWKB_POINT_SRID = 0x20000001
+_EWKB_POINT_SIZE = 25
+
+_COPY_COLUMNS = ("activity_id", "seq", "time_s", "geom", "ele_m")
+
+# One binary COPY tuple per element; every field is prefixed by its byte length.
+# Rows with a NULL elevation drop the value and carry length -1.
+_ROW_FIELDS = [
+    ("nfields", ">i2"),
+    ("activity_id_len", ">i4"),
+    ("activity_id", ">i4"),
+    ("seq_len", ">i4"),
+    ("seq", ">i4"),
+    ("time_s_len", ">i4"),
+    ("time_s", ">i4"),
+    ("geom_len", ">i4"),
+    ("wkb_byte_order", "u1"),
+    ("wkb_type", "<u4"),
+    ("wkb_srid", "<u4"),
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("ele_m_len", ">i4"),
+]
+_ROW_DTYPE_NULL_ELE = np.dtype(_ROW_FIELDS)
+_ROW_DTYPE = np.dtype(_ROW_FIELDS + [("ele_m", ">i4")])
+
+
+def _encode_rows(dtype: np.dtype, activity_id: int, seq: np.ndarray, track: Track, ele: np.ndarray | None) -> bytes:
+    rows = np.empty(seq.size, dtype=dtype)
+    rows["nfields"] = len(_COPY_COLUMNS)
+    rows["activity_id_len"] = 4
+    rows["activity_id"] = activity_id
+    rows["seq_len"] = 4
+    rows["seq"] = seq
+    rows["time_s_len"] = 4
+    rows["time_s"] = track.time[seq]
+    rows["geom_len"] = _EWKB_POINT_SIZE
+    rows["wkb_byte_order"] = 1
+    rows["wkb_type"] = _EWKB_POINT_SRID
+    rows["wkb_srid"] = POINT_SRID
+    rows["x"] = track.lon[seq]
+    rows["y"] = track.lat[seq]
+    if ele is None:
+        rows["ele_m_len"] = -1
+    else:
+        rows["ele_m_len"] = 4
+        rows["ele_m"] = ele
+    return rows.tobytes()
+
+
+def encode_points_copy_binary(activity_id: int, track: Track) -> bytes:
+    """Encode a track as a complete binary COPY payload for `activity_points`.
+
+    Columns are `_COPY_COLUMNS`; geometry is sent as EWKB, which the PostGIS
+    binary input accepts directly. Built with NumPy structured arrays, so no
+    Python object is created per point. Elevation is rounded to whole meters
+    to match the integer column.
+    """
+    has_ele = ~np.isnan(track.ele)
+    seq_all = np.arange(len(track), dtype=np.int32)
+    chunks = [_COPY_HEADER]
+    with_ele = seq_all[has_ele]
+    if with_ele.size:
+        ele = np.rint(track.ele[with_ele])
+        chunks.append(_encode_rows(_ROW_DTYPE, activity_id, with_ele, track, ele))
+    without_ele = seq_all[~has_ele]
+    if without_ele.size:
+        chunks.append(_encode_rows(_ROW_DTYPE_NULL_ELE, activity_id, without_ele, track, None))
+    chunks.append(_COPY_TRAILER)
+    return b"".join(chunks)
+
+
+def _psycopg_connection(db: Session) -> psycopg.Connection | None:
+    driver_connection = db.connection().connection.driver_connection
+    if isinstance(driver_connection, psycopg.Connection):
+        return driver_connection
+    return None
+
+
+def build_activity_points(activity_id: int, track: Track) -> list[ActivityPoint]:
+    """One transient `ActivityPoint` per track point, numbered by seq from 0."""
+    has_ele = ~np.isnan(track.ele)
+    return [
+        ActivityPoint(
+            activity_id=activity_id,
+            seq=i,
+            time_s=t,
+            geom=from_shape(Point(lon, lat), srid=POINT_SRID),
+            ele_m=e if known else None,
+        )
+        for i, (lat, lon, t, e, known) in enumerate(
+            zip(track.lat.tolist(), track.lon.tolist(), track.time.tolist(), track.ele.tolist(), has_ele.tolist())
+        )
+    ]
+
+
+def load_activity_points(db: Session, *, activity_id: int, track: Track, use_copy: bool = True) -> str:
+    """Insert all points of one activity and return the loader used.
+
+    On psycopg3 connections the rows are streamed with a single binary
+    `COPY ... FROM STDIN` on the session's connection, inside its current
+    transaction. Other drivers, or `use_copy=False`, fall back to ORM bulk
+    inserts. Existing points are not deleted here.
+    """
+    conn = _psycopg_connection(db) if use_copy else None
+    if conn is None:
+        db.bulk_save_objects(build_activity_points(activity_id, track))
+        return LOADER_ORM
+
+    # Raw COPY bypasses the unit of work; emit pending ORM writes first so statement order holds.
+    db.flush()
+    columns = ", ".join(_COPY_COLUMNS)
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {ActivityPoint.__tablename__} ({columns}) FROM STDIN WITH (FORMAT BINARY)") as copy:
+            copy.write(encode_points_copy_binary(activity_id, track))
+    return LOADER_COPY
+
+
+def store_track(db: Session, *, activity_id: int, track: Track, storage: str | None = None) -> str:
+    """Replace the stored track of one activity in the given storage mode.
+
+    Any previous copy in either storage is removed, so an activity is never
+    held twice. `storage` defaults to `settings.TRACK_STORAGE`; returns the
+    mode used.
+    """
+    storage = storage or settings.TRACK_STORAGE
+    if storage not in TRACK_STORAGE_MODES:
+        allowed = ", ".join(TRACK_STORAGE_MODES)
+        raise ValueError(f"Unknown track storage {storage!r}; expected one of: {allowed}")
+
+    db.query(ActivityPoint).filter(ActivityPoint.activity_id == activity_id).delete()
+    db.query(ActivityTrack).filter(ActivityTrack.activity_id == activity_id).delete()
+    if storage == TRACK_STORAGE_PACKED:
+        db.add(ActivityTrack(activity_id=activity_id, **track.packed_columns()))
+    else:
+        load_activity_points(db, activity_id=activity_id, track=track)
+    return storage
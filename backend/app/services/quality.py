@@ -1,7 +1,44 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, replace
+from itertools import chain
+from math import asin, cos, radians, sin, sqrt
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.services.track import Track
+
+EARTH_RADIUS_M = 6371000.0
+
+# Consecutive fixes are metres apart, so the haversine half-angles are tiny.
+# Up to this half-angle (hops of ~1.3 km along either axis) the two-term series
+# sin(h)^2 = h^2 (1 - h^2/3) and asin(x) = x (1 + x^2/6) are exact to double
+# precision and cost a few multiplies instead of np.sin/np.arcsin; longer hops
+# use the trig functions. The choice is per pair, so a pair's distance never
+# depends on the rest of the track.
+HAVERSINE_SERIES_MAX_HALF_ANGLE_RAD = 1e-4
+
+ENGINE_PYTHON = "python"
+ENGINE_NUMPY = "numpy"
+QUALITY_ENGINES = (ENGINE_PYTHON, ENGINE_NUMPY)
+DEFAULT_QUALITY_ENGINE = ENGINE_NUMPY
+
+DISTANCE_HAVERSINE = "haversine"
+DISTANCE_EQUIRECTANGULAR = "equirectangular"
+DISTANCE_MODES = (DISTANCE_HAVERSINE, DISTANCE_EQUIRECTANGULAR)
+
+# Local equirectangular ("flat earth") mode: cos(latitude) is looked up per
+# latitude tile of the pair midpoint instead of evaluating full haversine trig.
+# Relative error versus haversine is about tan(lat) * tile_half_width_rad for
+# short hops; with 0.01 degree tiles and |lat| <= 80 degrees that stays below
+# EQUIRECTANGULAR_MAX_RELATIVE_ERROR (tested). Hops longer than the fallback
+# distance and pairs beyond the latitude limit use haversine.
+EQUIRECTANGULAR_TILE_DEG = 0.01
+EQUIRECTANGULAR_MAX_ABS_LAT_DEG = 80.0
+EQUIRECTANGULAR_FALLBACK_DISTANCE_M = 1000.0
+EQUIRECTANGULAR_MAX_RELATIVE_ERROR = 1e-3
 
 
 @dataclass
@@ -14,38 +51,96 @@ class QualityReport:
     stopped_time_s: int
     stop_segments: int
     jitter_score: float
+    distance_mode: str = DISTANCE_HAVERSINE
 
 
 def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Approximate distance in meters using the haversine formula."""
-    from math import radians, sin, cos, asin, sqrt
-
-    R = 6371000.0
     dlat = radians(lat2 - lat1)
     dlon = radians(lon2 - lon1)
     a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    return 2 * R * asin(sqrt(a))
+    return 2 * EARTH_RADIUS_M * asin(sqrt(a))
+
+
+def haversine_m_np(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Vectorized haversine distance in meters (same formula as `haversine_m`)."""
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+    a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon / 2) ** 2
+    # Clip guards against a > 1 from rounding on antipodal pairs (math.asin would raise there).
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _empty_report(point_count: int, distance_mode: str = DISTANCE_HAVERSINE) -> QualityReport:
+    return QualityReport(
+        point_count=point_count,
+        duration_s=0,
+        distance_m=0.0,
+        max_speed_mps=0.0,
+        spike_count=0,
+        stopped_time_s=0,
+        stop_segments=0,
+        jitter_score=0.0,
+        distance_mode=distance_mode,
+    )
+
+
+def _check_distance_mode(distance_mode: str) -> None:
+    if distance_mode not in DISTANCE_MODES:
+        allowed = ", ".join(DISTANCE_MODES)
+        raise ValueError(f"Unknown distance mode {distance_mode!r}; expected one of: {allowed}")
 
 
 def compute_quality(
-    latlons: List[Tuple[float, float]],
-    times: List[int],
+    latlons: Sequence[Tuple[float, float]] | np.ndarray,
+    times: Sequence[int] | np.ndarray,
     spike_speed_mps: float = 12.0,   # ~43 km/h; default spike threshold for running
     stop_speed_mps: float = 0.6,     # below this is treated as stopped
     stop_min_duration_s: int = 10,   # minimum duration to count a stop
+    engine: str = DEFAULT_QUALITY_ENGINE,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> QualityReport:
+    """Compute recording-quality metrics for one ordered GPS track.
+
+    `engine` selects the implementation: "numpy" (vectorized, default) or
+    "python" (the reference per-point loop). Both return identical reports up
+    to floating point summation order. `distance_mode` "equirectangular" is
+    only available on the numpy engine.
+    """
+    _check_distance_mode(distance_mode)
+    if engine == ENGINE_NUMPY:
+        return compute_quality_numpy(
+            latlons,
+            times,
+            spike_speed_mps=spike_speed_mps,
+            stop_speed_mps=stop_speed_mps,
+            stop_min_duration_s=stop_min_duration_s,
+            distance_mode=distance_mode,
+        )
+    if engine == ENGINE_PYTHON:
+        if distance_mode != DISTANCE_HAVERSINE:
+            raise ValueError("The python engine only supports haversine distances")
+        return compute_quality_python(
+            latlons,
+            times,
+            spike_speed_mps=spike_speed_mps,
+            stop_speed_mps=stop_speed_mps,
+            stop_min_duration_s=stop_min_duration_s,
+        )
+    allowed = ", ".join(QUALITY_ENGINES)
+    raise ValueError(f"Unknown quality engine {engine!r}; expected one of: {allowed}")
+
+
+def compute_quality_python(
+    latlons: List[Tuple[float, float]],
+    times: List[int],
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
 ) -> QualityReport:
     n = len(latlons)
     if n < 2:
-        return QualityReport(
-            point_count=n,
-            duration_s=0,
-            distance_m=0.0,
-            max_speed_mps=0.0,
-            spike_count=0,
-            stopped_time_s=0,
-            stop_segments=0,
-            jitter_score=0.0,
-        )
+        return _empty_report(n)
 
     dist_total = 0.0
     max_speed = 0.0
@@ -114,3 +209,796 @@ def compute_quality(
         stop_segments=stop_segments,
         jitter_score=jitter,
     )
+
+
+def _as_track_arrays(
+    latlons: Sequence[Tuple[float, float]] | np.ndarray,
+    times: Sequence[int] | np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if isinstance(latlons, np.ndarray):
+        coords = np.asarray(latlons, dtype=np.float64)
+        if coords.size == 0:
+            coords = coords.reshape(0, 2)
+    else:
+        # Flattening the pairs into np.fromiter skips the per-tuple type discovery
+        # of np.asarray, which costs more than the whole vectorized kernel.
+        n = len(latlons)
+        coords = np.fromiter(chain.from_iterable(latlons), dtype=np.float64, count=2 * n).reshape(n, 2)
+    if isinstance(times, np.ndarray):
+        t = np.asarray(times, dtype=np.int64)
+    else:
+        t = np.fromiter(times, dtype=np.int64, count=len(times))
+    return coords[:, 0], coords[:, 1], t
+
+
+def find_stop_runs(
+    is_stop: np.ndarray,
+    dt: np.ndarray,
+    stop_min_duration_s: int,
+    groups: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find maximal runs of stopped pairs.
+
+    Returns (run_start, run_end_exclusive, run_duration_s) for the runs whose
+    duration reaches `stop_min_duration_s`, indexed into the valid-pair arrays.
+    When `groups` is given (sorted activity index per pair), runs never span
+    two groups.
+    """
+    if is_stop.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    prev_stop = np.empty_like(is_stop)
+    prev_stop[0] = False
+    prev_stop[1:] = is_stop[:-1]
+    next_stop = np.empty_like(is_stop)
+    next_stop[-1] = False
+    next_stop[:-1] = is_stop[1:]
+    if groups is not None:
+        group_change = groups[1:] != groups[:-1]
+        prev_stop[1:] &= ~group_change
+        next_stop[:-1] &= ~group_change
+
+    starts = np.flatnonzero(is_stop & ~prev_stop)
+    ends = np.flatnonzero(is_stop & ~next_stop) + 1
+    if starts.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    # Sum each run straight from `dt` with run bounds interleaved as [s0, e0, s1, e1, ...];
+    # reduceat needs in-range indices, and a run ending at the last pair needs no end marker.
+    bounds = np.column_stack((starts, ends)).ravel()
+    if bounds[-1] == dt.size:
+        bounds = bounds[:-1]
+    durations = np.add.reduceat(dt, bounds, dtype=np.result_type(dt, np.int64))[::2]
+    keep = durations >= stop_min_duration_s
+    return starts[keep], ends[keep], durations[keep]
+
+
+def _haversine_pair_distances_m(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Haversine distance between consecutive points, reusing cos(lat) per point."""
+    cos_lat = lat * (np.pi / 180.0)
+    np.cos(cos_lat, out=cos_lat)
+
+    # Half-angles from differences in degrees, as `haversine_m` computes them.
+    h_lat = np.diff(lat)
+    h_lat *= np.pi / 360.0
+    h_lon = np.diff(lon)
+    h_lon *= np.pi / 360.0
+    # One buffer serves as scratch for the sin^2 terms and then holds the distances.
+    d = np.empty_like(h_lat)
+    far = np.empty(0, dtype=np.intp)
+    limit = HAVERSINE_SERIES_MAX_HALF_ANGLE_RAD
+    if h_lat.size and not max(-h_lat.min(), h_lat.max(), -h_lon.min(), h_lon.max()) <= limit:
+        far = np.flatnonzero((np.abs(h_lat) > limit) | (np.abs(h_lon) > limit))
+        # Zeroed so the series stays finite; these pairs are recomputed below.
+        h_lat[far] = 0.0
+        h_lon[far] = 0.0
+
+    for h in (h_lat, h_lon):
+        h *= h
+        np.multiply(h, -1.0 / 3.0, out=d)
+        d += 1.0
+        h *= d
+    h_lon *= cos_lat[:-1]
+    h_lon *= cos_lat[1:]
+    a = h_lat
+    a += h_lon
+
+    # asin(sqrt(a)) = sqrt(a) (1 + a/6), scaled to metres.
+    np.multiply(a, 2 * EARTH_RADIUS_M / 6.0, out=d)
+    d += 2 * EARTH_RADIUS_M
+    np.sqrt(a, out=a)
+    d *= a
+    if far.size:
+        d[far] = haversine_m_np(lat[far], lon[far], lat[far + 1], lon[far + 1])
+    return d
+
+
+def _equirectangular_pair_distances_m(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    *,
+    fallback_distance_m: float = EQUIRECTANGULAR_FALLBACK_DISTANCE_M,
+) -> np.ndarray:
+    """Flat-earth distance between consecutive points with a per-tile cos(lat)."""
+    mid = lat[:-1] + lat[1:]
+    if mid.size == 0:
+        return mid
+    mid *= 0.5
+    lat_lo = float(mid.min())
+    lat_hi = float(mid.max())
+    if lat_hi - lat_lo <= EQUIRECTANGULAR_TILE_DEG:
+        cos_ref = np.cos(np.radians((lat_lo + lat_hi) * 0.5))
+    else:
+        tile = ((mid - lat_lo) * (1.0 / EQUIRECTANGULAR_TILE_DEG)).astype(np.intp)
+        centers = lat_lo + (np.arange(int(tile.max()) + 1) + 0.5) * EQUIRECTANGULAR_TILE_DEG
+        cos_ref = np.cos(np.radians(centers))[tile]
+
+    x = np.diff(lon)
+    # Wrap longitude deltas into [-180, 180) so antimeridian crossings stay short hops;
+    # np.mod is slow, so only pay for it when a crossing is present.
+    if np.abs(x).max() > 180.0:
+        x += 180.0
+        np.mod(x, 360.0, out=x)
+        x -= 180.0
+    x *= cos_ref
+    x *= x
+    y = np.diff(lat)
+    y *= y
+    x += y
+    np.sqrt(x, out=x)
+    x *= np.radians(1.0) * EARTH_RADIUS_M
+
+    too_far = x > fallback_distance_m
+    if max(-lat_lo, lat_hi) > EQUIRECTANGULAR_MAX_ABS_LAT_DEG:
+        too_far |= np.abs(mid) > EQUIRECTANGULAR_MAX_ABS_LAT_DEG
+    fallback = np.flatnonzero(too_far)
+    if fallback.size:
+        x[fallback] = haversine_m_np(lat[fallback], lon[fallback], lat[fallback + 1], lon[fallback + 1])
+    return x
+
+
+def _pair_distances_m(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> np.ndarray:
+    if distance_mode == DISTANCE_EQUIRECTANGULAR:
+        return _equirectangular_pair_distances_m(lat, lon)
+    return _haversine_pair_distances_m(lat, lon)
+
+
+def _group_reduce(ufunc: np.ufunc, values: np.ndarray, groups: np.ndarray, size: int, fill) -> np.ndarray:
+    """Apply `ufunc.reduceat` over a sorted group index, filling empty groups."""
+    out = np.full(size, fill, dtype=values.dtype)
+    if values.size == 0:
+        return out
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    out[groups[starts]] = ufunc.reduceat(values, starts)
+    return out
+
+
+@dataclass
+class PairSeries:
+    """Valid consecutive-point pairs of one or more concatenated activities.
+
+    Holds everything that does not depend on spike/stop thresholds, so callers
+    can evaluate many threshold combinations without recomputing distances.
+    """
+
+    point_counts: np.ndarray     # points per activity
+    duration_s: np.ndarray       # max(time) - min(time) per activity
+    group: np.ndarray            # activity index of each valid pair (sorted)
+    first_point: np.ndarray      # index of each valid pair's first point in the input arrays
+    distance_m: np.ndarray       # per valid pair
+    dt_s: np.ndarray             # per valid pair, always > 0
+    speed_mps: np.ndarray        # per valid pair
+    distance_mode: str = DISTANCE_HAVERSINE
+
+    @property
+    def activity_count(self) -> int:
+        return int(self.point_counts.size)
+
+    def total_distance_m(self) -> np.ndarray:
+        return np.bincount(self.group, weights=self.distance_m, minlength=self.activity_count)
+
+    def max_speed_mps(self) -> np.ndarray:
+        return np.maximum(_group_reduce(np.maximum, self.speed_mps, self.group, self.activity_count, 0.0), 0.0)
+
+    def jitter_score(self) -> np.ndarray:
+        k = self.activity_count
+        jitter = np.zeros(k, dtype=np.float64)
+        same = self.group[1:] == self.group[:-1]
+        jitter_group = self.group[1:][same]
+        jitter_sum = np.bincount(jitter_group, weights=np.abs(np.diff(self.speed_mps))[same], minlength=k)
+        jitter_n = np.bincount(jitter_group, minlength=k)
+        np.divide(jitter_sum, jitter_n, out=jitter, where=jitter_n > 0)
+        return jitter
+
+    def spike_count(self, spike_speed_mps: float) -> np.ndarray:
+        return np.bincount(
+            self.group,
+            weights=(self.speed_mps >= spike_speed_mps),
+            minlength=self.activity_count,
+        ).astype(np.int64)
+
+    def stop_runs(self, stop_speed_mps: float) -> tuple[np.ndarray, np.ndarray]:
+        """All stop runs regardless of length, as (activity index, duration_s)."""
+        run_starts, _, run_durations = find_stop_runs(
+            self.speed_mps <= stop_speed_mps,
+            self.dt_s,
+            stop_min_duration_s=0,
+            groups=self.group,
+        )
+        return self.group[run_starts], run_durations
+
+    def stop_totals(
+        self,
+        run_group: np.ndarray,
+        run_durations: np.ndarray,
+        stop_min_duration_s: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Per-activity (stopped_time_s, stop_segments) for runs reaching the minimum duration."""
+        keep = run_durations >= stop_min_duration_s
+        stopped = np.bincount(
+            run_group[keep],
+            weights=run_durations[keep],
+            minlength=self.activity_count,
+        ).astype(np.int64)
+        segments = np.bincount(run_group[keep], minlength=self.activity_count)
+        return stopped, segments
+
+
+def build_pair_series(
+    lat: Sequence[float] | np.ndarray,
+    lon: Sequence[float] | np.ndarray,
+    times: Sequence[int] | np.ndarray,
+    offsets: Sequence[int] | np.ndarray,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> PairSeries:
+    """Compute pair distances/speeds for concatenated tracks in CSR layout.
+
+    `offsets` has one entry per activity plus a final end marker: activity `i`
+    owns points `offsets[i]:offsets[i + 1]`. Pairs that straddle an activity
+    boundary or do not move forward in time are dropped.
+    """
+    _check_distance_mode(distance_mode)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    t = np.asarray(times, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets.ndim != 1 or offsets.size < 1:
+        raise ValueError("offsets must be a 1-D array with at least one entry")
+    if offsets[0] != 0 or offsets[-1] != lat.size or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must start at 0, be non-decreasing and end at the point count")
+    if not (lat.size == lon.size == t.size):
+        raise ValueError("lat, lon and times must have the same length")
+
+    k = offsets.size - 1
+    counts = np.diff(offsets)
+    point_group = np.repeat(np.arange(k), counts)
+    durations = np.zeros(k, dtype=np.int64)
+    non_empty = counts > 0
+    if lat.size:
+        starts = offsets[:-1][non_empty]
+        durations[non_empty] = np.maximum.reduceat(t, starts) - np.minimum.reduceat(t, starts)
+
+    if lat.size < 2:
+        empty_f = np.empty(0, dtype=np.float64)
+        return PairSeries(
+            point_counts=counts,
+            duration_s=durations,
+            group=np.empty(0, dtype=np.int64),
+            first_point=np.empty(0, dtype=np.int64),
+            distance_m=empty_f,
+            dt_s=np.empty(0, dtype=np.int64),
+            speed_mps=empty_f,
+            distance_mode=distance_mode,
+        )
+
+    d = _pair_distances_m(lat, lon, distance_mode)
+    dt = np.diff(t)
+    # A pair is usable when both points belong to the same activity and time moves forward.
+    valid = (point_group[1:] == point_group[:-1]) & (dt > 0)
+    pair_group = point_group[:-1]
+    first_point = np.arange(lat.size - 1)
+    if not valid.all():
+        d = d[valid]
+        dt = dt[valid]
+        pair_group = pair_group[valid]
+        first_point = first_point[valid]
+
+    return PairSeries(
+        point_counts=counts,
+        duration_s=durations,
+        group=pair_group,
+        first_point=first_point,
+        distance_m=d,
+        dt_s=dt,
+        speed_mps=d / dt,
+        distance_mode=distance_mode,
+    )
+
+
+def compute_quality_batch(
+    lat: Sequence[float] | np.ndarray,
+    lon: Sequence[float] | np.ndarray,
+    times: Sequence[int] | np.ndarray,
+    offsets: Sequence[int] | np.ndarray,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> list[QualityReport]:
+    """Compute one `QualityReport` per activity from concatenated tracks.
+
+    See `build_pair_series` for the `offsets` layout. Each report equals what
+    `compute_quality` returns for that activity alone.
+    """
+    return compute_quality_from_pairs(
+        build_pair_series(lat, lon, times, offsets, distance_mode=distance_mode),
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+    )
+
+
+def compute_quality_from_pairs(
+    pairs: PairSeries,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+) -> list[QualityReport]:
+    run_group, run_durations = pairs.stop_runs(stop_speed_mps)
+    stopped, stop_segments = pairs.stop_totals(run_group, run_durations, stop_min_duration_s)
+    return _reports_from_arrays(
+        pairs,
+        distance_m=pairs.total_distance_m(),
+        max_speed_mps=pairs.max_speed_mps(),
+        jitter_score=pairs.jitter_score(),
+        spike_count=pairs.spike_count(spike_speed_mps),
+        stopped_time_s=stopped,
+        stop_segments=stop_segments,
+    )
+
+
+def _reports_from_arrays(
+    pairs: PairSeries,
+    *,
+    distance_m: np.ndarray,
+    max_speed_mps: np.ndarray,
+    jitter_score: np.ndarray,
+    spike_count: np.ndarray,
+    stopped_time_s: np.ndarray,
+    stop_segments: np.ndarray,
+) -> list[QualityReport]:
+    reports: list[QualityReport] = []
+    for i in range(pairs.activity_count):
+        n = int(pairs.point_counts[i])
+        if n < 2:
+            reports.append(_empty_report(n, pairs.distance_mode))
+            continue
+        reports.append(
+            QualityReport(
+                point_count=n,
+                duration_s=int(pairs.duration_s[i]),
+                distance_m=float(distance_m[i]),
+                max_speed_mps=float(max_speed_mps[i]),
+                spike_count=int(spike_count[i]),
+                stopped_time_s=int(stopped_time_s[i]),
+                stop_segments=int(stop_segments[i]),
+                jitter_score=float(jitter_score[i]),
+                distance_mode=pairs.distance_mode,
+            )
+        )
+    return reports
+
+
+def compute_quality_numpy(
+    latlons: Sequence[Tuple[float, float]] | np.ndarray,
+    times: Sequence[int] | np.ndarray,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> QualityReport:
+    lat, lon, t = _as_track_arrays(latlons, times)
+    return _quality_from_arrays(
+        lat,
+        lon,
+        t,
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+        distance_mode=distance_mode,
+    )
+
+
+def compute_track_quality(
+    track: Track,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+    distance_mode: str = DISTANCE_HAVERSINE,
+) -> QualityReport:
+    """`compute_quality` over a `Track`, reading its arrays without conversion."""
+    _check_distance_mode(distance_mode)
+    return _quality_from_arrays(
+        track.lat,
+        track.lon,
+        track.time.astype(np.int64),
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+        distance_mode=distance_mode,
+    )
+
+
+def _quality_from_arrays(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    t: np.ndarray,
+    *,
+    spike_speed_mps: float,
+    stop_speed_mps: float,
+    stop_min_duration_s: int,
+    distance_mode: str,
+) -> QualityReport:
+    n = int(lat.shape[0])
+    if n < 2:
+        return _empty_report(n, distance_mode)
+
+    d = _pair_distances_m(lat, lon, distance_mode)
+    dt = np.diff(t)
+    valid = dt > 0
+    if not valid.all():
+        # Pairs with non-increasing timestamps are ignored, exactly like the loop's `continue`.
+        d = d[valid]
+        dt = dt[valid]
+
+    duration = int(t.max() - t.min())
+    if d.size == 0:
+        report = _empty_report(n, distance_mode)
+        report.duration_s = duration
+        return report
+
+    distance = float(d.sum())
+    # `d` is a fresh array and not needed past the sum, so speeds reuse it.
+    v = d
+    v /= dt
+    _, _, stop_durations = find_stop_runs(v <= stop_speed_mps, dt, stop_min_duration_s)
+    jitter = 0.0
+    if v.size >= 2:
+        dv = np.diff(v)
+        np.abs(dv, out=dv)
+        jitter = float(dv.mean())
+
+    return QualityReport(
+        point_count=n,
+        duration_s=duration,
+        distance_m=distance,
+        max_speed_mps=max(float(v.max()), 0.0),
+        spike_count=int(np.count_nonzero(v >= spike_speed_mps)),
+        stopped_time_s=int(stop_durations.sum()),
+        stop_segments=int(stop_durations.size),
+        jitter_score=jitter,
+        distance_mode=distance_mode,
+    )
+
+
+class QualityAccumulator:
+    """Incremental `compute_quality` over a track delivered in chunks.
+
+    Holds the same state as the reference loop (running distance, max speed,
+    spike count, stop state machine, previous speed for jitter) plus the last
+    point of the previous chunk, so memory stays constant however long the
+    track is. Each chunk is processed with the vectorized kernels; feeding a
+    track in any chunking yields the same report as `compute_quality`.
+
+    With `record_events` it also collects the spike/stop events that
+    `detect_quality_events` would find, carrying open runs across chunks.
+    """
+
+    def __init__(
+        self,
+        spike_speed_mps: float = 12.0,
+        stop_speed_mps: float = 0.6,
+        stop_min_duration_s: int = 10,
+        distance_mode: str = DISTANCE_HAVERSINE,
+        record_events: bool = False,
+    ):
+        _check_distance_mode(distance_mode)
+        self.spike_speed_mps = spike_speed_mps
+        self.stop_speed_mps = stop_speed_mps
+        self.stop_min_duration_s = stop_min_duration_s
+        self.distance_mode = distance_mode
+
+        self.point_count = 0
+        self._min_time: int | None = None
+        self._max_time: int | None = None
+        self._last: tuple[float, float, int] | None = None
+
+        self._distance_m = 0.0
+        self._max_speed = 0.0
+        self._spike_count = 0
+
+        self._stopped_time = 0
+        self._stop_segments = 0
+        self._in_stop = False
+        self._current_stop_time = 0
+
+        self._prev_speed: float | None = None
+        self._jitter_sum = 0.0
+        self._jitter_n = 0
+
+        self._events: list[QualityEvent] | None = [] if record_events else None
+        # Event run touching the end of the last chunk, with its duration, per event type.
+        self._open_runs: dict[str, tuple[QualityEvent, int]] = {}
+
+    def _close_stop(self, duration_s: int) -> None:
+        if duration_s >= self.stop_min_duration_s:
+            self._stopped_time += duration_s
+            self._stop_segments += 1
+
+    def add_chunk(
+        self,
+        lat: Sequence[float] | np.ndarray,
+        lon: Sequence[float] | np.ndarray,
+        times: Sequence[int] | np.ndarray,
+    ) -> None:
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        t = np.asarray(times, dtype=np.int64)
+        if lat.size == 0:
+            return
+
+        # Input index of the first point in the (possibly carried-over) arrays below.
+        base = self.point_count - (1 if self._last is not None else 0)
+        self.point_count += int(lat.size)
+        chunk_min, chunk_max = int(t.min()), int(t.max())
+        self._min_time = chunk_min if self._min_time is None else min(self._min_time, chunk_min)
+        self._max_time = chunk_max if self._max_time is None else max(self._max_time, chunk_max)
+
+        if self._last is not None:
+            # Prepend the carried point so the pair spanning the chunk boundary is counted.
+            last_lat, last_lon, last_t = self._last
+            lat = np.concatenate(([last_lat], lat))
+            lon = np.concatenate(([last_lon], lon))
+            t = np.concatenate(([last_t], t))
+        self._last = (float(lat[-1]), float(lon[-1]), int(t[-1]))
+        if lat.size < 2:
+            return
+
+        d = _pair_distances_m(lat, lon, self.distance_mode)
+        dt = np.diff(t)
+        valid = dt > 0
+        if not valid.all():
+            d = d[valid]
+            dt = dt[valid]
+        if d.size == 0:
+            return
+
+        v = d / dt
+        self._distance_m += float(d.sum())
+        self._max_speed = max(self._max_speed, float(v.max()))
+        self._spike_count += int(np.count_nonzero(v >= self.spike_speed_mps))
+
+        if self._prev_speed is not None:
+            self._jitter_sum += abs(float(v[0]) - self._prev_speed)
+            self._jitter_n += 1
+        if v.size >= 2:
+            self._jitter_sum += float(np.abs(np.diff(v)).sum())
+            self._jitter_n += int(v.size - 1)
+        self._prev_speed = float(v[-1])
+
+        self._consume_stops(v <= self.stop_speed_mps, dt)
+
+        if self._events is not None:
+            first = np.flatnonzero(valid)
+            self._consume_event_runs(EVENT_SPIKE, v >= self.spike_speed_mps, v, dt, first, t, base)
+            self._consume_event_runs(EVENT_STOP, v <= self.stop_speed_mps, v, dt, first, t, base)
+
+    def _consume_stops(self, is_stop: np.ndarray, dt: np.ndarray) -> None:
+        starts, ends, durations = find_stop_runs(is_stop, dt, stop_min_duration_s=0)
+        starts, ends, durations = starts.tolist(), ends.tolist(), durations.tolist()
+        if not starts:
+            if self._in_stop:
+                self._close_stop(self._current_stop_time)
+                self._in_stop = False
+                self._current_stop_time = 0
+            return
+
+        # A run touching the chunk start continues the carried stop; otherwise the carried stop ended.
+        if self._in_stop:
+            if starts[0] == 0:
+                durations[0] += self._current_stop_time
+            else:
+                self._close_stop(self._current_stop_time)
+
+        # A run touching the chunk end stays open until a later chunk (or finalize) closes it.
+        open_tail = ends[-1] == is_stop.size
+        closed = durations[:-1] if open_tail else durations
+        for duration_s in closed:
+            self._close_stop(int(duration_s))
+
+        self._in_stop = open_tail
+        self._current_stop_time = int(durations[-1]) if open_tail else 0
+
+    def _min_event_duration_s(self, event_type: str) -> int:
+        return self.stop_min_duration_s if event_type == EVENT_STOP else 0
+
+    def _consume_event_runs(
+        self,
+        event_type: str,
+        mask: np.ndarray,
+        v: np.ndarray,
+        dt: np.ndarray,
+        first: np.ndarray,
+        t: np.ndarray,
+        base: int,
+    ) -> None:
+        starts, ends, durations = find_stop_runs(mask, dt, stop_min_duration_s=0)
+        carried = self._open_runs.pop(event_type, None)
+        if carried is not None and (starts.size == 0 or starts[0] != 0):
+            self._close_event_run(*carried)
+            carried = None
+
+        for start, end, duration_s in zip(starts.tolist(), ends.tolist(), durations.tolist()):
+            a, b = int(first[start]), int(first[end - 1]) + 1
+            event = QualityEvent(event_type, base + a, base + b, int(t[a]), int(t[b]), float(v[start:end].max()))
+            if carried is not None:
+                # Only the first run can touch the chunk start and continue the carried one.
+                previous, previous_s = carried
+                event = replace(
+                    event,
+                    start_index=previous.start_index,
+                    start_time_s=previous.start_time_s,
+                    peak_speed_mps=max(previous.peak_speed_mps, event.peak_speed_mps),
+                )
+                duration_s += previous_s
+                carried = None
+            if end == mask.size:
+                self._open_runs[event_type] = (event, int(duration_s))
+            else:
+                self._close_event_run(event, int(duration_s))
+
+    def _close_event_run(self, event: QualityEvent, duration_s: int) -> None:
+        if duration_s >= self._min_event_duration_s(event.event_type):
+            self._events.append(event)
+
+    def events(self) -> list[QualityEvent]:
+        """Events of the points added so far, ordered like `detect_quality_events`."""
+        if self._events is None:
+            raise ValueError("QualityAccumulator was created without record_events")
+        events = list(self._events)
+        for event, duration_s in self._open_runs.values():
+            if duration_s >= self._min_event_duration_s(event.event_type):
+                events.append(event)
+        events.sort(key=lambda e: (e.start_index, e.event_type))
+        return events
+
+    def report(self) -> QualityReport:
+        if self.point_count < 2:
+            return _empty_report(self.point_count, self.distance_mode)
+
+        stopped_time = self._stopped_time
+        stop_segments = self._stop_segments
+        if self._in_stop and self._current_stop_time >= self.stop_min_duration_s:
+            stopped_time += self._current_stop_time
+            stop_segments += 1
+
+        return QualityReport(
+            point_count=self.point_count,
+            duration_s=int(self._max_time - self._min_time),
+            distance_m=self._distance_m,
+            max_speed_mps=self._max_speed,
+            spike_count=self._spike_count,
+            stopped_time_s=stopped_time,
+            stop_segments=stop_segments,
+            jitter_score=(self._jitter_sum / self._jitter_n) if self._jitter_n else 0.0,
+            distance_mode=self.distance_mode,
+        )
+
+
+EVENT_SPIKE = "spike"
+EVENT_STOP = "stop"
+QUALITY_EVENT_TYPES = (EVENT_SPIKE, EVENT_STOP)
+
+
+@dataclass(frozen=True)
+class QualityEvent:
+    event_type: str
+    start_index: int       # first point of the event (inclusive)
+    end_index: int         # last point of the event (inclusive)
+    start_time_s: int
+    end_time_s: int
+    peak_speed_mps: float
+
+
+def _events_from_runs(
+    event_type: str,
+    pairs: PairSeries,
+    times: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+) -> list[QualityEvent]:
+    if starts.size == 0:
+        return []
+    first = pairs.first_point[starts]
+    last = pairs.first_point[ends - 1] + 1
+    peaks = [pairs.speed_mps[a:b].max() for a, b in zip(starts.tolist(), ends.tolist())]
+    return [
+        QualityEvent(
+            event_type=event_type,
+            start_index=int(a),
+            end_index=int(b),
+            start_time_s=int(times[a]),
+            end_time_s=int(times[b]),
+            peak_speed_mps=float(peak),
+        )
+        for a, b, peak in zip(first.tolist(), last.tolist(), peaks)
+    ]
+
+
+def detect_quality_events(
+    pairs: PairSeries,
+    times: Sequence[int] | np.ndarray,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+) -> list[QualityEvent]:
+    """Locate spikes and counted stop segments of a single-activity `PairSeries`.
+
+    Consecutive spike pairs are merged into one event; stop events are exactly
+    the segments `compute_quality` counts. Indices refer to the input points.
+    """
+    return detect_quality_events_batch(
+        pairs,
+        times,
+        [0, len(times)],
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+    )[0]
+
+
+def detect_quality_events_batch(
+    pairs: PairSeries,
+    times: Sequence[int] | np.ndarray,
+    offsets: Sequence[int] | np.ndarray,
+    spike_speed_mps: float = 12.0,
+    stop_speed_mps: float = 0.6,
+    stop_min_duration_s: int = 10,
+) -> list[list[QualityEvent]]:
+    """`detect_quality_events` for every activity of a CSR `PairSeries`.
+
+    Runs never span two activities, and indices are relative to the first
+    point of each activity, as stored in the event index.
+    """
+    t = np.asarray(times, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    spike_starts, spike_ends, _ = find_stop_runs(
+        pairs.speed_mps >= spike_speed_mps,
+        pairs.dt_s,
+        0,
+        groups=pairs.group,
+    )
+    stop_starts, stop_ends, _ = find_stop_runs(
+        pairs.speed_mps <= stop_speed_mps,
+        pairs.dt_s,
+        stop_min_duration_s,
+        groups=pairs.group,
+    )
+
+    per_activity: list[list[QualityEvent]] = [[] for _ in range(pairs.activity_count)]
+    for event_type, starts, ends in ((EVENT_SPIKE, spike_starts, spike_ends), (EVENT_STOP, stop_starts, stop_ends)):
+        events = _events_from_runs(event_type, pairs, t, starts, ends)
+        for group, event in zip(pairs.group[starts].tolist(), events):
+            base = int(offsets[group])
+            per_activity[group].append(
+                replace(event, start_index=event.start_index - base, end_index=event.end_index - base)
+            )
+    for events in per_activity:
+        events.sort(key=lambda e: (e.start_index, e.event_type))
+    return per_activity
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.models.activity_quality_event import ActivityQualityEvent
+from app.services.quality import QualityEvent
+
+
+def replace_quality_events(
+    db: Session,
+    *,
+    activity_id: int,
+    events: list[QualityEvent],
+) -> int:
+    """Replace the stored event index of an activity. Event indices are point seqs."""
+    return replace_quality_events_batch(db, events_by_activity={activity_id: events})
+
+
+def replace_quality_events_batch(db: Session, *, events_by_activity: dict[int, list[QualityEvent]]) -> int:
+    """`replace_quality_events` for many activities with one delete and one bulk insert."""
+    if not events_by_activity:
+        return 0
+    db.query(ActivityQualityEvent).filter(
+        ActivityQualityEvent.activity_id.in_(list(events_by_activity))
+    ).delete()
+    rows = [
+        ActivityQualityEvent(
+            activity_id=activity_id,
+            event_type=event.event_type,
+            start_seq=event.start_index,
+            end_seq=event.end_index,
+            start_time_s=event.start_time_s,
+            end_time_s=event.end_time_s,
+            peak_speed_mps=event.peak_speed_mps,
+        )
+        for activity_id, events in events_by_activity.items()
+        for event in events
+    ]
+    db.bulk_save_objects(rows)
+    return len(rows)
+
+
+def list_quality_events(
+    db: Session,
+    *,
+    activity_id: int,
+    event_type: str | None = None,
+) -> list[ActivityQualityEvent]:
+    q = db.query(ActivityQualityEvent).filter(ActivityQualityEvent.activity_id == activity_id)
+    if event_type is not None:
+        q = q.filter(ActivityQualityEvent.event_type == event_type)
+    return q.order_by(ActivityQualityEvent.start_seq.asc(), ActivityQualityEvent.id.asc()).all()
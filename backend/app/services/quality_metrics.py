@@ -1,17 +1,39 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import Iterator
 
+import numpy as np
 from geoalchemy2.functions import ST_X, ST_Y
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models.activity_point import ActivityPoint
 from app.models.activity_quality_metric import ActivityQualityMetric
-from app.services.quality import compute_quality
+from app.models.activity_track import ActivityTrack
+from app.services.quality import (
+    DISTANCE_HAVERSINE,
+    PairSeries,
+    QualityAccumulator,
+    QualityEvent,
+    QualityReport,
+    build_pair_series,
+    compute_quality_from_pairs,
+    detect_quality_events,
+    detect_quality_events_batch,
+)
+from app.services.quality_events import replace_quality_events, replace_quality_events_batch
+from app.services.track import Track, load_packed_tracks
 
 DEFAULT_SPIKE_SPEED_MPS = 12.0
 DEFAULT_STOP_SPEED_MPS = 0.6
 DEFAULT_STOP_MIN_DURATION_S = 10
+DEFAULT_DISTANCE_MODE = DISTANCE_HAVERSINE
+DEFAULT_BATCH_CHUNK_SIZE = 500
+DEFAULT_POINT_CHUNK_SIZE = 5_000
+# Stored points evaluated together by the batch paths; bounds their peak memory.
+DEFAULT_BATCH_MAX_POINTS = 2_000_000
 
 
 def get_persisted_quality_metric(db: Session, activity_id: int) -> ActivityQualityMetric | None:
@@ -22,25 +44,18 @@ def get_persisted_quality_metric(db: Session, activity_id: int) -> ActivityQuali
     )
 
 
-def upsert_quality_metric_from_series(
+def _upsert_quality_metric_from_report(
     db: Session,
     *,
     activity_id: int,
-    latlons: list[tuple[float, float]],
-    times: list[int],
-    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
-    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
-    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    report: QualityReport,
+    spike_speed_mps: float,
+    stop_speed_mps: float,
+    stop_min_duration_s: int,
+    metric: ActivityQualityMetric | None = None,
 ) -> ActivityQualityMetric:
-    report = compute_quality(
-        latlons=latlons,
-        times=times,
-        spike_speed_mps=spike_speed_mps,
-        stop_speed_mps=stop_speed_mps,
-        stop_min_duration_s=stop_min_duration_s,
-    )
-
-    metric = get_persisted_quality_metric(db, activity_id)
+    if metric is None:
+        metric = get_persisted_quality_metric(db, activity_id)
     if metric is None:
         metric = ActivityQualityMetric(activity_id=activity_id)
         db.add(metric)
@@ -56,11 +71,101 @@ def upsert_quality_metric_from_series(
     metric.spike_speed_threshold_mps = spike_speed_mps
     metric.stop_speed_threshold_mps = stop_speed_mps
     metric.stop_min_duration_s = stop_min_duration_s
+    metric.distance_mode = report.distance_mode
     metric.computed_at = datetime.now(timezone.utc)
 
     return metric
 
 
+@dataclass(frozen=True)
+class TrackQuality:
+    """Quality report (and optionally events) of one track plus the thresholds used."""
+
+    report: QualityReport
+    events: list[QualityEvent] | None
+    spike_speed_mps: float
+    stop_speed_mps: float
+    stop_min_duration_s: int
+
+
+def analyze_track_quality(
+    track: Track,
+    *,
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    record_events: bool = True,
+) -> TrackQuality:
+    """CPU-only half of `upsert_quality_metric_from_track`; needs no session."""
+    t = track.time.astype(np.int64)
+    pairs = build_pair_series(track.lat, track.lon, t, [0, t.size], distance_mode=distance_mode)
+    report = compute_quality_from_pairs(
+        pairs,
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+    )[0]
+    events = None
+    if record_events:
+        events = detect_quality_events(
+            pairs,
+            t,
+            spike_speed_mps=spike_speed_mps,
+            stop_speed_mps=stop_speed_mps,
+            stop_min_duration_s=stop_min_duration_s,
+        )
+    return TrackQuality(
+        report=report,
+        events=events,
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+    )
+
+
+def store_track_quality(db: Session, *, activity_id: int, quality: TrackQuality) -> ActivityQualityMetric:
+    """Upsert a precomputed `TrackQuality`; events are replaced when it carries them."""
+    if quality.events is not None:
+        replace_quality_events(db, activity_id=activity_id, events=quality.events)
+    return _upsert_quality_metric_from_report(
+        db,
+        activity_id=activity_id,
+        report=quality.report,
+        spike_speed_mps=quality.spike_speed_mps,
+        stop_speed_mps=quality.stop_speed_mps,
+        stop_min_duration_s=quality.stop_min_duration_s,
+    )
+
+
+def upsert_quality_metric_from_track(
+    db: Session,
+    *,
+    activity_id: int,
+    track: Track,
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    record_events: bool = True,
+) -> ActivityQualityMetric:
+    """Compute and upsert metrics for a full in-memory track.
+
+    With `record_events`, the spike/stop event index is rewritten from the same
+    pair series, so locating bad segments later is a lookup, not a recompute.
+    Event indices equal point seqs because ingest numbers points from 0.
+    """
+    quality = analyze_track_quality(
+        track,
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+        distance_mode=distance_mode,
+        record_events=record_events,
+    )
+    return store_track_quality(db, activity_id=activity_id, quality=quality)
+
+
 def upsert_quality_metric_from_points(
     db: Session,
     *,
@@ -68,34 +173,289 @@ def upsert_quality_metric_from_points(
     spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
     stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
     stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    chunk_size: int = DEFAULT_POINT_CHUNK_SIZE,
+    record_events: bool = True,
 ) -> ActivityQualityMetric:
-    rows = (
-        db.query(
-            ST_Y(ActivityPoint.geom),
-            ST_X(ActivityPoint.geom),
-            ActivityPoint.time_s,
-        )
-        .filter(ActivityPoint.activity_id == activity_id)
-        .order_by(ActivityPoint.seq.asc())
-        .all()
+    """Recompute metrics from the stored track with bounded memory.
+
+    Per-point rows are streamed through a server-side cursor (`yield_per`) in
+    chunks of `chunk_size` rows and folded into a `QualityAccumulator`, so peak
+    memory does not grow with the length of the activity. A packed track is
+    already a single row and is folded in one chunk.
+
+    With `record_events` the event index is rebuilt under the same
+    thresholds, so `/quality/events` and the timeline agree with the metric.
+    """
+    acc = QualityAccumulator(
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+        distance_mode=distance_mode,
+        record_events=record_events,
     )
+    packed = load_packed_tracks(db, activity_ids=[activity_id]).get(activity_id)
+    if packed is not None:
+        acc.add_chunk(packed.lat, packed.lon, packed.time.astype(np.int64))
+    else:
+        _accumulate_point_rows(db, acc, activity_id=activity_id, chunk_size=chunk_size)
 
-    if len(rows) < 2:
+    if acc.point_count < 2:
         raise ValueError("Not enough points. Ingest streams first.")
 
-    latlons = [(float(r[0]), float(r[1])) for r in rows]
-    times = [int(r[2]) for r in rows]
-    return upsert_quality_metric_from_series(
+    if record_events:
+        replace_quality_events(db, activity_id=activity_id, events=acc.events())
+    return _upsert_quality_metric_from_report(
         db,
         activity_id=activity_id,
-        latlons=latlons,
-        times=times,
+        report=acc.report(),
         spike_speed_mps=spike_speed_mps,
         stop_speed_mps=stop_speed_mps,
         stop_min_duration_s=stop_min_duration_s,
     )
 
 
+def _accumulate_point_rows(db: Session, acc: QualityAccumulator, *, activity_id: int, chunk_size: int) -> None:
+    stmt = (
+        select(
+            ST_Y(ActivityPoint.geom),
+            ST_X(ActivityPoint.geom),
+            ActivityPoint.time_s,
+        )
+        .where(ActivityPoint.activity_id == activity_id)
+        .order_by(ActivityPoint.seq.asc())
+        .execution_options(yield_per=chunk_size)
+    )
+
+    result = db.execute(stmt)
+    try:
+        for rows in result.partitions():
+            chunk = np.asarray(rows, dtype=np.float64)
+            acc.add_chunk(chunk[:, 0], chunk[:, 1], chunk[:, 2].astype(np.int64))
+    finally:
+        result.close()
+
+
+@dataclass(frozen=True)
+class PointBatch:
+    """Stored tracks of several activities, concatenated in ascending id (CSR) order."""
+
+    activity_ids: list[int]
+    pairs: PairSeries
+    times: np.ndarray
+    offsets: np.ndarray
+
+
+def stored_point_counts(db: Session, *, activity_ids: list[int]) -> dict[int, int]:
+    """Stored point count per activity; activities without a stored track are absent."""
+    if not activity_ids:
+        return {}
+    counts = dict(
+        db.query(ActivityTrack.activity_id, ActivityTrack.point_count)
+        .filter(ActivityTrack.activity_id.in_(activity_ids))
+        .all()
+    )
+    remaining = [activity_id for activity_id in activity_ids if activity_id not in counts]
+    if remaining:
+        counts.update(
+            db.query(ActivityPoint.activity_id, func.count())
+            .filter(ActivityPoint.activity_id.in_(remaining))
+            .group_by(ActivityPoint.activity_id)
+            .all()
+        )
+    return counts
+
+
+def _stream_point_columns(db: Session, *, activity_ids: list[int], chunk_size: int) -> np.ndarray:
+    """`(activity_id, lat, lon, time_s)` rows of per-point tracks as one float array.
+
+    Rows arrive through a server-side cursor and each partition is converted
+    right away, so no Python tuple per point outlives its partition.
+    """
+    stmt = (
+        select(
+            ActivityPoint.activity_id,
+            ST_Y(ActivityPoint.geom),
+            ST_X(ActivityPoint.geom),
+            ActivityPoint.time_s,
+        )
+        .where(ActivityPoint.activity_id.in_(activity_ids))
+        .order_by(ActivityPoint.activity_id.asc(), ActivityPoint.seq.asc())
+        .execution_options(yield_per=chunk_size)
+    )
+    result = db.execute(stmt)
+    try:
+        parts = [np.asarray(rows, dtype=np.float64) for rows in result.partitions()]
+    finally:
+        result.close()
+    if not parts:
+        return np.empty((0, 4), dtype=np.float64)
+    return np.concatenate(parts)
+
+
+def load_points_batch(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    chunk_size: int = DEFAULT_POINT_CHUNK_SIZE,
+) -> PointBatch:
+    """Load stored tracks for many activities with at most two queries.
+
+    Packed tracks are read first; the remaining activities come from one
+    streamed per-point query. Memory grows with the points of `activity_ids`;
+    use `iter_point_batches` to bound it.
+    """
+    packed = load_packed_tracks(db, activity_ids=activity_ids)
+    remaining = [activity_id for activity_id in activity_ids if activity_id not in packed]
+
+    columns: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+        activity_id: (track.lat, track.lon, track.time.astype(np.int64)) for activity_id, track in packed.items()
+    }
+    if remaining:
+        data = _stream_point_columns(db, activity_ids=remaining, chunk_size=chunk_size)
+        point_activity_ids = data[:, 0].astype(np.int64)
+        boundaries = np.flatnonzero(point_activity_ids[1:] != point_activity_ids[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [point_activity_ids.size]))
+        times = data[:, 3].astype(np.int64)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end > start:
+                columns[int(point_activity_ids[start])] = (data[start:end, 1], data[start:end, 2], times[start:end])
+
+    loaded_ids = sorted(columns)
+    parts = [columns[activity_id] for activity_id in loaded_ids]
+    offsets = np.concatenate(([0], np.cumsum([part[0].size for part in parts], dtype=np.int64)))
+    if not parts:
+        pairs = build_pair_series([], [], [], [0], distance_mode=distance_mode)
+        return PointBatch([], pairs, np.empty(0, dtype=np.int64), offsets)
+    times = np.concatenate([part[2] for part in parts])
+    pairs = build_pair_series(
+        np.concatenate([part[0] for part in parts]),
+        np.concatenate([part[1] for part in parts]),
+        times,
+        offsets,
+        distance_mode=distance_mode,
+    )
+    return PointBatch(loaded_ids, pairs, times, offsets)
+
+
+def iter_point_batches(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    max_points: int = DEFAULT_BATCH_MAX_POINTS,
+) -> Iterator[PointBatch]:
+    """`load_points_batch` over groups of `activity_ids` holding at most `max_points` points.
+
+    Point counts are looked up first, so peak memory is bounded by
+    `max_points` rather than by the total length of the activities. An
+    activity longer than `max_points` is loaded on its own.
+    """
+    if max_points <= 0:
+        raise ValueError("max_points must be positive")
+    counts = stored_point_counts(db, activity_ids=activity_ids)
+    group: list[int] = []
+    group_points = 0
+    for activity_id in sorted(counts):
+        if group and group_points + counts[activity_id] > max_points:
+            yield load_points_batch(db, activity_ids=group, distance_mode=distance_mode)
+            group, group_points = [], 0
+        group.append(activity_id)
+        group_points += counts[activity_id]
+    if group:
+        yield load_points_batch(db, activity_ids=group, distance_mode=distance_mode)
+
+
+def upsert_quality_metrics_from_points_batch(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+    distance_mode: str = DEFAULT_DISTANCE_MODE,
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    max_points: int = DEFAULT_BATCH_MAX_POINTS,
+    record_events: bool = True,
+) -> dict[int, ActivityQualityMetric]:
+    """Recompute metrics for many activities with one vectorized pass per batch.
+
+    Up to `chunk_size` activities are considered together and loaded in
+    batches of at most `max_points` stored points (see `iter_point_batches`),
+    each evaluated in one pass. Activities with fewer than two stored points
+    are skipped and absent from the result. With `record_events` their event
+    indices are rebuilt from the same pass.
+    """
+    metrics: dict[int, ActivityQualityMetric] = {}
+    for chunk_start in range(0, len(activity_ids), chunk_size):
+        chunk = activity_ids[chunk_start : chunk_start + chunk_size]
+        for batch in iter_point_batches(db, activity_ids=chunk, distance_mode=distance_mode, max_points=max_points):
+            reports = compute_quality_from_pairs(
+                batch.pairs,
+                spike_speed_mps=spike_speed_mps,
+                stop_speed_mps=stop_speed_mps,
+                stop_min_duration_s=stop_min_duration_s,
+            )
+            events = None
+            if record_events:
+                events = detect_quality_events_batch(
+                    batch.pairs,
+                    batch.times,
+                    batch.offsets,
+                    spike_speed_mps=spike_speed_mps,
+                    stop_speed_mps=stop_speed_mps,
+                    stop_min_duration_s=stop_min_duration_s,
+                )
+
+            existing = {
+                metric.activity_id: metric
+                for metric in db.query(ActivityQualityMetric)
+                .filter(ActivityQualityMetric.activity_id.in_(batch.activity_ids))
+                .all()
+            }
+            batch_events: dict[int, list[QualityEvent]] = {}
+            for i, (activity_id, report) in enumerate(zip(batch.activity_ids, reports)):
+                if report.point_count < 2:
+                    continue
+                if events is not None:
+                    batch_events[activity_id] = events[i]
+                metrics[activity_id] = _upsert_quality_metric_from_report(
+                    db,
+                    activity_id=activity_id,
+                    report=report,
+                    spike_speed_mps=spike_speed_mps,
+                    stop_speed_mps=stop_speed_mps,
+                    stop_min_duration_s=stop_min_duration_s,
+                    metric=existing.get(activity_id),
+                )
+            replace_quality_events_batch(db, events_by_activity=batch_events)
+    return metrics
+
+
+def compute_missing_quality_metrics(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+) -> dict[int, ActivityQualityMetric]:
+    """Batch-compute default-threshold metrics for activities that have none yet."""
+    if not activity_ids:
+        return {}
+    with_metric = {
+        row[0]
+        for row in db.query(ActivityQualityMetric.activity_id)
+        .filter(ActivityQualityMetric.activity_id.in_(activity_ids))
+        .all()
+    }
+    missing = [activity_id for activity_id in activity_ids if activity_id not in with_metric]
+    metrics = upsert_quality_metrics_from_points_batch(db, activity_ids=missing, chunk_size=chunk_size)
+    # Sessions run with autoflush disabled; flush so per-activity lookups see the new rows.
+    db.flush()
+    return metrics
+
+
 def get_or_compute_quality_metric(
     db: Session,
     *,
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import product
+
+from sqlalchemy.orm import Session
+
+from app.services.quality import PairSeries
+from app.services.quality_metrics import DEFAULT_BATCH_CHUNK_SIZE, iter_point_batches
+
+
+@dataclass(frozen=True)
+class ThresholdGrid:
+    spike_speeds_mps: tuple[float, ...]
+    stop_speeds_mps: tuple[float, ...]
+    stop_min_durations_s: tuple[int, ...]
+
+    def __post_init__(self) -> None:
+        if not (self.spike_speeds_mps and self.stop_speeds_mps and self.stop_min_durations_s):
+            raise ValueError("Every threshold axis needs at least one value")
+
+    @property
+    def size(self) -> int:
+        return len(self.spike_speeds_mps) * len(self.stop_speeds_mps) * len(self.stop_min_durations_s)
+
+
+def sweep_pair_series(
+    pairs: PairSeries,
+    grid: ThresholdGrid,
+    *,
+    activity_ids: list[int],
+) -> list[dict]:
+    """Evaluate every threshold combination over precomputed pair speeds.
+
+    Distances, speeds, max speed and jitter are computed once; spike counts are
+    recomputed per spike threshold and stop runs once per stop speed, then
+    filtered per minimum duration. Returns one row per (activity, combination)
+    for activities with at least two points.
+    """
+    distance = pairs.total_distance_m()
+    max_speed = pairs.max_speed_mps()
+    jitter = pairs.jitter_score()
+    spikes = {s: pairs.spike_count(s) for s in grid.spike_speeds_mps}
+    stops = {}
+    for stop_speed in grid.stop_speeds_mps:
+        run_group, run_durations = pairs.stop_runs(stop_speed)
+        for min_duration in grid.stop_min_durations_s:
+            stops[(stop_speed, min_duration)] = pairs.stop_totals(run_group, run_durations, min_duration)
+
+    rows: list[dict] = []
+    for i, activity_id in enumerate(activity_ids):
+        point_count = int(pairs.point_counts[i])
+        if point_count < 2:
+            continue
+        for spike_speed, stop_speed, min_duration in product(
+            grid.spike_speeds_mps,
+            grid.stop_speeds_mps,
+            grid.stop_min_durations_s,
+        ):
+            stopped, segments = stops[(stop_speed, min_duration)]
+            rows.append(
+                {
+                    "activity_id": activity_id,
+                    "spike_speed_mps": spike_speed,
+                    "stop_speed_mps": stop_speed,
+                    "stop_min_duration_s": min_duration,
+                    "point_count": point_count,
+                    "duration_s": int(pairs.duration_s[i]),
+                    "distance_m": float(distance[i]),
+                    "max_speed_mps": float(max_speed[i]),
+                    "spike_count": int(spikes[spike_speed][i]),
+                    "stopped_time_s": int(stopped[i]),
+                    "stop_segments": int(segments[i]),
+                    "jitter_score": float(jitter[i]),
+                }
+            )
+    return rows
+
+
+def sweep_quality_thresholds(
+    db: Session,
+    *,
+    activity_ids: list[int],
+    grid: ThresholdGrid,
+    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+) -> list[dict]:
+    rows: list[dict] = []
+    for chunk_start in range(0, len(activity_ids), chunk_size):
+        chunk = activity_ids[chunk_start : chunk_start + chunk_size]
+        for batch in iter_point_batches(db, activity_ids=chunk):
+            rows.extend(sweep_pair_series(batch.pairs, grid, activity_ids=batch.activity_ids))
+    return rows
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.services.quality import build_pair_series, find_stop_runs
+from app.services.quality_metrics import (
+    DEFAULT_SPIKE_SPEED_MPS,
+    DEFAULT_STOP_MIN_DURATION_S,
+    DEFAULT_STOP_SPEED_MPS,
+    get_persisted_quality_metric,
+)
+from app.services.track import load_track
+
+DEFAULT_TIMELINE_CACHE_SIZE = 256
+
+
+def compute_quality_timeline(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    times: np.ndarray,
+    *,
+    window_s: int,
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+) -> list[dict]:
+    """Per-window quality metrics for one activity.
+
+    Windows are consecutive `window_s`-second buckets starting at the first
+    timestamp; each pair is assigned to the window containing its end point.
+    Stops use the same run detection as `compute_quality` over the whole
+    activity, so a stop that crosses a window edge still counts in both.
+    """
+    if window_s <= 0:
+        raise ValueError("window_s must be positive")
+    t = np.asarray(times, dtype=np.int64)
+    if t.size < 2:
+        return []
+
+    pairs = build_pair_series(lat, lon, t, [0, t.size])
+    t0 = int(t.min())
+    n_windows = int((t.max() - t0) // window_s) + 1
+
+    window = (t[pairs.first_point + 1] - t0) // window_s
+    pair_count = np.bincount(window, minlength=n_windows)
+    covered_s = np.bincount(window, weights=pairs.dt_s, minlength=n_windows)
+    distance = np.bincount(window, weights=pairs.distance_m, minlength=n_windows)
+    spikes = np.bincount(
+        window,
+        weights=(pairs.speed_mps >= spike_speed_mps),
+        minlength=n_windows,
+    ).astype(np.int64)
+
+    # Mark pairs that belong to a stop run long enough to count.
+    run_starts, run_ends, _ = find_stop_runs(
+        pairs.speed_mps <= stop_speed_mps,
+        pairs.dt_s,
+        stop_min_duration_s,
+    )
+    in_stop = np.zeros(pairs.speed_mps.size + 1, dtype=np.int64)
+    np.add.at(in_stop, run_starts, 1)
+    np.add.at(in_stop, run_ends, -1)
+    in_stop = np.cumsum(in_stop[:-1]) > 0
+    stopped_s = np.bincount(window[in_stop], weights=pairs.dt_s[in_stop], minlength=n_windows)
+
+    # Jitter only compares consecutive speeds that fall into the same window.
+    same = window[1:] == window[:-1]
+    jitter_sum = np.bincount(
+        window[1:][same],
+        weights=np.abs(np.diff(pairs.speed_mps))[same],
+        minlength=n_windows,
+    )
+    jitter_n = np.bincount(window[1:][same], minlength=n_windows)
+
+    rows: list[dict] = []
+    for w in range(n_windows):
+        distance_km = float(distance[w]) / 1000.0
+        rows.append(
+            {
+                "start_s": w * window_s,
+                "end_s": (w + 1) * window_s,
+                "pair_count": int(pair_count[w]),
+                "distance_m": float(distance[w]),
+                "spike_count": int(spikes[w]),
+                "spike_density": (int(spikes[w]) / distance_km) if distance_km > 0 else None,
+                "jitter_score": (float(jitter_sum[w]) / int(jitter_n[w])) if jitter_n[w] else None,
+                "stopped_time_s": int(stopped_s[w]),
+                "stopped_fraction": (float(stopped_s[w]) / float(covered_s[w])) if covered_s[w] > 0 else None,
+            }
+        )
+    return rows
+
+
+class TimelineCache:
+    """Small thread-safe LRU keyed by (activity, data version, window, thresholds)."""
+
+    def __init__(self, maxsize: int = DEFAULT_TIMELINE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> list[dict] | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: list[dict]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+timeline_cache = TimelineCache()
+
+
+def get_quality_timeline(
+    db: Session,
+    *,
+    activity_id: int,
+    window_s: int,
+    spike_speed_mps: float = DEFAULT_SPIKE_SPEED_MPS,
+    stop_speed_mps: float = DEFAULT_STOP_SPEED_MPS,
+    stop_min_duration_s: int = DEFAULT_STOP_MIN_DURATION_S,
+) -> list[dict]:
+    # Re-ingest always rewrites the metric row, so its timestamp versions the stored points.
+    metric = get_persisted_quality_metric(db, activity_id)
+    version = metric.computed_at.isoformat() if metric is not None and metric.computed_at else None
+    key = (activity_id, version, window_s, spike_speed_mps, stop_speed_mps, stop_min_duration_s)
+
+    cached = timeline_cache.get(key)
+    if cached is not None:
+        return cached
+
+    track = load_track(db, activity_id=activity_id)
+    if len(track) < 2:
+        raise ValueError("Not enough points. Ingest streams first.")
+
+    windows = compute_quality_timeline(
+        track.lat,
+        track.lon,
+        track.time,
+        window_s=window_s,
+        spike_speed_mps=spike_speed_mps,
+        stop_speed_mps=stop_speed_mps,
+        stop_min_duration_s=stop_min_duration_s,
+    )
+    timeline_cache.put(key, windows)
+    return windows
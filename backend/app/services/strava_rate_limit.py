@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from datetime import datetime
+from typing import Callable, Mapping
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.integrations.strava_rate_limit import (
+    RateLimitPolicy,
+    RateLimitState,
+    apply_response,
+    parse_rate_limit_headers,
+    plan_request,
+)
+from app.models.strava_rate_limit import StravaRateLimitState
+
+_STATE_FIELDS = tuple(f.name for f in fields(RateLimitState))
+
+
+class PostgresRateLimitStore:
+    """Strava quota state shared by every process through one locked row.
+
+    A reserve is a short transaction that locks the scope's row, plans the
+    slot and commits; callers sleep outside the transaction. An observe is a
+    single upsert that folds the response headers in SQL, and is skipped when
+    the response carries nothing to fold in.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], *, scope: str):
+        self.session_factory = session_factory
+        self.scope = scope
+
+    def _select_locked(self, db: Session) -> StravaRateLimitState | None:
+        return (
+            db.query(StravaRateLimitState)
+            .filter(StravaRateLimitState.scope == self.scope)
+            .with_for_update()
+            .one_or_none()
+        )
+
+    def _locked_row(self, db: Session, now: datetime) -> StravaRateLimitState:
+        row = self._select_locked(db)
+        if row is not None:
+            return row
+        fresh = RateLimitState.fresh(now)
+        db.execute(
+            insert(StravaRateLimitState)
+            .values(scope=self.scope, **{name: getattr(fresh, name) for name in _STATE_FIELDS})
+            .on_conflict_do_nothing(index_elements=["scope"])
+        )
+        return self._select_locked(db)
+
+    def reserve(self, now: datetime, policy: RateLimitPolicy) -> tuple[bool, float]:
+        with self.session_factory() as db, db.begin():
+            row = self._locked_row(db, now)
+            state = RateLimitState(**{name: getattr(row, name) for name in _STATE_FIELDS})
+            result = plan_request(state, now, policy)
+            for name in _STATE_FIELDS:
+                setattr(row, name, getattr(state, name))
+        return result
+
+    def observe(self, now: datetime, headers: Mapping[str, str], status_code: int) -> None:
+        """`apply_response` as one `INSERT ... ON CONFLICT DO UPDATE` against the stored row."""
+        parsed = parse_rate_limit_headers(headers)
+        if parsed is None and status_code != 429:
+            # Only a window roll would change, and the next reserve rolls anyway.
+            return
+        # The row a first observation creates; its values double as the statement's inputs.
+        current = RateLimitState.fresh(now)
+        apply_response(current, now, headers, status_code)
+        stmt = insert(StravaRateLimitState).values(
+            scope=self.scope,
+            **{name: getattr(current, name) for name in _STATE_FIELDS},
+        )
+        stored, new = StravaRateLimitState.__table__.c, stmt.excluded
+        usage_15m = case((stored.window_15m_start == new.window_15m_start, stored.usage_15m), else_=0)
+        usage_day = case((stored.day_start == new.day_start, stored.usage_day), else_=0)
+        limit_15m, limit_day = stored.limit_15m, stored.limit_day
+        if parsed is not None:
+            limit_15m, limit_day = new.limit_15m, new.limit_day
+            usage_15m = func.greatest(usage_15m, new.usage_15m)
+            usage_day = func.greatest(usage_day, new.usage_day)
+        if status_code == 429:
+            usage_15m = func.greatest(usage_15m, limit_15m)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scope"],
+            set_={
+                "window_15m_start": new.window_15m_start,
+                "day_start": new.day_start,
+                "limit_15m": limit_15m,
+                "limit_day": limit_day,
+                "usage_15m": usage_15m,
+                "usage_day": usage_day,
+            },
+        )
+        with self.session_factory() as db, db.begin():
+            db.execute(stmt)
+
+    def snapshot(self) -> dict | None:
+        with self.session_factory() as db:
+            row = db.get(StravaRateLimitState, self.scope)
+            if row is None:
+                return None
+            return {name: getattr(row, name) for name in _STATE_FIELDS}
@@ -1,22 +1,131 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
+import httpx
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.integrations.strava import StravaClient
+from app.core.db import SessionLocal
+from app.integrations.strava import AsyncStravaClient, StravaClient
+from app.integrations.strava_cache import StreamCache
+from app.integrations.strava_http import HttpPoolMetrics, build_async_http_client, build_http_client
+from app.integrations.strava_rate_limit import InMemoryRateLimitStore, RateLimitPolicy, StravaRateLimiter
+from app.integrations.strava_token_refresh import InMemoryTokenStore, TokenRefreshCoordinator, TokenStore
 from app.models.strava_token import StravaToken
+from app.services.strava_rate_limit import PostgresRateLimitStore
+from app.services.strava_token_refresh import PostgresTokenStore
 
+# Connection reuse of every pooled Strava client in this process.
+strava_http_metrics = HttpPoolMetrics()
 
-def build_strava_client(token: StravaToken) -> StravaClient:
-    return StravaClient(
-        access_token=token.access_token,
-        refresh_token=token.refresh_token,
-        expires_at=token.expires_at,
-        client_id=settings.STRAVA_CLIENT_ID,
-        client_secret=settings.STRAVA_CLIENT_SECRET,
+
+@lru_cache(maxsize=1)
+def get_stream_cache() -> StreamCache | None:
+    """Process-wide raw stream cache from settings, or None when it is disabled."""
+    if not settings.STREAM_CACHE_DIR:
+        return None
+    return StreamCache(
+        settings.STREAM_CACHE_DIR,
+        max_bytes=settings.STREAM_CACHE_MAX_BYTES,
+        codec=settings.STREAM_CACHE_CODEC,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_strava_http_client() -> httpx.Client:
+    """Process-wide keep-alive client shared by every `build_strava_client` instance."""
+    return build_http_client(
+        max_connections=settings.STRAVA_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.STRAVA_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry_s=settings.STRAVA_HTTP_KEEPALIVE_EXPIRY_S,
+        http2=settings.STRAVA_HTTP2,
+        metrics=strava_http_metrics,
+    )
+
+
+def build_strava_async_http_client(*, max_connections: int | None = None) -> httpx.AsyncClient:
+    """Pooled async client with the same settings and metrics, for one event loop."""
+    max_connections = max_connections or settings.STRAVA_HTTP_MAX_CONNECTIONS
+    return build_async_http_client(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry_s=settings.STRAVA_HTTP_KEEPALIVE_EXPIRY_S,
+        http2=settings.STRAVA_HTTP2,
+        metrics=strava_http_metrics,
+    )
+
+
+RATE_LIMIT_BACKENDS = ("postgres", "memory", "off")
+
+
+@lru_cache(maxsize=1)
+def get_strava_rate_limiter() -> StravaRateLimiter | None:
+    """Process-wide limiter over the configured quota store, or None when disabled."""
+    backend = settings.STRAVA_RATE_LIMIT_BACKEND
+    if backend not in RATE_LIMIT_BACKENDS:
+        raise ValueError(f"STRAVA_RATE_LIMIT_BACKEND must be one of: {', '.join(RATE_LIMIT_BACKENDS)}")
+    if backend == "off":
+        return None
+    if backend == "postgres":
+        store = PostgresRateLimitStore(SessionLocal, scope=settings.STRAVA_CLIENT_ID)
+    else:
+        store = InMemoryRateLimitStore()
+    return StravaRateLimiter(
+        store,
+        policy=RateLimitPolicy(
+            headroom=settings.STRAVA_RATE_LIMIT_HEADROOM,
+            burst_fraction=settings.STRAVA_RATE_LIMIT_BURST_FRACTION,
+        ),
+        max_wait_s=settings.STRAVA_RATE_LIMIT_MAX_WAIT_S,
     )
 
 
+TOKEN_REFRESH_BACKENDS = ("postgres", "memory", "off")
+
+
+@lru_cache(maxsize=1)
+def get_token_store() -> TokenStore | None:
+    """Process-wide store that makes token refreshes single-flight, or None when disabled."""
+    backend = settings.STRAVA_TOKEN_REFRESH_BACKEND
+    if backend not in TOKEN_REFRESH_BACKENDS:
+        raise ValueError(f"STRAVA_TOKEN_REFRESH_BACKEND must be one of: {', '.join(TOKEN_REFRESH_BACKENDS)}")
+    if backend == "off":
+        return None
+    if backend == "postgres":
+        return PostgresTokenStore(SessionLocal)
+    return InMemoryTokenStore()
+
+
+def _token_refresh(token: StravaToken) -> TokenRefreshCoordinator | None:
+    store = get_token_store()
+    if store is None:
+        return None
+    return TokenRefreshCoordinator(store, user_id=token.user_id)
+
+
+def _client_kwargs(token: StravaToken) -> dict:
+    return {
+        "refresh_token": token.refresh_token,
+        "expires_at": token.expires_at,
+        "client_id": settings.STRAVA_CLIENT_ID,
+        "client_secret": settings.STRAVA_CLIENT_SECRET,
+        "base_url": settings.STRAVA_API_BASE_URL,
+        "token_url": settings.STRAVA_TOKEN_URL,
+        "stream_cache": get_stream_cache(),
+        "rate_limiter": get_strava_rate_limiter(),
+        "token_refresh": _token_refresh(token),
+    }
+
+
+def build_strava_client(token: StravaToken) -> StravaClient:
+    return StravaClient(access_token=token.access_token, http_client=get_strava_http_client(), **_client_kwargs(token))
+
+
+def build_async_strava_client(token: StravaToken, http_client: httpx.AsyncClient) -> AsyncStravaClient:
+    return AsyncStravaClient(token.access_token, http_client=http_client, **_client_kwargs(token))
+
+
 def persist_refreshed_token(
     db: Session,
     token: StravaToken,
@@ -24,6 +133,12 @@ def persist_refreshed_token(
     *,
     commit: bool = False,
 ) -> bool:
+    """Write a token the client refreshed on its own into `token`.
+
+    Refreshes made through a `token_refresh` coordinator are stored by it and
+    never flagged here, so a worker cannot overwrite a newer token stored by
+    another worker with the one it refreshed earlier.
+    """
     if not client.token_was_refreshed:
         return False
 
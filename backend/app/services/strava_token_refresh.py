@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.integrations.strava_token_refresh import StoredToken
+from app.models.strava_token import StravaToken
+
+# First key of the two-key advisory lock; the second is the user id.
+TOKEN_REFRESH_LOCK_NAMESPACE = 0x53545254  # "STRT"
+
+
+class _PostgresSlot:
+    def __init__(self, db: Session, user_id: int):
+        self._db = db
+        self._user_id = user_id
+        self._row: StravaToken | None = None
+
+    def load(self) -> StoredToken | None:
+        self._row = self._db.query(StravaToken).filter(StravaToken.user_id == self._user_id).one_or_none()
+        if self._row is None:
+            return None
+        return StoredToken(
+            access_token=self._row.access_token,
+            refresh_token=self._row.refresh_token,
+            expires_at=self._row.expires_at,
+        )
+
+    def save(self, token: StoredToken) -> None:
+        if self._row is None:
+            # The user disconnected Strava meanwhile; there is nothing to update.
+            return
+        self._row.access_token = token.access_token
+        self._row.refresh_token = token.refresh_token
+        if token.expires_at is not None:
+            self._row.expires_at = token.expires_at
+
+
+class PostgresTokenStore:
+    """`strava_tokens` rows guarded by a per-user transaction-level advisory lock.
+
+    The lock is held from reading the stored token until the refreshed one is
+    committed, so web workers and backfill processes refresh a user at most
+    once between them. The advisory lock does not block plain reads or writes
+    of the row, only other refreshers of the same user.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    @contextmanager
+    def locked(self, user_id: int) -> Iterator[_PostgresSlot]:
+        with self.session_factory() as db, db.begin():
+            db.execute(select(func.pg_advisory_xact_lock(TOKEN_REFRESH_LOCK_NAMESPACE, user_id)))
+            yield _PostgresSlot(db, user_id)
@@ -2,16 +2,21 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from geoalchemy2.shape import from_shape
-from shapely.geometry import Point
+from sqlalchemy import and_, exists
 from sqlalchemy.orm import Session
 
 from app.models.activity import Activity
-from app.models.activity_point import ActivityPoint
+from app.models.activity_quality_metric import ActivityQualityMetric
 from app.models.strava_token import StravaToken
 from app.models.user import User
-from app.services.quality_metrics import upsert_quality_metric_from_series
+from app.services.point_loader import store_track
+from app.services.quality_metrics import TrackQuality, analyze_track_quality, store_track_quality
 from app.services.strava_session import build_strava_client, persist_refreshed_token
+from app.services.track import Track, stored_track_exists
+
+
+# `activities.stream_resolution` for streams fetched without down-sampling.
+STREAM_RESOLUTION_FULL = "full"
 
 
 class StreamIngestError(ValueError):
@@ -30,10 +35,20 @@ class MissingStreamDataError(StreamIngestError):
     """Strava stream payload is missing required keys."""
 
 
+@dataclass(frozen=True)
+class ParsedStreams:
+    """CPU-side result of a stream payload: the track, its hash and its quality."""
+
+    track: Track
+    stream_hash: str
+    quality: TrackQuality | None
+
+
 @dataclass(frozen=True)
 class StreamIngestResult:
     activity_id: int
     points: int
+    unchanged: bool = False
 
 
 def ingest_streams_for_activity(
@@ -41,7 +56,16 @@ def ingest_streams_for_activity(
     *,
     activity_id: int,
     commit: bool = True,
+    refresh_streams: bool = False,
+    resolution: str | None = None,
+    series_type: str | None = None,
 ) -> StreamIngestResult:
+    """Fetch one activity's streams (stream cache first) and persist them.
+
+    `refresh_streams` bypasses the raw stream cache and re-downloads from Strava.
+    `resolution`/`series_type` request a down-sampled stream (see
+    `StravaClient.get_activity_streams`); None ingests full resolution.
+    """
     activity = db.query(Activity).filter(Activity.id == activity_id).one_or_none()
     if not activity:
         raise ActivityNotFoundError("Activity not found")
@@ -55,9 +79,24 @@ def ingest_streams_for_activity(
         raise MissingTokenError("No Strava token found for activity user")
 
     client = build_strava_client(token)
-    streams = client.get_activity_streams(activity.strava_activity_id)
+    streams = client.get_activity_streams(
+        activity.strava_activity_id,
+        resolution=resolution,
+        series_type=series_type,
+        refresh=refresh_streams,
+    )
     persist_refreshed_token(db, token, client, commit=False)
 
+    return write_activity_streams(db, activity=activity, streams=streams, resolution=resolution, commit=commit)
+
+
+def parse_activity_streams(streams: dict, *, known_hash: str | None = None) -> ParsedStreams:
+    """Build the track, content hash and quality analysis of a stream payload.
+
+    Pure CPU work with no session, so callers may run it off the DB thread.
+    The quality analysis is skipped (left None) when the track hashes to
+    `known_hash`, the hash already stored for the activity.
+    """
     latlng = streams.get("latlng", {}).get("data")
     times = streams.get("time", {}).get("data")
     altitude = streams.get("altitude", {}).get("data")
@@ -65,35 +104,60 @@ def ingest_streams_for_activity(
     if not latlng or not times:
         raise MissingStreamDataError("Missing latlng or time streams")
 
-    db.query(ActivityPoint).filter(ActivityPoint.activity_id == activity.id).delete()
-
-    points = []
-    quality_latlons: list[tuple[float, float]] = []
-    quality_times: list[int] = []
-
-    for i, (coord, t) in enumerate(zip(latlng, times)):
-        lon, lat = coord[1], coord[0]
-        point = ActivityPoint(
-            activity_id=activity.id,
-            seq=i,
-            time_s=t,
-            geom=from_shape(Point(lon, lat), srid=4326),
-            ele_m=altitude[i] if altitude and i < len(altitude) else None,
-        )
-        points.append(point)
-        quality_latlons.append((lat, lon))
-        quality_times.append(int(t))
-
-    db.bulk_save_objects(points)
-    upsert_quality_metric_from_series(
-        db,
-        activity_id=activity.id,
-        latlons=quality_latlons,
-        times=quality_times,
-    )
+    track = Track.from_streams(latlng, times, altitude)
+    stream_hash = track.content_hash()
+    quality = None if stream_hash == known_hash else analyze_track_quality(track)
+    return ParsedStreams(track=track, stream_hash=stream_hash, quality=quality)
+
+
+def write_parsed_streams(
+    db: Session,
+    *,
+    activity: Activity,
+    parsed: ParsedStreams,
+    resolution: str | None = None,
+    commit: bool = True,
+) -> StreamIngestResult:
+    """Store a parsed stream for one activity.
+
+    When the stream hashes the same as the one last stored for the activity
+    and its track and quality metric are still present, nothing is rewritten
+    and the result is flagged `unchanged`. `resolution` is the one the payload
+    was requested at and is recorded on the activity.
+    """
+    track = parsed.track
+    unchanged = activity.stream_hash == parsed.stream_hash and _has_stored_results(db, activity_id=activity.id)
+    if not unchanged:
+        quality = parsed.quality or analyze_track_quality(track)
+        store_track(db, activity_id=activity.id, track=track)
+        store_track_quality(db, activity_id=activity.id, quality=quality)
+        activity.stream_hash = parsed.stream_hash
+    activity.stream_resolution = resolution or STREAM_RESOLUTION_FULL
 
     if commit:
         db.commit()
 
-    return StreamIngestResult(activity_id=activity.id, points=len(points))
+    return StreamIngestResult(activity_id=activity.id, points=len(track), unchanged=unchanged)
+
+
+def write_activity_streams(
+    db: Session,
+    *,
+    activity: Activity,
+    streams: dict,
+    resolution: str | None = None,
+    commit: bool = True,
+) -> StreamIngestResult:
+    """Parse and store an already fetched Strava stream payload for one activity."""
+    return write_parsed_streams(
+        db,
+        activity=activity,
+        parsed=parse_activity_streams(streams, known_hash=activity.stream_hash),
+        resolution=resolution,
+        commit=commit,
+    )
+
 
+def _has_stored_results(db: Session, *, activity_id: int) -> bool:
+    has_metric = exists().where(ActivityQualityMetric.activity_id == activity_id)
+    return bool(db.query(and_(has_metric, stored_track_exists(activity_id))).scalar())
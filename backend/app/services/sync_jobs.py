@@ -0,0 +1,408 @@
+"""Background activity sync jobs.
+
+`POST /sync/activities` only enqueues a `SyncJob`; worker threads started with
+the app (`SYNC_WORKER_THREADS` per process) or a standalone worker claim jobs
+with `SELECT ... FOR UPDATE SKIP LOCKED` and page through Strava, committing
+progress after every page. Every write of a runner is conditional on the
+attempt it claimed, so once a stale job was claimed again the old runner can
+no longer touch it. Run a standalone worker from `backend/`:
+
+    python -m app.services.sync_jobs --threads 2
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import and_, or_, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.integrations.strava_rate_limit import StravaRateLimiter
+from app.models.strava_token import StravaToken
+from app.models.sync_job import SyncJob
+from app.services.activity_sync import ShardPlan, SyncParams, SyncProgress, sync_user_activities
+from app.services.strava_session import build_strava_client, persist_refreshed_token
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+# Predicate of `uq_sync_jobs_active_user`, spelled out so ON CONFLICT can infer that index.
+_ACTIVE_INDEX_WHERE = text("status IN ('queued', 'running')")
+
+MAX_ERROR_CHARS = 500
+
+
+class JobReclaimedError(RuntimeError):
+    """The job was claimed again by another worker; this runner must stop writing."""
+
+    def __init__(self, job_id: int, attempt: int):
+        super().__init__(f"Sync job {job_id} attempt {attempt} was taken over by another worker")
+        self.job_id = job_id
+        self.attempt = attempt
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_summary(job: SyncJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "params": job.params,
+        "pages": job.pages,
+        "fetched": job.fetched,
+        "inserted": job.inserted,
+        "updated": job.updated,
+        "skipped": job.skipped,
+        "count": job.inserted + job.updated,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def enqueue_sync_job(db: Session, *, user_id: int, params: SyncParams) -> tuple[SyncJob, bool]:
+    """Queue a sync for `user_id`; returns `(job, created)`.
+
+    While the user already has a queued or running job that job is returned
+    instead (`created` False), so repeated clicks and parallel requests never
+    page through Strava twice at the same time.
+    """
+    for _ in range(3):
+        job_id = db.execute(
+            insert(SyncJob)
+            .values(user_id=user_id, status=JOB_QUEUED, params=params.to_dict())
+            .on_conflict_do_nothing(index_elements=[SyncJob.user_id], index_where=_ACTIVE_INDEX_WHERE)
+            .returning(SyncJob.id)
+        ).scalar_one_or_none()
+        if job_id is not None:
+            db.commit()
+            return db.get(SyncJob, job_id), True
+        active = (
+            db.query(SyncJob)
+            .filter(SyncJob.user_id == user_id, SyncJob.status.in_(ACTIVE_STATUSES))
+            .one_or_none()
+        )
+        if active is not None:
+            db.commit()
+            return active, False
+        # The active job finished between the insert and the lookup; try again.
+        db.rollback()
+    raise RuntimeError(f"Could not enqueue a sync job for user {user_id}")
+
+
+def claim_next_job(session_factory: Callable[[], Session], *, stale_after_s: float) -> tuple[int, int] | None:
+    """Mark the oldest runnable job as running; returns `(job_id, attempt)`.
+
+    Running jobs whose heartbeat is older than `stale_after_s` belong to a
+    worker that died (or hung) and are claimed again under a new attempt.
+    """
+    now = _now()
+    with session_factory() as db, db.begin():
+        job = (
+            db.query(SyncJob)
+            .filter(
+                or_(
+                    SyncJob.status == JOB_QUEUED,
+                    and_(
+                        SyncJob.status == JOB_RUNNING,
+                        SyncJob.heartbeat_at < now - timedelta(seconds=stale_after_s),
+                    ),
+                )
+            )
+            .order_by(SyncJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return None
+        if job.status == JOB_RUNNING:
+            logger.warning("Reclaiming stale sync job %s (attempt %s)", job.id, job.attempts + 1)
+        job.status = JOB_RUNNING
+        job.attempts += 1
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        return job.id, job.attempts
+
+
+def _progress_values(progress: SyncProgress) -> dict:
+    return {
+        "pages": progress.pages,
+        "fetched": progress.fetched,
+        "inserted": progress.inserted,
+        "updated": progress.updated,
+        "skipped": progress.skipped,
+        "heartbeat_at": _now(),
+    }
+
+
+def _write_job(db: Session, job_id: int, attempt: int, **values) -> None:
+    """Update the job in `db`'s transaction, unless it is no longer this runner's attempt."""
+    result = db.execute(
+        update(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.attempts == attempt, SyncJob.status == JOB_RUNNING)
+        .values(**values)
+    )
+    if result.rowcount != 1:
+        raise JobReclaimedError(job_id, attempt)
+
+
+def _heartbeat_sleep(
+    session_factory: Callable[[], Session],
+    job_id: int,
+    attempt: int,
+    *,
+    interval_s: float,
+) -> Callable[[float], None]:
+    """`time.sleep` replacement that keeps the job's heartbeat fresh during long waits."""
+
+    def _sleep(wait_s: float) -> None:
+        deadline = time.monotonic() + wait_s
+        while (remaining := deadline - time.monotonic()) > 0:
+            with session_factory() as db:
+                _write_job(db, job_id, attempt, heartbeat_at=_now())
+                db.commit()
+            time.sleep(min(remaining, interval_s))
+
+    return _sleep
+
+
+def _patient_rate_limiter(
+    limiter: StravaRateLimiter | None,
+    sleep: Callable[[float], None],
+) -> StravaRateLimiter | None:
+    # HTTP routes give up on the quota after a bounded wait; a background job just waits,
+    # beating its heartbeat so the wait is not mistaken for a dead worker.
+    if limiter is None:
+        return None
+    return StravaRateLimiter(limiter.store, policy=limiter.policy, max_wait_s=None, sleep=sleep)
+
+
+def _shard_plan() -> ShardPlan | None:
+    if settings.SYNC_SHARD_CONCURRENCY <= 1:
+        return None
+    return ShardPlan(
+        windows=settings.SYNC_SHARD_WINDOWS,
+        concurrency=settings.SYNC_SHARD_CONCURRENCY,
+        queue_size=settings.SYNC_SHARD_QUEUE_SIZE,
+        history_start=settings.SYNC_HISTORY_START,
+    )
+
+
+def run_sync_job(
+    session_factory: Callable[[], Session],
+    job_id: int,
+    *,
+    attempt: int,
+    stale_after_s: float | None = None,
+) -> SyncJob:
+    """Execute attempt `attempt` of a claimed job, committing every page together with its progress.
+
+    If the job is claimed again meanwhile (see `claim_next_job`), the runner
+    stops at its next write and leaves the job to the new attempt.
+    """
+    if stale_after_s is None:
+        stale_after_s = settings.SYNC_JOB_STALE_AFTER_S
+    with session_factory() as db:
+        job = db.get(SyncJob, job_id)
+        user_id, params = job.user_id, SyncParams(**job.params)
+        db.commit()
+        try:
+            token = db.query(StravaToken).filter(StravaToken.user_id == user_id).one_or_none()
+            if token is None:
+                raise LookupError("No Strava token found. Login with Strava first.")
+            client = build_strava_client(token)
+            client.rate_limiter = _patient_rate_limiter(
+                client.rate_limiter,
+                _heartbeat_sleep(session_factory, job_id, attempt, interval_s=stale_after_s / 4),
+            )
+
+            def _on_page(progress: SyncProgress) -> None:
+                _write_job(db, job_id, attempt, **_progress_values(progress))
+                db.commit()
+
+            progress = sync_user_activities(
+                db,
+                client,
+                user_id=user_id,
+                params=params,
+                cursor_overlap_s=settings.SYNC_CURSOR_OVERLAP_S,
+                on_page=_on_page,
+                shard=_shard_plan(),
+            )
+            persist_refreshed_token(db, token, client, commit=False)
+            finished_at = _now()
+            _write_job(
+                db,
+                job_id,
+                attempt,
+                **{**_progress_values(progress), "heartbeat_at": finished_at},
+                status=JOB_SUCCEEDED,
+                finished_at=finished_at,
+            )
+            db.commit()
+        except JobReclaimedError:
+            logger.warning("Sync job %s attempt %s was reclaimed; dropping its writes", job_id, attempt)
+            db.rollback()
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Sync job %s failed", job_id)
+            db.rollback()
+            finished_at = _now()
+            try:
+                _write_job(
+                    db,
+                    job_id,
+                    attempt,
+                    status=JOB_FAILED,
+                    error=f"{exc.__class__.__name__}: {exc}"[:MAX_ERROR_CHARS],
+                    finished_at=finished_at,
+                    heartbeat_at=finished_at,
+                )
+                db.commit()
+            except JobReclaimedError:
+                logger.warning("Sync job %s attempt %s was reclaimed before its failure was recorded", job_id, attempt)
+                db.rollback()
+        db.expire_all()
+        return db.get(SyncJob, job_id)
+
+
+def run_next_sync_job(session_factory: Callable[[], Session], *, stale_after_s: float | None = None) -> SyncJob | None:
+    """Claim and run one job; None when the queue is empty."""
+    if stale_after_s is None:
+        stale_after_s = settings.SYNC_JOB_STALE_AFTER_S
+    claimed = claim_next_job(session_factory, stale_after_s=stale_after_s)
+    if claimed is None:
+        return None
+    job_id, attempt = claimed
+    return run_sync_job(session_factory, job_id, attempt=attempt, stale_after_s=stale_after_s)
+
+
+class SyncWorker:
+    """Threads that run queued sync jobs until `stop` is called.
+
+    Idle threads poll every `poll_interval_s`; `wake` starts them right away,
+    e.g. after this process enqueued a job.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        threads: int = 1,
+        poll_interval_s: float = 2.0,
+        stale_after_s: float = 1_200.0,
+    ):
+        if threads <= 0:
+            raise ValueError("threads must be positive")
+        self.session_factory = session_factory
+        self.threads = threads
+        self.poll_interval_s = poll_interval_s
+        self.stale_after_s = stale_after_s
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = run_next_sync_job(self.session_factory, stale_after_s=self.stale_after_s)
+            except Exception:  # noqa: BLE001
+                logger.exception("Sync worker could not claim a job")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval_s)
+                self._wake.clear()
+
+    def start(self) -> SyncWorker:
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._loop, name=f"sync-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout_s: float | None = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout_s)
+        self._threads.clear()
+
+
+# Worker of this process, if the app started one (see `app.main`).
+_worker: SyncWorker | None = None
+
+
+def start_sync_worker(session_factory: Callable[[], Session]) -> SyncWorker | None:
+    global _worker
+    if settings.SYNC_WORKER_THREADS <= 0:
+        return None
+    _worker = SyncWorker(
+        session_factory,
+        threads=settings.SYNC_WORKER_THREADS,
+        poll_interval_s=settings.SYNC_WORKER_POLL_INTERVAL_S,
+        stale_after_s=settings.SYNC_JOB_STALE_AFTER_S,
+    ).start()
+    return _worker
+
+
+def stop_sync_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop(timeout_s=5.0)
+        _worker = None
+
+
+def wake_sync_worker() -> None:
+    if _worker is not None:
+        _worker.wake()
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run queued activity sync jobs.")
+    parser.add_argument("--threads", type=int, default=1, help="Jobs to run concurrently.")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=settings.SYNC_WORKER_POLL_INTERVAL_S,
+        help="Seconds between queue polls while idle.",
+    )
+    return parser
+
+
+def main() -> int:
+    from app.core.db import SessionLocal
+
+    args = _build_arg_parser().parse_args()
+    worker = SyncWorker(
+        SessionLocal,
+        threads=args.threads,
+        poll_interval_s=args.poll_interval,
+        stale_after_s=settings.SYNC_JOB_STALE_AFTER_S,
+    ).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence
+
+import numpy as np
+from geoalchemy2.functions import ST_X, ST_Y
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session
+
+from app.models.activity_point import ActivityPoint
+from app.models.activity_track import ActivityTrack
+
+# float64 lat + float64 lon + int32 time + float64 ele
+TRACK_BYTES_PER_POINT = 28
+
+# Storage modes: one `activity_points` row per sample, or one packed `activity_tracks` row.
+TRACK_STORAGE_POINTS = "points"
+TRACK_STORAGE_PACKED = "packed"
+TRACK_STORAGE_MODES = (TRACK_STORAGE_POINTS, TRACK_STORAGE_PACKED)
+
+# Byte layout of the packed columns; fixed little-endian so rows are portable.
+_PACKED_FLOAT = np.dtype("<f8")
+_PACKED_TIME = np.dtype("<i4")
+
+
+class Track:
+    """One ordered GPS track held as contiguous column arrays.
+
+    `lat`/`lon` are float64 degrees, `time` is int32 seconds since activity
+    start and `ele` is float64 meters with NaN where elevation is missing.
+    Index `i` is point `seq == i`, matching how ingest numbers stored points.
+    Arrays are used as given when they already have the right dtype, so
+    passing a `Track` between layers never copies point data.
+    """
+
+    __slots__ = ("lat", "lon", "time", "ele")
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, time: np.ndarray, ele: np.ndarray | None = None):
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        self.time = np.ascontiguousarray(time, dtype=np.int32)
+        n = self.lat.shape[0]
+        if ele is None:
+            self.ele = np.full(n, np.nan)
+        else:
+            self.ele = np.ascontiguousarray(ele, dtype=np.float64)
+        if not (self.lon.shape[0] == self.time.shape[0] == self.ele.shape[0] == n):
+            raise ValueError("lat, lon, time and ele must have the same length")
+
+    def __len__(self) -> int:
+        return int(self.lat.shape[0])
+
+    def __repr__(self) -> str:
+        return f"Track(points={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.lat.nbytes + self.lon.nbytes + self.time.nbytes + self.ele.nbytes
+
+    @classmethod
+    def empty(cls) -> Track:
+        return cls(np.empty(0), np.empty(0), np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def from_streams(
+        cls,
+        latlng: Sequence[Sequence[float]],
+        times: Sequence[int],
+        altitude: Sequence[float | None] | None = None,
+    ) -> Track:
+        """Build from Strava stream payload lists (`latlng`, `time`, `altitude`).
+
+        Points beyond the shorter of `latlng` and `times` are dropped; a missing
+        or short `altitude` stream leaves the remaining elevations as NaN.
+        """
+        n = min(len(latlng), len(times))
+        coords = np.asarray(latlng[:n], dtype=np.float64).reshape(-1, 2)
+        ele = np.full(n, np.nan)
+        if altitude:
+            known = np.asarray(altitude[:n], dtype=np.float64)
+            ele[: known.shape[0]] = known
+        return cls(coords[:, 0], coords[:, 1], np.asarray(times[:n], dtype=np.int32), ele)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[float | None]]) -> Track:
+        """Build from `(lat, lon, time_s, ele_m)` rows; `ele_m` may be None."""
+        if not rows:
+            return cls.empty()
+        # dtype=float64 maps None to NaN in one pass.
+        data = np.array(rows, dtype=np.float64)
+        return cls(data[:, 0], data[:, 1], data[:, 2].astype(np.int32), data[:, 3])
+
+    @classmethod
+    def from_packed(cls, row: ActivityTrack) -> Track:
+        """View an `activity_tracks` row as a Track; the column bytes are not copied."""
+        return cls(
+            np.frombuffer(row.lat, dtype=_PACKED_FLOAT),
+            np.frombuffer(row.lon, dtype=_PACKED_FLOAT),
+            np.frombuffer(row.time_s, dtype=_PACKED_TIME),
+            np.frombuffer(row.ele_m, dtype=_PACKED_FLOAT),
+        )
+
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of the packed column bytes; equal tracks hash equal."""
+        digest = hashlib.sha256()
+        for column, dtype in (
+            (self.lat, _PACKED_FLOAT),
+            (self.lon, _PACKED_FLOAT),
+            (self.time, _PACKED_TIME),
+            (self.ele, _PACKED_FLOAT),
+        ):
+            digest.update(column.astype(dtype, copy=False).tobytes())
+        return digest.hexdigest()
+
+    def packed_columns(self) -> dict[str, bytes | int]:
+        """Column values for an `activity_tracks` row."""
+        return {
+            "point_count": len(self),
+            "lat": self.lat.astype(_PACKED_FLOAT, copy=False).tobytes(),
+            "lon": self.lon.astype(_PACKED_FLOAT, copy=False).tobytes(),
+            "time_s": self.time.astype(_PACKED_TIME, copy=False).tobytes(),
+            "ele_m": self.ele.astype(_PACKED_FLOAT, copy=False).tobytes(),
+        }
+
+
+def load_packed_tracks(db: Session, *, activity_ids: list[int]) -> dict[int, Track]:
+    """Packed tracks for the given activities; activities without one are absent."""
+    if not activity_ids:
+        return {}
+    rows = db.query(ActivityTrack).filter(ActivityTrack.activity_id.in_(activity_ids)).all()
+    return {row.activity_id: Track.from_packed(row) for row in rows}
+
+
+def load_point_rows_track(db: Session, *, activity_id: int) -> Track:
+    """Load one activity from `activity_points`, ordered by seq."""
+    rows = (
+        db.query(
+            ST_Y(ActivityPoint.geom),
+            ST_X(ActivityPoint.geom),
+            ActivityPoint.time_s,
+            ActivityPoint.ele_m,
+        )
+        .filter(ActivityPoint.activity_id == activity_id)
+        .order_by(ActivityPoint.seq.asc())
+        .all()
+    )
+    return Track.from_rows(rows)
+
+
+def load_track(db: Session, *, activity_id: int) -> Track:
+    """Load the stored track of one activity from whichever storage holds it.
+
+    The packed row wins when present; otherwise per-point rows are read, so
+    both storage modes (and a partially migrated database) are served.
+    """
+    row = db.query(ActivityTrack).filter(ActivityTrack.activity_id == activity_id).one_or_none()
+    if row is not None:
+        return Track.from_packed(row)
+    return load_point_rows_track(db, activity_id=activity_id)
+
+
+def stored_track_exists(activity_id_column):
+    """SQL condition that is true when an activity has points or a packed track."""
+    return or_(
+        exists().where(ActivityPoint.activity_id == activity_id_column),
+        exists().where(ActivityTrack.activity_id == activity_id_column),
+    )
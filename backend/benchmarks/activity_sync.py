@@ -0,0 +1,212 @@
+"""Wall time of a full-history activity import against the fake Strava API.
+
+Run from `backend/`:
+
+    python -m benchmarks.activity_sync
+    python -m benchmarks.activity_sync --activities 5000 --latency-ms 150 --concurrency 1,4,8
+
+Pages come from a `FakeStravaServer` over real HTTP with a fixed latency per
+request; writing a page is simulated with a `--write-ms` sleep, so the numbers
+isolate the paging strategy from the database. The sequential case is the
+page-after-page loop; the others split the history into date windows
+(`iter_window_pages`). Every case must return each activity exactly once.
+Results are written as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.integrations.strava import StravaClient
+from app.integrations.strava_http import build_http_client
+from app.services.activity_sync import (
+    ShardPlan,
+    SyncParams,
+    SyncProgress,
+    iter_activity_pages,
+    iter_window_pages,
+)
+from benchmarks.fake_strava import HISTORY_END, FakeStrava, FakeStravaConfig, FakeStravaServer, synthetic_activities
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_PATH = ROOT_DIR / "artifacts/benchmarks/activity_sync.json"
+DEFAULT_ACTIVITIES = 3_000
+DEFAULT_PER_PAGE = 200
+DEFAULT_LATENCY_MS = 100.0
+DEFAULT_WRITE_MS = 20.0
+DEFAULT_CONCURRENCY = (1, 2, 4, 8)
+DEFAULT_WINDOWS = 24
+DEFAULT_HISTORY_DAYS = 3_650
+
+
+def _drain(pages, *, write_s: float) -> list[int]:
+    ids = []
+    for items in pages:
+        ids.extend(item["id"] for item in items)
+        time.sleep(write_s)
+    return ids
+
+
+def _run_case(
+    name: str,
+    fake: FakeStrava,
+    client: StravaClient,
+    params: SyncParams,
+    *,
+    plan: ShardPlan | None,
+    write_s: float,
+    expected_ids: set[int],
+) -> dict:
+    before = fake.stats.snapshot()["requests"].get("activities", 0)
+    progress = SyncProgress()
+    if plan is None:
+        pages = iter_activity_pages(client, params, progress)
+    else:
+        pages = iter_window_pages(client, params, progress, plan)
+    started = time.perf_counter()
+    ids = _drain(pages, write_s=write_s)
+    elapsed_s = time.perf_counter() - started
+    if len(ids) != len(set(ids)) or set(ids) != expected_ids:
+        raise AssertionError(f"{name}: fetched {len(set(ids))} of {len(expected_ids)} activities, {len(ids)} rows")
+    return {
+        "name": name,
+        "windows": plan.windows if plan else None,
+        "concurrency": plan.concurrency if plan else 1,
+        "requests": fake.stats.snapshot()["requests"]["activities"] - before,
+        "pages": progress.pages,
+        "activities": len(ids),
+        "wall_s": round(elapsed_s, 4),
+        "activities_per_s": round(len(ids) / elapsed_s, 1) if elapsed_s > 0 else None,
+    }
+
+
+def run_benchmarks(
+    *,
+    activities: int = DEFAULT_ACTIVITIES,
+    per_page: int = DEFAULT_PER_PAGE,
+    latency_ms: float = DEFAULT_LATENCY_MS,
+    write_ms: float = DEFAULT_WRITE_MS,
+    concurrency: tuple[int, ...] = DEFAULT_CONCURRENCY,
+    windows: int = DEFAULT_WINDOWS,
+    history_days: int = DEFAULT_HISTORY_DAYS,
+    output_path: str | Path | None = DEFAULT_OUTPUT_PATH,
+) -> dict:
+    history = synthetic_activities(activities, points_per_activity=1, history_days=history_days)
+    config = FakeStravaConfig(latency_s=latency_ms / 1000.0, enforce_rate_limit=False)
+    fake = FakeStrava(history, config=config, points_per_activity=1)
+    expected_ids = {a["id"] for a in history}
+    params = SyncParams(per_page=per_page)
+    # The oldest synthetic activity starts `history_days` before HISTORY_END; search a year further back.
+    history_start = int(HISTORY_END.timestamp()) - (history_days + 365) * 86_400
+
+    results = []
+    with FakeStravaServer(fake) as server:
+        http_client = build_http_client(max_connections=max(concurrency) + 1)
+        client = StravaClient("token", base_url=server.api_base_url, http_client=http_client)
+        try:
+            results.append(
+                _run_case(
+                    "sequential",
+                    fake,
+                    client,
+                    params,
+                    plan=None,
+                    write_s=write_ms / 1000.0,
+                    expected_ids=expected_ids,
+                )
+            )
+            for threads in concurrency:
+                plan = ShardPlan(windows=windows, concurrency=threads, history_start=history_start)
+                results.append(
+                    _run_case(
+                        f"windows_x{threads}",
+                        fake,
+                        client,
+                        params,
+                        plan=plan,
+                        write_s=write_ms / 1000.0,
+                        expected_ids=expected_ids,
+                    )
+                )
+        finally:
+            http_client.close()
+
+    baseline_s = results[0]["wall_s"]
+    for row in results:
+        row["speedup"] = round(baseline_s / row["wall_s"], 2) if row["wall_s"] > 0 else None
+
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "activities": activities,
+        "per_page": per_page,
+        "latency_ms": latency_ms,
+        "write_ms": write_ms,
+        "history_days": history_days,
+        "results": results,
+    }
+    if output_path is not None:
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        summary["output_path"] = str(path)
+    return summary
+
+
+def _parse_int_list(value: str) -> tuple[int, ...]:
+    return tuple(int(token) for token in value.split(",") if token.strip())
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Time sequential and date-window activity imports.")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITIES, help="Synthetic history size.")
+    parser.add_argument("--per-page", type=int, default=DEFAULT_PER_PAGE, help="Activities per request (max 200).")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="Fake API latency per request.")
+    parser.add_argument("--write-ms", type=float, default=DEFAULT_WRITE_MS, help="Simulated write time per page.")
+    parser.add_argument(
+        "--concurrency",
+        type=_parse_int_list,
+        default=DEFAULT_CONCURRENCY,
+        help="Comma-separated fetch thread counts for the windowed cases (default: 1,2,4,8).",
+    )
+    parser.add_argument("--windows", type=int, default=DEFAULT_WINDOWS, help="Date windows per import.")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS, help="Days the history spans.")
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_OUTPUT_PATH),
+        help="JSON output path (default: artifacts/benchmarks/activity_sync.json).",
+    )
+    return parser
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    summary = run_benchmarks(
+        activities=args.activities,
+        per_page=args.per_page,
+        latency_ms=args.latency_ms,
+        write_ms=args.write_ms,
+        concurrency=args.concurrency,
+        windows=args.windows,
+        history_days=args.history_days,
+        output_path=args.output,
+    )
+    for row in summary["results"]:
+        print(
+            f"{row['name']:<14} requests={row['requests']:>4} wall={row['wall_s']:>8.3f}s "
+            f"activities/s={row['activities_per_s']:>9} speedup={row['speedup']}"
+        )
+    print(f"wrote {summary['output_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
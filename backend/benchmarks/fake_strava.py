@@ -0,0 +1,552 @@
+"""Local stand-in for the Strava API, for tests and load tests.
+
+Serves `/api/v3/athlete/activities`, `/api/v3/activities/{id}/streams` and
+`/oauth/token` from synthetic (seeded) or recorded data, with configurable
+latency, payload size, rate-limit headers and injected 429/5xx responses.
+
+In-process, hand `FakeStrava.transport()` (or `async_transport()`) to an
+`httpx` client, or start a `FakeStravaServer` on a free port. Standalone,
+run from `backend/`:
+
+    python -m benchmarks.fake_strava --port 8089 --activities 5000 --latency-ms 80
+
+and point the app at it with `STRAVA_API_BASE_URL=http://127.0.0.1:8089/api/v3`
+and `STRAVA_TOKEN_URL=http://127.0.0.1:8089/oauth/token`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import numpy as np
+
+API_PREFIX = "/api/v3"
+TOKEN_PATH = "/oauth/token"
+FIRST_ACTIVITY_ID = 10_000_000_000
+# Synthetic histories end here so runs on different days see the same data.
+HISTORY_END = datetime(2026, 10, 1, tzinfo=timezone.utc)
+SPORT_TYPES = ("Run", "Ride", "Walk", "Hike")
+# Points Strava keeps per stream at each reduced resolution.
+RESOLUTION_POINTS = {"low": 100, "medium": 1000, "high": 10000}
+SERVER_ERROR_CODES = (500, 502, 503)
+
+_STREAMS_PATH = re.compile(r"^/activities/(\d+)/streams$")
+
+
+@dataclass(frozen=True)
+class FakeStravaConfig:
+    """Behaviour knobs; every default mimics a well-behaved, instant Strava."""
+
+    latency_s: float = 0.0
+    latency_jitter_s: float = 0.0
+    # Per-application quota as (15-minute, daily); requests beyond it get 429.
+    rate_limit: tuple[int, int] = (200, 2000)
+    enforce_rate_limit: bool = True
+    # Probability of an injected 429 / 5xx on any API request.
+    rate_limited_rate: float = 0.0
+    server_error_rate: float = 0.0
+    token_ttl_s: int = 6 * 3600
+    # Reject bearer tokens this server did not issue (or that expired); otherwise any token works.
+    strict_tokens: bool = False
+    seed: int = 0
+
+
+@dataclass
+class FakeStravaStats:
+    requests: Counter = field(default_factory=Counter)
+    statuses: Counter = field(default_factory=Counter)
+    token_refreshes: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, route: str, status: int) -> None:
+        with self._lock:
+            self.requests[route] += 1
+            self.statuses[status] += 1
+
+    def record_refresh(self) -> None:
+        with self._lock:
+            self.token_refreshes += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+                "token_refreshes": self.token_refreshes,
+            }
+
+
+def synthetic_activities(
+    n: int,
+    *,
+    points_per_activity: int = 3_600,
+    history_days: int = 3_650,
+    seed: int = 0,
+) -> list[dict]:
+    """`n` activity summaries spread evenly over `history_days`, oldest first."""
+    rng = random.Random(seed)
+    spacing = timedelta(days=history_days) / max(n, 1)
+    start = HISTORY_END - timedelta(days=history_days)
+    activities = []
+    for i in range(n):
+        sport = rng.choice(SPORT_TYPES)
+        moving_time = points_per_activity
+        activities.append(
+            {
+                "id": FIRST_ACTIVITY_ID + i,
+                "name": f"Synthetic {sport} {i}",
+                "sport_type": sport,
+                "type": sport,
+                "start_date": (start + spacing * i).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "distance": round(moving_time * rng.uniform(2.0, 8.0), 1),
+                "moving_time": moving_time,
+                "elapsed_time": moving_time + rng.randint(0, 600),
+                "total_elevation_gain": round(rng.uniform(0, 800), 1),
+                # Not part of Strava's payload: sample count of the generated streams.
+                "_points": points_per_activity,
+            }
+        )
+    return activities
+
+
+def _epoch(start_date: str) -> int:
+    return int(datetime.fromisoformat(start_date.replace("Z", "+00:00")).timestamp())
+
+
+def _synthetic_streams(activity_id: int, points: int, n: int) -> dict[str, list]:
+    # Seeded by activity id so every request for the same activity gets the same track.
+    rng = np.random.default_rng(activity_id)
+    step = rng.normal(0.0, 3e-5, size=(points, 2))
+    coords = np.cumsum(step, axis=0) + (50.06, 19.94)
+    elapsed = np.arange(points, dtype=np.int64)
+    altitude = 220.0 + np.cumsum(rng.normal(0.0, 0.2, size=points))
+    distance = np.cumsum(np.hypot(step[:, 0], step[:, 1]) * 111_000.0)
+    if n < points:
+        idx = np.linspace(0, points - 1, n).round().astype(np.int64)
+        coords, elapsed, altitude, distance = coords[idx], elapsed[idx], altitude[idx], distance[idx]
+    return {
+        "latlng": np.round(coords, 7).tolist(),
+        "time": elapsed.tolist(),
+        "altitude": np.round(altitude, 1).tolist(),
+        "distance": np.round(distance, 1).tolist(),
+    }
+
+
+class FakeStrava:
+    """The fake API itself: routes requests to responses without any networking.
+
+    `activities` are Strava summary dicts (see `synthetic_activities`);
+    `streams` optionally maps activity ids to recorded key-by-type stream
+    payloads, and any activity without one gets a generated track of
+    `_points` samples (default `points_per_activity`).
+    """
+
+    def __init__(
+        self,
+        activities: list[dict] | None = None,
+        *,
+        streams: dict[int, dict] | None = None,
+        config: FakeStravaConfig | None = None,
+        points_per_activity: int = 3_600,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.config = config or FakeStravaConfig()
+        activities = activities if activities is not None else synthetic_activities(100, seed=self.config.seed)
+        self.activities = sorted(activities, key=lambda a: (_epoch(a["start_date"]), a["id"]))
+        self._start_ts = [_epoch(a["start_date"]) for a in self.activities]
+        self._by_id = {a["id"]: a for a in self.activities}
+        self.streams = streams or {}
+        self.points_per_activity = points_per_activity
+        self.stats = FakeStravaStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._usage: dict[tuple[str, int], int] = {}
+        self._tokens: dict[str, int] = {}
+        self._refresh_tokens: set[str] = set()
+        self._token_serial = 0
+        self._encoded_streams = lru_cache(maxsize=256)(self._encode_streams)
+
+    @classmethod
+    def from_recording(cls, path: str | Path, **kwargs) -> FakeStrava:
+        """Load `{"activities": [...], "streams": {"<id>": {...}}}` captured from the real API."""
+        recording = json.loads(Path(path).read_text(encoding="utf-8"))
+        streams = {int(activity_id): payload for activity_id, payload in recording.get("streams", {}).items()}
+        return cls(recording["activities"], streams=streams, **kwargs)
+
+    def issue_token(self) -> dict:
+        """A new token pair, as `/oauth/token` would return it."""
+        with self._lock:
+            self._token_serial += 1
+            serial = self._token_serial
+            expires_at = int(self._clock()) + self.config.token_ttl_s
+            body = {
+                "token_type": "Bearer",
+                "access_token": f"fake-access-{serial}",
+                "refresh_token": f"fake-refresh-{serial}",
+                "expires_at": expires_at,
+                "expires_in": self.config.token_ttl_s,
+            }
+            self._tokens[body["access_token"]] = expires_at
+            self._refresh_tokens.add(body["refresh_token"])
+        return body
+
+    # Request handling -------------------------------------------------------
+
+    def _delay_s(self) -> float:
+        if not self.config.latency_jitter_s:
+            return self.config.latency_s
+        with self._lock:
+            return self.config.latency_s + self._rng.uniform(0.0, self.config.latency_jitter_s)
+
+    def respond(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, str],
+        headers: dict[str, str],
+        body: dict[str, str],
+    ) -> tuple[int, dict[str, str], bytes]:
+        """`(status, headers, body)` for one request; latency is applied by the caller."""
+        if path == TOKEN_PATH:
+            status, payload = self._token(method, body)
+            return self._finish("token", status, {}, json.dumps(payload).encode())
+
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX) :]
+        if path == "/athlete/activities":
+            route = "activities"
+        elif _STREAMS_PATH.match(path):
+            route = "streams"
+        else:
+            return self._finish("unknown", 404, {}, json.dumps({"message": "Record Not Found"}).encode())
+
+        if not self._authorized(headers.get("authorization", "")):
+            body = {"message": "Authorization Error", "errors": [{"code": "invalid", "field": "access_token"}]}
+            return self._finish(route, 401, {}, json.dumps(body).encode())
+
+        over_quota, limit_headers = self._count_request()
+        if over_quota:
+            return self._finish(route, 429, limit_headers, json.dumps({"message": "Rate Limit Exceeded"}).encode())
+        injected = self._injected_status()
+        if injected is not None:
+            message = "Rate Limit Exceeded" if injected == 429 else "Internal Server Error"
+            return self._finish(route, injected, limit_headers, json.dumps({"message": message}).encode())
+
+        if route == "activities":
+            status, payload = self._list_activities(query)
+            return self._finish(route, status, limit_headers, json.dumps(payload).encode())
+        activity_id = int(_STREAMS_PATH.match(path).group(1))
+        if activity_id not in self._by_id:
+            return self._finish(route, 404, limit_headers, json.dumps({"message": "Record Not Found"}).encode())
+        encoded = self._encoded_streams(activity_id, query.get("keys", "latlng,time,altitude"), query.get("resolution"))
+        return self._finish(route, 200, limit_headers, encoded)
+
+    def _finish(
+        self,
+        route: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> tuple[int, dict[str, str], bytes]:
+        self.stats.record(route, status)
+        return status, {"Content-Type": "application/json; charset=utf-8", **headers}, body
+
+    def _token(self, method: str, body: dict[str, str]) -> tuple[int, dict]:
+        if method != "POST":
+            return 405, {"message": "Method Not Allowed"}
+        if body.get("grant_type") != "refresh_token" or not body.get("refresh_token"):
+            return 400, {"message": "Bad Request", "errors": [{"field": "grant_type", "code": "invalid"}]}
+        refresh_token = body["refresh_token"]
+        if self.config.strict_tokens:
+            with self._lock:
+                if refresh_token not in self._refresh_tokens:
+                    return 400, {"message": "Bad Request", "errors": [{"field": "refresh_token", "code": "invalid"}]}
+                # Strava rotates the refresh token; the old one stops working.
+                self._refresh_tokens.discard(refresh_token)
+        self.stats.record_refresh()
+        return 200, self.issue_token()
+
+    def _authorized(self, header: str) -> bool:
+        if not header.startswith("Bearer "):
+            return False
+        if not self.config.strict_tokens:
+            return True
+        with self._lock:
+            expires_at = self._tokens.get(header[len("Bearer ") :])
+        return expires_at is not None and expires_at > self._clock()
+
+    def _count_request(self) -> tuple[bool, dict[str, str]]:
+        now = int(self._clock())
+        windows = (("15m", now // 900), ("day", now // 86_400))
+        with self._lock:
+            over_quota = False
+            usage = []
+            for (name, start), limit in zip(windows, self.config.rate_limit):
+                count = self._usage.get((name, start), 0) + 1
+                self._usage[(name, start)] = count
+                usage.append(count)
+                over_quota = over_quota or count > limit
+            # Keep only the current windows.
+            self._usage = {key: value for key, value in self._usage.items() if key in windows}
+        headers = {
+            "X-RateLimit-Limit": ",".join(str(limit) for limit in self.config.rate_limit),
+            "X-RateLimit-Usage": ",".join(str(count) for count in usage),
+        }
+        return over_quota and self.config.enforce_rate_limit, headers
+
+    def _injected_status(self) -> int | None:
+        if not (self.config.rate_limited_rate or self.config.server_error_rate):
+            return None
+        with self._lock:
+            roll = self._rng.random()
+            code = self._rng.choice(SERVER_ERROR_CODES)
+        if roll < self.config.rate_limited_rate:
+            return 429
+        if roll < self.config.rate_limited_rate + self.config.server_error_rate:
+            return code
+        return None
+
+    def _list_activities(self, query: dict[str, str]) -> tuple[int, list | dict]:
+        try:
+            page = int(query.get("page", 1))
+            per_page = int(query.get("per_page", 30))
+            after = int(query["after"]) if "after" in query else None
+            before = int(query["before"]) if "before" in query else None
+        except ValueError:
+            return 400, {"message": "Bad Request"}
+        if page < 1 or per_page < 1:
+            return 400, {"message": "Bad Request"}
+        per_page = min(per_page, 200)
+
+        selected = [
+            activity
+            for activity, start_ts in zip(self.activities, self._start_ts)
+            if (after is None or start_ts > after) and (before is None or start_ts < before)
+        ]
+        # Like Strava: oldest first when paging forward from `after`, newest first otherwise.
+        if after is None:
+            selected.reverse()
+        offset = (page - 1) * per_page
+        return 200, [
+            {key: value for key, value in activity.items() if not key.startswith("_")}
+            for activity in selected[offset : offset + per_page]
+        ]
+
+    def _encode_streams(self, activity_id: int, keys: str, resolution: str | None) -> bytes:
+        wanted = [key for key in keys.split(",") if key]
+        recorded = self.streams.get(activity_id)
+        if recorded is not None:
+            data = {key: recorded[key]["data"] for key in wanted if key in recorded}
+            original_size = max((len(series) for series in data.values()), default=0)
+        else:
+            original_size = int(self._by_id[activity_id].get("_points", self.points_per_activity))
+            n = min(original_size, RESOLUTION_POINTS.get(resolution, original_size))
+            generated = _synthetic_streams(activity_id, original_size, n)
+            data = {key: generated[key] for key in wanted if key in generated}
+        payload = {
+            key: {
+                "data": series,
+                "series_type": "distance",
+                "original_size": original_size,
+                "resolution": resolution or "high",
+            }
+            for key, series in data.items()
+        }
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    # Transports -------------------------------------------------------------
+
+    def _respond_to(self, request: httpx.Request) -> httpx.Response:
+        body = {key: values[-1] for key, values in parse_qs(request.content.decode()).items()}
+        query = {key: value for key, value in request.url.params.items()}
+        headers = {key.lower(): value for key, value in request.headers.items()}
+        status, response_headers, content = self.respond(request.method, request.url.path, query, headers, body)
+        return httpx.Response(status, headers=response_headers, content=content, request=request)
+
+    def transport(self) -> httpx.MockTransport:
+        """In-process transport for `httpx.Client`; latency blocks the calling thread."""
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            delay = self._delay_s()
+            if delay > 0:
+                self._sleep(delay)
+            return self._respond_to(request)
+
+        return httpx.MockTransport(handler)
+
+    def async_transport(self) -> httpx.MockTransport:
+        """In-process transport for `httpx.AsyncClient`; latency awaits without blocking the loop."""
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await request.aread()
+            delay = self._delay_s()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._respond_to(request)
+
+        return httpx.MockTransport(handler)
+
+
+class _FakeStravaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake: FakeStrava
+
+    def _handle(self) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length).decode() if length else ""
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        body = {key: values[-1] for key, values in parse_qs(raw_body).items()}
+        headers = {key.lower(): value for key, value in self.headers.items()}
+
+        delay = self.fake._delay_s()
+        if delay > 0:
+            self.fake._sleep(delay)
+        status, response_headers, content = self.fake.respond(self.command, url.path, query, headers, body)
+
+        self.send_response(status)
+        for name, value in response_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _handle  # noqa: N815
+    do_POST = _handle  # noqa: N815
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class FakeStravaServer:
+    """`FakeStrava` behind a threaded keep-alive HTTP server.
+
+    Use as a context manager; `port=0` picks a free port. Every connection
+    gets its own thread, so latency overlaps across concurrent clients the
+    way it does against the real API.
+    """
+
+    def __init__(self, fake: FakeStrava, *, host: str = "127.0.0.1", port: int = 0):
+        handler = type("FakeStravaHandler", (_FakeStravaHandler,), {"fake": fake})
+        self.fake = fake
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base_url(self) -> str:
+        return f"{self.base_url}{API_PREFIX}"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}{TOKEN_PATH}"
+
+    def start(self) -> FakeStravaServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def __enter__(self) -> FakeStravaServer:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def _parse_rate_limit(value: str) -> tuple[int, int]:
+    short, long = (int(token) for token in value.split(","))
+    return short, long
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve a fake Strava API for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--recording", help="JSON file with recorded activities and streams.")
+    parser.add_argument("--activities", type=int, default=1_000, help="Synthetic activity count.")
+    parser.add_argument("--points", type=int, default=3_600, help="Stream samples per synthetic activity.")
+    parser.add_argument("--history-days", type=int, default=3_650, help="Days the synthetic history spans.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed latency per request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random latency per request.")
+    parser.add_argument(
+        "--rate-limit",
+        type=_parse_rate_limit,
+        default=(200, 2000),
+        help="15-minute and daily quota, comma-separated (default: 200,2000).",
+    )
+    parser.add_argument("--no-enforce-rate-limit", action="store_true", help="Report usage but never return 429.")
+    parser.add_argument("--rate-limited-rate", type=float, default=0.0, help="Probability of an injected 429.")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="Probability of an injected 5xx.")
+    parser.add_argument("--strict-tokens", action="store_true", help="Only accept tokens issued by this server.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    config = FakeStravaConfig(
+        latency_s=args.latency_ms / 1000.0,
+        latency_jitter_s=args.jitter_ms / 1000.0,
+        rate_limit=args.rate_limit,
+        enforce_rate_limit=not args.no_enforce_rate_limit,
+        rate_limited_rate=args.rate_limited_rate,
+        server_error_rate=args.server_error_rate,
+        strict_tokens=args.strict_tokens,
+        seed=args.seed,
+    )
+    if args.recording:
+        fake = FakeStrava.from_recording(args.recording, config=config, points_per_activity=args.points)
+    else:
+        activities = synthetic_activities(
+            args.activities,
+            points_per_activity=args.points,
+            history_days=args.history_days,
+            seed=args.seed,
+        )
+        fake = FakeStrava(activities, config=config, points_per_activity=args.points)
+
+    server = FakeStravaServer(fake, host=args.host, port=args.port)
+    print(f"fake Strava API at {server.api_base_url} (token URL {server.token_url})")
+    if args.strict_tokens:
+        print(f"initial token: {json.dumps(fake.issue_token())}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"stats: {json.dumps(fake.stats.snapshot(), sort_keys=True)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,232 @@
+"""Microbenchmarks for the quality, ingest and serialization hot paths.
+
+Run from `backend/`:
+
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --sizes 1000,10000 --repeats 5
+
+Tracks are synthetic and seeded, so numbers from different commits are
+comparable on the same machine. Results are written as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+
+from app.ml.bootstrap_labels import evaluate_weak_label
+from app.routes.streams import _point_features
+from app.services.ml_features import FEATURE_VERSION_V1, _build_feature_payload
+from app.services.point_loader import build_activity_points, encode_points_copy_binary
+from app.services.quality import compute_quality, compute_track_quality
+from app.services.track import Track
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_PATH = ROOT_DIR / "artifacts/benchmarks/hot_paths.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_REPEATS = 5
+DEFAULT_SEED = 0
+
+# Per-call paths whose cost does not depend on track length run this many calls per sample.
+SCALAR_CALLS_PER_SAMPLE = 1_000
+
+
+def synthetic_track(n: int, *, seed: int = DEFAULT_SEED) -> Track:
+    """Random-walk track at 1 Hz with stationary samples, GPS jumps and elevation."""
+    rng = np.random.default_rng(seed)
+    step = rng.normal(0.0, 3e-5, size=(n, 2))
+    roll = rng.random(n)
+    step[roll < 0.10] = 0.0
+    jumps = roll > 0.99
+    step[jumps] = rng.uniform(-0.003, 0.003, size=(int(jumps.sum()), 2))
+    coords = np.cumsum(step, axis=0) + (50.06, 19.94)
+    times = np.cumsum(rng.choice([1, 1, 1, 2, 5], size=n)) - 1
+    ele = 210.0 + np.cumsum(rng.normal(0.0, 0.2, size=n))
+    return Track(coords[:, 0], coords[:, 1], times, ele)
+
+
+def _time_samples(fn: Callable[[], object], repeats: int) -> list[float]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _result(name: str, n: int, samples: list[float], *, calls: int = 1) -> dict:
+    median_s = statistics.median(samples) / calls
+    return {
+        "name": name,
+        "points": n,
+        "repeats": len(samples),
+        "calls_per_sample": calls,
+        "median_ms": round(median_s * 1e3, 6),
+        "min_ms": round(min(samples) / calls * 1e3, 6),
+        "points_per_s": round(n / median_s, 1) if n and median_s > 0 else None,
+    }
+
+
+def _bench_size(n: int, *, repeats: int, seed: int) -> list[dict]:
+    track = synthetic_track(n, seed=seed)
+    coords = np.column_stack([track.lat, track.lon])
+    times = track.time.astype(np.int64)
+    latlons = list(zip(track.lat.tolist(), track.lon.tolist()))
+    time_list = times.tolist()
+
+    # The per-point ORM loop is an order of magnitude slower than the rest; cap its samples.
+    slow_repeats = 1 if n >= 100_000 else repeats
+
+    results = [
+        _result("compute_quality[numpy,ndarray]", n, _time_samples(lambda: compute_quality(coords, times), repeats)),
+        _result("compute_quality[numpy,lists]", n, _time_samples(lambda: compute_quality(latlons, time_list), repeats)),
+        _result("compute_track_quality", n, _time_samples(lambda: compute_track_quality(track), repeats)),
+        _result(
+            "compute_quality[python,lists]",
+            n,
+            _time_samples(lambda: compute_quality(latlons, time_list, engine="python"), slow_repeats),
+        ),
+        _result(
+            "ingest.build_activity_points[orm]",
+            n,
+            _time_samples(lambda: build_activity_points(1, track), slow_repeats),
+        ),
+        _result(
+            "ingest.encode_points_copy_binary",
+            n,
+            _time_samples(lambda: encode_points_copy_binary(1, track), repeats),
+        ),
+        _result(
+            "streams.points_geojson_features",
+            n,
+            _time_samples(lambda: _point_features(1, track), slow_repeats),
+        ),
+    ]
+
+    report = compute_track_quality(track)
+    metric = SimpleNamespace(
+        point_count=report.point_count,
+        duration_s=report.duration_s,
+        distance_m_gps=report.distance_m,
+        max_speed_mps=report.max_speed_mps,
+        spike_count=report.spike_count,
+        stopped_time_s=report.stopped_time_s,
+        stop_segments=report.stop_segments,
+        jitter_score=report.jitter_score,
+    )
+    activity = SimpleNamespace(
+        id=1,
+        strava_activity_id=1,
+        name="Synthetic",
+        sport_type="Run",
+        start_date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        moving_time_s=report.duration_s,
+        distance_m=report.distance_m,
+        elevation_gain_m=None,
+    )
+
+    def _payload_loop() -> None:
+        for _ in range(SCALAR_CALLS_PER_SAMPLE):
+            _build_feature_payload(activity, metric, feature_version=FEATURE_VERSION_V1)
+
+    def _label_loop() -> None:
+        for _ in range(SCALAR_CALLS_PER_SAMPLE):
+            evaluate_weak_label(metric, official_distance_m=activity.distance_m)
+
+    results.append(
+        _result(
+            "ml_features._build_feature_payload",
+            n,
+            _time_samples(_payload_loop, repeats),
+            calls=SCALAR_CALLS_PER_SAMPLE,
+        )
+    )
+    results.append(
+        _result(
+            "bootstrap_labels.evaluate_weak_label",
+            n,
+            _time_samples(_label_loop, repeats),
+            calls=SCALAR_CALLS_PER_SAMPLE,
+        )
+    )
+    for row in results[-2:]:
+        # Per-activity cost: throughput in points is not meaningful.
+        row["points_per_s"] = None
+    return results
+
+
+def run_benchmarks(
+    *,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeats: int = DEFAULT_REPEATS,
+    seed: int = DEFAULT_SEED,
+    output_path: str | Path | None = DEFAULT_OUTPUT_PATH,
+) -> dict:
+    if repeats <= 0:
+        raise ValueError("repeats must be positive")
+    results: list[dict] = []
+    for n in sizes:
+        results.extend(_bench_size(n, repeats=repeats, seed=seed))
+
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "sizes": list(sizes),
+        "repeats": repeats,
+        "seed": seed,
+        "results": results,
+    }
+    if output_path is not None:
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        summary["output_path"] = str(path)
+    return summary
+
+
+def _parse_int_list(value: str) -> tuple[int, ...]:
+    return tuple(int(token) for token in value.split(",") if token.strip())
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Time quality, ingest and serialization hot paths.")
+    parser.add_argument(
+        "--sizes",
+        type=_parse_int_list,
+        default=DEFAULT_SIZES,
+        help="Comma-separated synthetic track sizes in points (default: 1000,10000,100000,1000000).",
+    )
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed samples per case.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for the synthetic tracks.")
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_OUTPUT_PATH),
+        help="Path for the JSON results file.",
+    )
+    return parser
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    summary = run_benchmarks(sizes=args.sizes, repeats=args.repeats, seed=args.seed, output_path=args.output)
+    for row in summary["results"]:
+        print(f"{row['name']:<40} n={row['points']:>9,} median={row['median_ms']:>12.3f} ms")
+    print(f"wrote {summary['output_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
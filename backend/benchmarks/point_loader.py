@@ -0,0 +1,111 @@
+"""Points/s of the ORM and COPY point loaders against a real PostGIS database.
+
+Run from `backend/` with DATABASE_URL pointing at a migrated database:
+
+    python -m benchmarks.point_loader --sizes 10000,100000
+
+Every run inserts into a throwaway user/activity inside a transaction that is
+rolled back, so the database is left unchanged.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.db import SessionLocal
+from app.models.activity import Activity
+from app.models.user import User
+from app.services.point_loader import load_activity_points
+from benchmarks.hot_paths import DEFAULT_SEED, _parse_int_list, synthetic_track
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_PATH = ROOT_DIR / "artifacts/benchmarks/point_loader.json"
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_REPEATS = 3
+
+
+def _time_load(n: int, *, use_copy: bool, seed: int) -> float:
+    track = synthetic_track(n, seed=seed)
+    with SessionLocal() as db:
+        try:
+            user = User(strava_athlete_id=-1, firstname="Bench", lastname="Loader")
+            db.add(user)
+            db.flush()
+            activity = Activity(strava_activity_id=-1, user_id=user.id, sport_type="Run")
+            db.add(activity)
+            db.flush()
+
+            started = time.perf_counter()
+            load_activity_points(db, activity_id=activity.id, track=track, use_copy=use_copy)
+            db.flush()
+            return time.perf_counter() - started
+        finally:
+            db.rollback()
+
+
+def run_point_loader_benchmark(
+    *,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeats: int = DEFAULT_REPEATS,
+    seed: int = DEFAULT_SEED,
+    output_path: str | Path | None = DEFAULT_OUTPUT_PATH,
+) -> dict:
+    results = []
+    for n in sizes:
+        for loader, use_copy in (("orm", False), ("copy", True)):
+            samples = [_time_load(n, use_copy=use_copy, seed=seed) for _ in range(repeats)]
+            median_s = statistics.median(samples)
+            results.append(
+                {
+                    "loader": loader,
+                    "points": n,
+                    "repeats": repeats,
+                    "median_ms": round(median_s * 1e3, 3),
+                    "points_per_s": round(n / median_s, 1) if median_s > 0 else None,
+                }
+            )
+
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "sizes": list(sizes),
+        "repeats": repeats,
+        "seed": seed,
+        "results": results,
+    }
+    if output_path is not None:
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        summary["output_path"] = str(path)
+    return summary
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare ORM and COPY activity point loaders (points/s).")
+    parser.add_argument("--sizes", type=_parse_int_list, default=DEFAULT_SIZES, help="Comma-separated track sizes.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed loads per loader and size.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for the synthetic tracks.")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_PATH), help="Path for the JSON results file.")
+    return parser
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    summary = run_point_loader_benchmark(
+        sizes=args.sizes,
+        repeats=args.repeats,
+        seed=args.seed,
+        output_path=args.output,
+    )
+    for row in summary["results"]:
+        print(f"{row['loader']:<5} n={row['points']:>9,} {row['points_per_s']:>14,.0f} points/s")
+    print(f"wrote {summary['output_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""Side-by-side size and read latency of per-point and packed track storage.
+
+Run from `backend/` with DATABASE_URL pointing at a migrated database:
+
+    python -m benchmarks.track_storage --sizes 1000,10000,100000
+
+For each size one synthetic track is written in each storage mode inside a
+transaction that is rolled back. Size is the growth of the storage table plus
+its indexes (`pg_total_relation_size`); latency is `load_track` wall time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.core.db import SessionLocal
+from app.models.activity import Activity
+from app.models.user import User
+from app.services.point_loader import store_track
+from app.services.track import TRACK_STORAGE_MODES, TRACK_STORAGE_PACKED, TRACK_STORAGE_POINTS, load_track
+from benchmarks.hot_paths import DEFAULT_SEED, _parse_int_list, synthetic_track
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_PATH = ROOT_DIR / "artifacts/benchmarks/track_storage.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_REPEATS = 5
+
+_STORAGE_TABLES = {TRACK_STORAGE_POINTS: "activity_points", TRACK_STORAGE_PACKED: "activity_tracks"}
+
+
+def _total_relation_size(db, table: str) -> int:
+    return int(db.execute(text("SELECT pg_total_relation_size(CAST(:t AS regclass))"), {"t": table}).scalar())
+
+
+def _measure(n: int, *, storage: str, repeats: int, seed: int) -> dict:
+    track = synthetic_track(n, seed=seed)
+    table = _STORAGE_TABLES[storage]
+    with SessionLocal() as db:
+        try:
+            user = User(strava_athlete_id=-1, firstname="Bench", lastname="Storage")
+            db.add(user)
+            db.flush()
+            activity = Activity(strava_activity_id=-1, user_id=user.id, sport_type="Run")
+            db.add(activity)
+            db.flush()
+
+            size_before = _total_relation_size(db, table)
+            started = time.perf_counter()
+            store_track(db, activity_id=activity.id, track=track, storage=storage)
+            db.flush()
+            write_s = time.perf_counter() - started
+            size_after = _total_relation_size(db, table)
+
+            samples = []
+            for _ in range(repeats):
+                db.expire_all()
+                started = time.perf_counter()
+                loaded = load_track(db, activity_id=activity.id)
+                samples.append(time.perf_counter() - started)
+            assert len(loaded) == n
+        finally:
+            db.rollback()
+
+    read_s = statistics.median(samples)
+    return {
+        "storage": storage,
+        "points": n,
+        "bytes": size_after - size_before,
+        "bytes_per_point": round((size_after - size_before) / n, 2),
+        "write_ms": round(write_s * 1e3, 3),
+        "read_median_ms": round(read_s * 1e3, 3),
+        "read_points_per_s": round(n / read_s, 1) if read_s > 0 else None,
+    }
+
+
+def run_track_storage_benchmark(
+    *,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeats: int = DEFAULT_REPEATS,
+    seed: int = DEFAULT_SEED,
+    output_path: str | Path | None = DEFAULT_OUTPUT_PATH,
+) -> dict:
+    results = [
+        _measure(n, storage=storage, repeats=repeats, seed=seed) for n in sizes for storage in TRACK_STORAGE_MODES
+    ]
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "sizes": list(sizes),
+        "repeats": repeats,
+        "seed": seed,
+        "results": results,
+    }
+    if output_path is not None:
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        summary["output_path"] = str(path)
+    return summary
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare per-point and packed track storage size and read latency.")
+    parser.add_argument("--sizes", type=_parse_int_list, default=DEFAULT_SIZES, help="Comma-separated track sizes.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed reads per storage and size.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for the synthetic tracks.")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_PATH), help="Path for the JSON results file.")
+    return parser
+
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    summary = run_track_storage_benchmark(
+        sizes=args.sizes,
+        repeats=args.repeats,
+        seed=args.seed,
+        output_path=args.output,
+    )
+    for row in summary["results"]:
+        print(
+            f"{row['storage']:<7} n={row['points']:>9,} {row['bytes_per_point']:>8.1f} B/pt "
+            f"read={row['read_median_ms']:>10.3f} ms"
+        )
+    print(f"wrote {summary['output_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
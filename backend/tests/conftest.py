@@ -23,6 +23,11 @@ os.environ.setdefault("STRAVA_CLIENT_SECRET", "test-client-secret")
 os.environ.setdefault("STRAVA_REDIRECT_URI", "http://127.0.0.1:8000/auth/strava/callback")
 os.environ.setdefault("STRAVA_SCOPES", "read,activity:read_all")
 os.environ.setdefault("SESSION_SECRET", "test-session-secret")
+# Quota and token refresh state would otherwise live in the DATABASE_URL database, not the test database.
+os.environ.setdefault("STRAVA_RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("STRAVA_TOKEN_REFRESH_BACKEND", "memory")
+# Tests run sync jobs explicitly instead of through background worker threads.
+os.environ.setdefault("SYNC_WORKER_THREADS", "0")
 
 from app.core.auth import get_current_user  # noqa: E402
 from app.core.db import get_db  # noqa: E402
@@ -74,11 +79,16 @@ def _truncate_tables(db: Session) -> None:
             """
             TRUNCATE TABLE
               activity_ml_features,
+              activity_quality_events,
               activity_quality_labels,
               activity_quality_metrics,
               activity_points,
+              activity_tracks,
               activities,
               strava_tokens,
+              strava_rate_limit_state,
+              sync_jobs,
+              activity_sync_cursors,
               users
             RESTART IDENTITY CASCADE
             """
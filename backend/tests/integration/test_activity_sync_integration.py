@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.integrations.strava import StravaClient
+from app.models.activity import Activity
+from app.models.user import User
+from app.services.activity_sync import (
+    SYNC_MODE_FULL,
+    SYNC_MODE_INCREMENTAL,
+    SYNC_MODE_RANGE,
+    ShardPlan,
+    SyncParams,
+    load_sync_cursor,
+    sync_user_activities,
+)
+from benchmarks.fake_strava import HISTORY_END, FakeStrava, synthetic_activities
+
+DAY_S = 86_400
+
+
+def _client(fake: FakeStrava) -> StravaClient:
+    return StravaClient(
+        "token",
+        base_url="http://strava.test/api/v3",
+        http_client=httpx.Client(transport=fake.transport()),
+    )
+
+
+def _sync(db_session, fake: FakeStrava, user_id: int, *, shard: ShardPlan | None = None, **params):
+    progress = sync_user_activities(
+        db_session,
+        _client(fake),
+        user_id=user_id,
+        params=SyncParams(per_page=20, **params),
+        cursor_overlap_s=DAY_S,
+        shard=shard,
+    )
+    db_session.commit()
+    return progress
+
+
+@pytest.mark.integration
+def test_incremental_sync_resumes_from_cursor(db_session):
+    user = User(strava_athlete_id=960101, firstname="Cursor", lastname="Sync")
+    db_session.add(user)
+    db_session.commit()
+    # One activity per day; the second fake has two more recent ones.
+    history = synthetic_activities(52, history_days=52)
+    before_upload, after_upload = FakeStrava(history[:50]), FakeStrava(history)
+
+    first = _sync(db_session, before_upload, user.id, mode=SYNC_MODE_INCREMENTAL)
+    assert (first.pages, first.inserted, first.complete) == (3, 50, True)
+    cursor = load_sync_cursor(db_session, user.id)
+    assert cursor.last_strava_activity_id == history[49]["id"]
+
+    routine = _sync(db_session, after_upload, user.id, mode=SYNC_MODE_INCREMENTAL)
+    # One request: the overlap day re-reads the newest known activity, plus the two new ones.
+    assert after_upload.stats.snapshot()["requests"] == {"activities": 1}
+    assert (routine.fetched, routine.inserted, routine.updated) == (3, 2, 1)
+    db_session.expire_all()
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[51]["id"]
+
+    ranged = _sync(db_session, before_upload, user.id, mode=SYNC_MODE_RANGE, max_pages=1)
+    assert (ranged.pages, ranged.updated) == (1, 20)
+    full = _sync(db_session, after_upload, user.id, mode=SYNC_MODE_FULL)
+    assert (full.pages, full.inserted, full.updated) == (3, 0, 52)
+    db_session.expire_all()
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[51]["id"]
+    assert db_session.query(Activity).filter(Activity.user_id == user.id).count() == 52
+
+
+@pytest.mark.integration
+def test_incremental_sync_cut_short_advances_cursor_only_past_written_pages(db_session):
+    user = User(strava_athlete_id=960102, firstname="Cursor", lastname="Partial")
+    db_session.add(user)
+    db_session.commit()
+    history = synthetic_activities(60, history_days=60)
+    fake = FakeStrava(history)
+
+    # A first import cut short by max_pages saw only the newest page; no cursor yet.
+    partial = _sync(db_session, fake, user.id, mode=SYNC_MODE_INCREMENTAL, max_pages=1)
+    assert not partial.complete
+    assert load_sync_cursor(db_session, user.id) is None
+
+    _sync(db_session, FakeStrava(history[:30]), user.id, mode=SYNC_MODE_INCREMENTAL)
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[29]["id"]
+
+    # Oldest first from the cursor, so one page moves the cursor exactly past that page.
+    _sync(db_session, fake, user.id, mode=SYNC_MODE_INCREMENTAL, max_pages=1)
+    db_session.expire_all()
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[48]["id"]
+
+
+@pytest.mark.integration
+def test_sharded_history_import_merges_windows_and_sets_cursor(db_session):
+    user = User(strava_athlete_id=960103, firstname="Cursor", lastname="Sharded")
+    db_session.add(user)
+    db_session.commit()
+    history = synthetic_activities(90, history_days=90)
+    shard = ShardPlan(windows=5, concurrency=3, history_start=int(HISTORY_END.timestamp()) - 120 * DAY_S)
+
+    first = _sync(db_session, FakeStrava(history), user.id, mode=SYNC_MODE_INCREMENTAL, shard=shard)
+    assert (first.fetched, first.inserted, first.complete) == (90, 90, True)
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[89]["id"]
+
+    # Re-importing merges into the same rows; the routine sync afterwards is not sharded.
+    full = _sync(db_session, FakeStrava(history), user.id, mode=SYNC_MODE_FULL, shard=shard)
+    assert (full.inserted, full.updated) == (0, 90)
+    routine_fake = FakeStrava(history)
+    _sync(db_session, routine_fake, user.id, mode=SYNC_MODE_INCREMENTAL, shard=shard)
+    assert routine_fake.stats.snapshot()["requests"] == {"activities": 1}
+    assert db_session.query(Activity).filter(Activity.user_id == user.id).count() == 90
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timezone
 from types import SimpleNamespace
 
+import httpx
 import pytest
 
 from app.ml.batch_ingest_streams import backfill_activity_streams
 from app.models.activity import Activity
 from app.models.activity_quality_metric import ActivityQualityMetric
+from app.models.strava_token import StravaToken
 from app.models.user import User
 from app.services.stream_ingest import MissingStreamDataError
 
@@ -94,11 +97,11 @@ def test_backfill_activity_streams_selects_missing_metrics_and_tracks_errors(db_
 
     calls: list[int] = []
 
-    def fake_ingest(db, *, activity_id: int, commit: bool = True):
+    def fake_ingest(db, *, activity_id: int, commit: bool = True, **kwargs):
         calls.append(activity_id)
         if activity_id == a2.id:
             raise MissingStreamDataError("Missing latlng or time streams")
-        return SimpleNamespace(activity_id=activity_id, points=123)
+        return SimpleNamespace(activity_id=activity_id, points=123, unchanged=False)
 
     monkeypatch.setattr("app.ml.batch_ingest_streams.ingest_streams_for_activity", fake_ingest)
 
@@ -119,3 +122,74 @@ def test_backfill_activity_streams_selects_missing_metrics_and_tracks_errors(db_
     assert summary["total_points_written"] == 123
     assert summary["summary_path"].endswith("ingest_summary.json")
 
+
+
+@pytest.mark.integration
+def test_backfill_activity_streams_concurrently_against_fake_strava(db_session, tmp_path):
+    user = _seed_user(db_session, athlete_id=940101)
+    db_session.add(
+        StravaToken(
+            user_id=user.id,
+            access_token="token",
+            refresh_token="refresh",
+            expires_at=2_000_000_000,
+        )
+    )
+    activities = [
+        _seed_activity(
+            db_session,
+            user_id=user.id,
+            strava_activity_id=960000 + i,
+            start_date=datetime(2024, 2, i + 1, tzinfo=timezone.utc),
+            sport_type="Run",
+        )
+        for i in range(6)
+    ]
+    db_session.commit()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        strava_id = int(request.url.path.split("/")[-2])
+        if strava_id == 960003:
+            return httpx.Response(404)
+        if strava_id == 960004:
+            return httpx.Response(200, json={"time": {"data": [0, 1]}})
+        n = 50
+        return httpx.Response(
+            200,
+            json={
+                "latlng": {"data": [[52.0 + i * 1e-5, 13.0] for i in range(n)]},
+                "time": {"data": list(range(n))},
+                "altitude": {"data": [30.0] * n},
+            },
+        )
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        summary = backfill_activity_streams(
+            db_session,
+            concurrency=3,
+            write_workers=2,
+            http_client=http_client,
+            output_path=tmp_path / "ingest_summary.json",
+        )
+    finally:
+        asyncio.run(http_client.aclose())
+
+    assert summary["concurrency"] == 3
+    assert summary["ingested"] == 4
+    assert summary["missing_stream_data"] == 1
+    assert summary["failed"] == 1
+    assert summary["total_points_written"] == 200
+    assert 1 <= summary["max_in_flight"] <= 3
+    assert summary["stages"]["fetch"]["processed"] == 5
+    assert summary["stages"]["parse"]["errors"] == 1
+    assert summary["stages"]["write"]["processed"] == 6
+    assert summary["stages"]["write"]["workers"] == 2
+    ingested_ids = {a.id for a in activities if a.strava_activity_id not in (960003, 960004)}
+    metric_ids = {
+        row[0]
+        for row in db_session.query(ActivityQualityMetric.activity_id).filter(
+            ActivityQualityMetric.activity_id.in_([a.id for a in activities])
+        )
+    }
+    assert metric_ids == ingested_ids
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from app.ml.recompute_metrics import recompute_quality_metrics
+from app.models.activity import Activity
+from app.models.activity_point import ActivityPoint
+from app.models.activity_quality_event import ActivityQualityEvent
+from app.models.activity_quality_metric import ActivityQualityMetric
+from app.models.user import User
+
+
+@pytest.mark.integration
+def test_recompute_quality_metrics_writes_metrics_from_stored_points(
+    db_session,
+    integration_db_url,
+    tmp_path,
+):
+    user = User(strava_athlete_id=960001, firstname="Recompute", lastname="Metrics")
+    db_session.add(user)
+    db_session.flush()
+
+    activity_ids = []
+    for strava_id in (961001, 961002, 961003):
+        activity = Activity(strava_activity_id=strava_id, user_id=user.id, sport_type="Run")
+        db_session.add(activity)
+        db_session.flush()
+        activity_ids.append(activity.id)
+        # The repeated sample is a 5 s stop: an event with stop_min_duration_s=5, none with the default.
+        samples = [(50.0, 19.0, 0), (50.0001, 19.0001, 5), (50.0001, 19.0001, 10), (50.0002, 19.0002, 15)]
+        for seq, (lat, lon, t) in enumerate(samples):
+            db_session.add(
+                ActivityPoint(
+                    activity_id=activity.id,
+                    seq=seq,
+                    time_s=t,
+                    geom=from_shape(Point(lon, lat), srid=4326),
+                )
+            )
+    db_session.commit()
+
+    summary = recompute_quality_metrics(
+        database_url=integration_db_url,
+        activity_ids=activity_ids,
+        workers=1,
+        chunk_size=2,
+        stop_min_duration_s=5,
+        progress=False,
+        output_path=tmp_path / "recompute_summary.json",
+    )
+
+    assert summary["ok"] is True
+    assert summary["chunks"] == 2
+    assert summary["recomputed"] == 3
+    db_session.expire_all()
+    metrics = db_session.query(ActivityQualityMetric).all()
+    assert len(metrics) == 3
+    assert {m.stop_min_duration_s for m in metrics} == {5}
+    assert all(m.point_count == 4 for m in metrics)
+    events = db_session.query(ActivityQualityEvent).all()
+    assert sorted(e.activity_id for e in events) == sorted(activity_ids)
+    assert {(e.event_type, e.start_seq, e.end_seq) for e in events} == {("stop", 1, 2)}
+
+    recompute_quality_metrics(
+        database_url=integration_db_url,
+        activity_ids=activity_ids,
+        workers=1,
+        progress=False,
+        output_path=tmp_path / "recompute_summary.json",
+    )
+    db_session.expire_all()
+    assert db_session.query(ActivityQualityEvent).count() == 0
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.models.activity import Activity
+from app.models.user import User
+from app.services.point_loader import LOADER_COPY, LOADER_ORM, load_activity_points
+from app.services.track import Track, load_track
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("use_copy, expected_loader", [(True, LOADER_COPY), (False, LOADER_ORM)])
+def test_load_activity_points_round_trips_track(db_session, use_copy, expected_loader):
+    user = User(strava_athlete_id=990001, firstname="Copy", lastname="Loader")
+    db_session.add(user)
+    db_session.flush()
+    activity = Activity(strava_activity_id=990101, user_id=user.id, sport_type="Run")
+    db_session.add(activity)
+    db_session.flush()
+
+    track = Track(
+        np.array([50.0, 50.0001, 50.0002, 50.0003]),
+        np.array([19.0, 19.0001, 19.0002, 19.0003]),
+        np.array([0, 1, 2, 5], dtype=np.int32),
+        np.array([210.0, np.nan, 211.0, 212.0]),
+    )
+
+    loader = load_activity_points(db_session, activity_id=activity.id, track=track, use_copy=use_copy)
+    db_session.commit()
+
+    stored = load_track(db_session, activity_id=activity.id)
+    assert loader == expected_loader
+    assert len(stored) == 4
+    assert np.allclose(stored.lat, track.lat) and np.allclose(stored.lon, track.lon)
+    assert stored.time.tolist() == [0, 1, 2, 5]
+    assert np.array_equal(np.isnan(stored.ele), np.isnan(track.ele))
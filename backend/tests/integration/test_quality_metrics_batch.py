@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import pytest
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from app.models.activity import Activity
+from app.models.activity_point import ActivityPoint
+from app.models.user import User
+from app.services.quality import EVENT_STOP, compute_quality
+from app.services.quality_events import list_quality_events, replace_quality_events
+from app.services.quality_metrics import (
+    compute_missing_quality_metrics,
+    iter_point_batches,
+    upsert_quality_metric_from_points,
+    upsert_quality_metrics_from_points_batch,
+)
+
+
+def _seed_activity_with_points(
+    db_session,
+    *,
+    user_id: int,
+    strava_activity_id: int,
+    latlons: list[tuple[float, float]],
+    times: list[int],
+) -> Activity:
+    activity = Activity(strava_activity_id=strava_activity_id, user_id=user_id, sport_type="Run")
+    db_session.add(activity)
+    db_session.flush()
+    db_session.add_all(
+        [
+            ActivityPoint(
+                activity_id=activity.id,
+                seq=i,
+                time_s=t,
+                geom=from_shape(Point(lon, lat), srid=4326),
+            )
+            for i, ((lat, lon), t) in enumerate(zip(latlons, times))
+        ]
+    )
+    return activity
+
+
+@pytest.mark.integration
+def test_batch_upsert_matches_single_activity_compute(db_session):
+    user = User(strava_athlete_id=970001, firstname="Batch", lastname="Quality")
+    db_session.add(user)
+    db_session.flush()
+
+    tracks = {
+        980001: ([(0.0, 0.0), (0.0, 0.0), (0.001, 0.0), (0.001, 0.0)], [0, 15, 20, 35]),
+        980002: ([(50.0, 19.0), (50.0001, 19.0001), (50.0002, 19.0002)], [0, 10, 20]),
+        980003: ([(10.0, 10.0)], [0]),
+    }
+    activities = {
+        strava_id: _seed_activity_with_points(
+            db_session,
+            user_id=user.id,
+            strava_activity_id=strava_id,
+            latlons=latlons,
+            times=times,
+        )
+        for strava_id, (latlons, times) in tracks.items()
+    }
+    db_session.commit()
+
+    metrics = upsert_quality_metrics_from_points_batch(
+        db_session,
+        activity_ids=[a.id for a in activities.values()],
+        chunk_size=2,
+    )
+    db_session.commit()
+
+    assert set(metrics) == {activities[980001].id, activities[980002].id}
+    for strava_id in (980001, 980002):
+        expected = compute_quality(*tracks[strava_id])
+        metric = metrics[activities[strava_id].id]
+        assert metric.point_count == expected.point_count
+        assert metric.spike_count == expected.spike_count
+        assert metric.stop_segments == expected.stop_segments
+        assert metric.distance_m_gps == pytest.approx(expected.distance_m, rel=1e-6)
+
+    assert compute_missing_quality_metrics(db_session, activity_ids=[a.id for a in activities.values()]) == {}
+
+
+@pytest.mark.integration
+def test_streaming_upsert_from_points_matches_compute_quality(db_session):
+    user = User(strava_athlete_id=970002, firstname="Stream", lastname="Quality")
+    db_session.add(user)
+    db_session.flush()
+
+    latlons = [(0.0, 0.0), (0.0, 0.0), (0.0, 0.0), (0.001, 0.0), (0.001, 0.0), (0.0011, 0.0)]
+    times = [0, 6, 12, 13, 30, 40]
+    activity = _seed_activity_with_points(
+        db_session,
+        user_id=user.id,
+        strava_activity_id=980010,
+        latlons=latlons,
+        times=times,
+    )
+    db_session.commit()
+
+    metric = upsert_quality_metric_from_points(db_session, activity_id=activity.id, chunk_size=2)
+    db_session.commit()
+
+    expected = compute_quality(latlons, times)
+    assert metric.point_count == expected.point_count
+    assert metric.duration_s == expected.duration_s
+    assert metric.stop_segments == expected.stop_segments
+    assert metric.stopped_time_s == expected.stopped_time_s
+    assert metric.spike_count == expected.spike_count
+    assert metric.jitter_score == pytest.approx(expected.jitter_score, rel=1e-6)
+
+
+@pytest.mark.integration
+def test_point_batches_are_bounded_by_point_count(db_session):
+    user = User(strava_athlete_id=970003, firstname="Bounded", lastname="Quality")
+    db_session.add(user)
+    db_session.flush()
+    lengths = {980020: 3, 980021: 3, 980022: 7, 980023: 2}
+    activities = {
+        strava_id: _seed_activity_with_points(
+            db_session,
+            user_id=user.id,
+            strava_activity_id=strava_id,
+            latlons=[(50.0 + i * 1e-4, 19.0) for i in range(n)],
+            times=list(range(0, 10 * n, 10)),
+        )
+        for strava_id, n in lengths.items()
+    }
+    db_session.commit()
+    ids = [a.id for a in activities.values()]
+
+    batches = list(iter_point_batches(db_session, activity_ids=ids, max_points=6))
+
+    assert [batch.activity_ids for batch in batches] == [ids[:2], [ids[2]], [ids[3]]]
+    assert [batch.offsets.tolist() for batch in batches] == [[0, 3, 6], [0, 7], [0, 2]]
+    assert batches[1].times.tolist() == list(range(0, 70, 10))
+    metrics = upsert_quality_metrics_from_points_batch(db_session, activity_ids=ids, max_points=6)
+    assert {metric.point_count for metric in metrics.values()} == {2, 3, 7}
+
+
+@pytest.mark.integration
+def test_recomputed_metrics_rebuild_events_under_the_same_thresholds(db_session):
+    user = User(strava_athlete_id=970004, firstname="Events", lastname="Quality")
+    db_session.add(user)
+    db_session.flush()
+    # One 8 s stop: counted with a 5 s minimum, not with the 10 s default.
+    latlons = [(0.0, 0.0), (0.001, 0.0), (0.001, 0.0), (0.002, 0.0)]
+    times = [0, 20, 28, 48]
+    single = _seed_activity_with_points(
+        db_session, user_id=user.id, strava_activity_id=980030, latlons=latlons, times=times
+    )
+    batched = _seed_activity_with_points(
+        db_session, user_id=user.id, strava_activity_id=980031, latlons=latlons, times=times
+    )
+    db_session.flush()
+    for activity in (single, batched):
+        replace_quality_events(db_session, activity_id=activity.id, events=[])
+    db_session.commit()
+
+    upsert_quality_metric_from_points(db_session, activity_id=single.id, stop_min_duration_s=5)
+    upsert_quality_metrics_from_points_batch(db_session, activity_ids=[batched.id], stop_min_duration_s=5)
+    db_session.commit()
+
+    for activity in (single, batched):
+        events = list_quality_events(db_session, activity_id=activity.id)
+        assert [(e.event_type, e.start_seq, e.end_seq) for e in events] == [(EVENT_STOP, 1, 2)]
+
+    upsert_quality_metrics_from_points_batch(db_session, activity_ids=[single.id, batched.id])
+    db_session.commit()
+    assert list_quality_events(db_session, activity_id=single.id) == []
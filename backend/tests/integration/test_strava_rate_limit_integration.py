@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.integrations.strava_rate_limit import RateLimitPolicy
+from app.services.strava_rate_limit import PostgresRateLimitStore
+
+NOW = datetime(2026, 10, 17, 12, 3, tzinfo=timezone.utc)
+
+
+@pytest.mark.integration
+def test_postgres_store_shares_quota_between_processes(db_session):
+    factory = sessionmaker(bind=db_session.get_bind())
+    # Two stores over the same row stand in for two worker processes.
+    web = PostgresRateLimitStore(factory, scope="client-1")
+    backfill = PostgresRateLimitStore(factory, scope="client-1")
+    other_app = PostgresRateLimitStore(factory, scope="client-2")
+    policy = RateLimitPolicy(headroom=0, burst_fraction=0.0)
+
+    web.observe(NOW, {"X-RateLimit-Limit": "10,100", "X-RateLimit-Usage": "6,60"}, 200)
+    granted = [store.reserve(NOW, policy) for store in (web, backfill, web, backfill, backfill)]
+
+    assert [reserved for reserved, _ in granted] == [True, True, True, True, False]
+    assert granted[-1][1] == pytest.approx(12 * 60)
+    assert web.snapshot()["usage_15m"] == 10
+    assert other_app.reserve(NOW, policy) == (True, 0.0)
+
+
+@pytest.mark.integration
+def test_postgres_store_observe_folds_headers_into_the_stored_row(db_session):
+    factory = sessionmaker(bind=db_session.get_bind())
+    store = PostgresRateLimitStore(factory, scope="client-3")
+    policy = RateLimitPolicy(headroom=0, burst_fraction=1.0)
+
+    assert store.reserve(NOW, policy)[0]
+    assert store.reserve(NOW, policy)[0]
+    # Strava has not counted the second reservation yet; local usage must not drop.
+    store.observe(NOW, {"X-RateLimit-Limit": "10,100", "X-RateLimit-Usage": "1,40"}, 200)
+    assert (store.snapshot()["usage_15m"], store.snapshot()["usage_day"]) == (2, 40)
+
+    store.observe(NOW, {}, 429)
+    assert store.snapshot()["usage_15m"] == 10
+
+    later = NOW.replace(minute=20)
+    store.observe(later, {"X-RateLimit-Limit": "10,100", "X-RateLimit-Usage": "3,43"}, 200)
+    assert (store.snapshot()["usage_15m"], store.snapshot()["usage_day"]) == (3, 43)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.integrations.strava import StravaClient
+from app.integrations.strava_token_refresh import TokenRefreshCoordinator
+from app.models.strava_token import StravaToken
+from app.models.user import User
+from app.services.strava_token_refresh import PostgresTokenStore
+
+
+@pytest.mark.integration
+def test_advisory_lock_makes_refresh_single_flight_across_workers(db_session):
+    user = User(strava_athlete_id=950101, firstname="Token", lastname="Refresh")
+    db_session.add(user)
+    db_session.flush()
+    db_session.add(StravaToken(user_id=user.id, access_token="old", refresh_token="refresh-0", expires_at=1_000))
+    db_session.commit()
+
+    refreshes = []
+    refresh_lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            time.sleep(0.05)
+            with refresh_lock:
+                refreshes.append(request.content.decode())
+            return httpx.Response(200, json={"access_token": "new", "refresh_token": "refresh-1", "expires_at": 2**31})
+        if request.headers["Authorization"] != "Bearer new":
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+    # Each client gets its own store and connection, like separate worker processes.
+    factory = sessionmaker(bind=db_session.get_bind())
+    clients = [
+        StravaClient(
+            "old",
+            refresh_token="refresh-0",
+            expires_at=1_000,
+            client_id="id",
+            client_secret="secret",
+            base_url="http://strava.test/api/v3",
+            token_url="http://strava.test/oauth/token",
+            http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+            token_refresh=TokenRefreshCoordinator(PostgresTokenStore(factory), user_id=user.id),
+        )
+        for _ in range(6)
+    ]
+    barrier = threading.Barrier(len(clients))
+
+    def _run(client: StravaClient) -> None:
+        barrier.wait()
+        client.list_activities()
+
+    threads = [threading.Thread(target=_run, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(refreshes) == 1
+    assert "refresh_token=refresh-0" in refreshes[0]
+    assert {client.access_token for client in clients} == {"new"}
+    db_session.expire_all()
+    stored = db_session.query(StravaToken).filter(StravaToken.user_id == user.id).one()
+    assert (stored.access_token, stored.refresh_token, stored.expires_at) == ("new", "refresh-1", 2**31)
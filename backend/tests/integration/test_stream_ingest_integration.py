@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import pytest
+
+from app.ml.batch_ingest_streams import backfill_activity_streams
+from app.models.activity import Activity
+from app.models.activity_point import ActivityPoint
+from app.models.activity_quality_metric import ActivityQualityMetric
+from app.models.user import User
+from app.services.stream_ingest import write_activity_streams
+
+
+def _streams(last_time: int = 40) -> dict:
+    return {
+        "latlng": {"data": [[50.0, 19.0], [50.0, 19.0], [50.0001, 19.0001], [50.0002, 19.0002]]},
+        "time": {"data": [0, 6, 12, last_time]},
+        "altitude": {"data": [210.0, 210.5, 211.0, 212.0]},
+    }
+
+
+def _point_ids(db_session, activity_id: int) -> set[int]:
+    return {row[0] for row in db_session.query(ActivityPoint.id).filter(ActivityPoint.activity_id == activity_id)}
+
+
+@pytest.mark.integration
+def test_write_activity_streams_skips_unchanged_stream(db_session):
+    user = User(strava_athlete_id=992001, firstname="Hash", lastname="Skip")
+    db_session.add(user)
+    db_session.flush()
+    activity = Activity(strava_activity_id=992101, user_id=user.id, sport_type="Run")
+    db_session.add(activity)
+    db_session.commit()
+
+    first = write_activity_streams(db_session, activity=activity, streams=_streams())
+    point_ids = _point_ids(db_session, activity.id)
+    metric_id = db_session.query(ActivityQualityMetric.id).filter_by(activity_id=activity.id).scalar()
+
+    again = write_activity_streams(db_session, activity=activity, streams=_streams())
+
+    assert not first.unchanged
+    assert again.unchanged and again.points == 4
+    assert activity.stream_hash is not None
+    assert _point_ids(db_session, activity.id) == point_ids
+    assert db_session.query(ActivityQualityMetric.id).filter_by(activity_id=activity.id).scalar() == metric_id
+
+    changed = write_activity_streams(db_session, activity=activity, streams=_streams(last_time=50))
+    assert not changed.unchanged
+
+    # A missing metric forces a rewrite even when the stream is the same.
+    db_session.query(ActivityQualityMetric).filter_by(activity_id=activity.id).delete()
+    db_session.commit()
+    assert not write_activity_streams(db_session, activity=activity, streams=_streams(last_time=50)).unchanged
+
+
+@pytest.mark.integration
+def test_backfill_records_resolution_and_upgrades_coarse_tracks(db_session, monkeypatch, tmp_path):
+    user = User(strava_athlete_id=992002, firstname="Coarse", lastname="Track")
+    db_session.add(user)
+    db_session.flush()
+    coarse = Activity(strava_activity_id=992201, user_id=user.id, sport_type="Run")
+    full = Activity(strava_activity_id=992202, user_id=user.id, sport_type="Run", stream_resolution="full")
+    db_session.add_all([coarse, full])
+    db_session.commit()
+
+    requested: list[tuple[int, str | None]] = []
+
+    def fake_ingest(db, *, activity_id: int, resolution: str | None = None, **kwargs):
+        requested.append((activity_id, resolution))
+        activity = db.get(Activity, activity_id)
+        return write_activity_streams(db, activity=activity, streams=_streams(), resolution=resolution)
+
+    monkeypatch.setattr("app.ml.batch_ingest_streams.ingest_streams_for_activity", fake_ingest)
+
+    summary = backfill_activity_streams(
+        db_session,
+        only_missing_metrics=False,
+        resolution="low",
+        output_path=tmp_path / "coarse.json",
+    )
+    assert requested == [(coarse.id, "low")]
+    assert summary["resolution"] == "low"
+    db_session.refresh(coarse)
+    assert coarse.stream_resolution == "low"
+
+    requested.clear()
+    backfill_activity_streams(
+        db_session,
+        only_missing_metrics=False,
+        only_coarse=True,
+        output_path=tmp_path / "upgrade.json",
+    )
+    assert requested == [(coarse.id, None)]
+    db_session.refresh(coarse)
+    assert coarse.stream_resolution == "full"
@@ -17,7 +17,7 @@ class FakeStravaClient:
     def __init__(self, streams_payload: dict):
         self._streams_payload = streams_payload
 
-    def get_activity_streams(self, activity_id: int):
+    def get_activity_streams(self, activity_id: int, **kwargs):
         return self._streams_payload
 
 
@@ -171,3 +171,79 @@ def test_quality_endpoint_uses_persisted_metrics_when_points_are_missing(
     assert payload["activity_id"] == activity.id
     assert payload["point_count"] == 3
     assert payload["computed_at"] is not None
+
+
+@pytest.mark.integration
+def test_quality_timeline_endpoint_returns_windows(
+    api_client,
+    db_session,
+    monkeypatch,
+    authenticate_as,
+):
+    activity = _seed_activity(db_session)
+    authenticate_as(activity.user_id)
+    streams_payload = _fixture_streams_payload()
+
+    monkeypatch.setattr(
+        stream_ingest_service,
+        "build_strava_client",
+        lambda token: FakeStravaClient(streams_payload),
+    )
+    monkeypatch.setattr(
+        stream_ingest_service,
+        "persist_refreshed_token",
+        lambda *args, **kwargs: False,
+    )
+
+    _ingest_for_activity(api_client, activity.id)
+    response = api_client.get(f"/activities/{activity.id}/quality/timeline", params={"window_s": 5})
+    assert response.status_code == 200
+
+    payload = response.json()
+    assert payload["activity_id"] == activity.id
+    assert payload["window_s"] == 5
+    assert payload["window_count"] == len(payload["windows"])
+    assert sum(w["pair_count"] for w in payload["windows"]) == 2
+
+
+@pytest.mark.integration
+def test_ingest_writes_quality_event_index(
+    api_client,
+    db_session,
+    monkeypatch,
+    authenticate_as,
+):
+    activity = _seed_activity(db_session)
+    authenticate_as(activity.user_id)
+    streams_payload = {
+        "latlng": {"data": [[0.0, 0.0], [0.0, 0.0], [0.0, 0.0], [0.01, 0.0]]},
+        "time": {"data": [0, 10, 20, 30]},
+    }
+
+    monkeypatch.setattr(
+        stream_ingest_service,
+        "build_strava_client",
+        lambda token: FakeStravaClient(streams_payload),
+    )
+    monkeypatch.setattr(
+        stream_ingest_service,
+        "persist_refreshed_token",
+        lambda *args, **kwargs: False,
+    )
+
+    _ingest_for_activity(api_client, activity.id)
+
+    response = api_client.get(f"/activities/{activity.id}/quality/events")
+    assert response.status_code == 200
+    events = response.json()["events"]
+    assert [(e["event_type"], e["start_seq"], e["end_seq"]) for e in events] == [
+        ("stop", 0, 2),
+        ("spike", 2, 3),
+    ]
+
+    response = api_client.get(f"/activities/{activity.id}/quality/events", params={"event_type": "spike"})
+    assert response.status_code == 200
+    assert response.json()["event_count"] == 1
+
+    response = api_client.get(f"/activities/{activity.id}/quality/events", params={"event_type": "jump"})
+    assert response.status_code == 400
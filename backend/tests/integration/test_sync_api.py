@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+import httpx
 import pytest
 
-import app.routes.sync as sync_route
+import app.services.sync_jobs as sync_jobs
+from app.core.config import settings
+from app.integrations.strava import StravaClient
 from app.models.activity import Activity
 from app.models.strava_token import StravaToken
+from app.models.sync_job import SyncJob
 from app.models.user import User
+from app.services.activity_sync import load_sync_cursor
+from benchmarks.fake_strava import FakeStrava, synthetic_activities
 
 
 class _FakeStravaClient:
+    rate_limiter = None
+
     def __init__(self, payloads: list[list[dict]]):
         self._payloads = payloads
         self._index = 0
@@ -47,10 +57,17 @@ def _seed_user_with_token(
     return user
 
 
+def _run_queued_job(session_factory, monkeypatch, build_client):
+    monkeypatch.setattr(sync_jobs, "build_strava_client", build_client)
+    monkeypatch.setattr(sync_jobs, "persist_refreshed_token", lambda *args, **kwargs: None)
+    return sync_jobs.run_next_sync_job(session_factory)
+
+
 @pytest.mark.integration
 def test_sync_activities_uses_authenticated_users_token(
     api_client,
     db_session,
+    session_factory,
     monkeypatch,
     authenticate_as,
 ):
@@ -87,15 +104,200 @@ def test_sync_activities_uses_authenticated_users_token(
             ]
         )
 
-    monkeypatch.setattr(sync_route, "build_strava_client", fake_build_strava_client)
-    monkeypatch.setattr(sync_route, "persist_refreshed_token", lambda *args, **kwargs: None)
-
     response = api_client.post("/sync/activities")
 
-    assert response.status_code == 200
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    job = _run_queued_job(session_factory, monkeypatch, fake_build_strava_client)
+    assert job.id == response.json()["job_id"]
+    assert job.status == "succeeded"
     assert captured_access_tokens == ["access-token-2"]
 
     activities = db_session.query(Activity).all()
     assert len(activities) == 1
     assert activities[0].user_id == current_user.id
     assert activities[0].user_id != first_user.id
+
+
+def _summary(strava_id: int, name: str) -> dict:
+    return {
+        "id": strava_id,
+        "name": name,
+        "sport_type": "Ride",
+        "start_date": "2026-03-11T07:00:00Z",
+        "distance": 40_000.0,
+        "moving_time": 5400,
+        "total_elevation_gain": 300.0,
+    }
+
+
+@pytest.mark.integration
+def test_sync_activities_upserts_pages_and_reports_counts(
+    api_client,
+    db_session,
+    session_factory,
+    monkeypatch,
+    authenticate_as,
+):
+    other_user = _seed_user_with_token(db_session, athlete_id=900011, access_token="access-other")
+    current_user = _seed_user_with_token(db_session, athlete_id=900012, access_token="access-current")
+    db_session.add(Activity(strava_activity_id=555, user_id=current_user.id, name="Old name"))
+    db_session.add(Activity(strava_activity_id=777, user_id=other_user.id, name="Not mine"))
+    db_session.commit()
+    authenticate_as(current_user.id)
+
+    page = [_summary(555, "Renamed"), _summary(556, "New ride"), _summary(777, "Hijack"), _summary(556, "New ride 2")]
+    job_id = api_client.post("/sync/activities", params={"per_page": 10}).json()["job_id"]
+    _run_queued_job(session_factory, monkeypatch, lambda token: _FakeStravaClient([page, []]))
+
+    response = api_client.get(f"/sync/jobs/{job_id}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "succeeded"
+    assert {key: body[key] for key in ("count", "fetched", "inserted", "updated", "skipped", "pages")} == {
+        "count": 3,
+        "fetched": 4,
+        "inserted": 1,
+        "updated": 2,
+        "skipped": 1,
+        "pages": 1,
+    }
+    db_session.expire_all()
+    names = {a.strava_activity_id: (a.user_id, a.name) for a in db_session.query(Activity).all()}
+    assert names == {
+        555: (current_user.id, "Renamed"),
+        556: (current_user.id, "New ride 2"),
+        777: (other_user.id, "Not mine"),
+    }
+
+
+@pytest.mark.integration
+def test_sync_jobs_are_deduplicated_per_user_and_private(
+    api_client,
+    db_session,
+    session_factory,
+    monkeypatch,
+    authenticate_as,
+):
+    owner = _seed_user_with_token(db_session, athlete_id=900021, access_token="access-owner")
+    other = _seed_user_with_token(db_session, athlete_id=900022, access_token="access-other")
+    authenticate_as(owner.id)
+
+    first = api_client.post("/sync/activities", params={"max_pages": 5}).json()
+    second = api_client.post("/sync/activities").json()
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert second["job_id"] == first["job_id"]
+    assert second["params"]["max_pages"] == 5
+
+    _run_queued_job(session_factory, monkeypatch, lambda token: _FakeStravaClient([[_summary(901, "Ride")]]))
+    assert sync_jobs.run_next_sync_job(session_factory) is None
+    third = api_client.post("/sync/activities").json()
+    assert third["deduplicated"] is False
+    assert third["job_id"] != first["job_id"]
+
+    authenticate_as(other.id)
+    assert api_client.get(f"/sync/jobs/{first['job_id']}").status_code == 404
+
+
+@pytest.mark.integration
+def test_failed_sync_job_reports_error(api_client, db_session, session_factory, monkeypatch, authenticate_as):
+    user = _seed_user_with_token(db_session, athlete_id=900031, access_token="access-failing")
+    authenticate_as(user.id)
+    job_id = api_client.post("/sync/activities").json()["job_id"]
+
+    job = _run_queued_job(session_factory, monkeypatch, lambda token: _FakeStravaClient([{"message": "boom"}]))
+
+    assert job.status == "failed"
+    body = api_client.get(f"/sync/jobs/{job_id}").json()
+    assert body["status"] == "failed"
+    assert "Unexpected response" in body["error"]
+    assert body["finished_at"] is not None
+
+
+def _reclaim(session_factory, job_id: int) -> int:
+    with session_factory() as db:
+        job = db.get(SyncJob, job_id)
+        job.heartbeat_at = job.heartbeat_at - timedelta(hours=1)
+        db.commit()
+    job_id_again, attempt = sync_jobs.claim_next_job(session_factory, stale_after_s=60)
+    assert job_id_again == job_id
+    return attempt
+
+
+@pytest.mark.integration
+def test_reclaimed_sync_job_drops_the_old_runners_writes(
+    api_client,
+    db_session,
+    session_factory,
+    monkeypatch,
+    authenticate_as,
+):
+    user = _seed_user_with_token(db_session, athlete_id=900041, access_token="access-reclaimed")
+    authenticate_as(user.id)
+    job_id = api_client.post("/sync/activities").json()["job_id"]
+    claimed_id, first_attempt = sync_jobs.claim_next_job(session_factory, stale_after_s=60)
+    assert claimed_id == job_id
+    second_attempt = _reclaim(session_factory, job_id)
+
+    pages = [[_summary(911, "Ride")], []]
+    monkeypatch.setattr(sync_jobs, "build_strava_client", lambda token: _FakeStravaClient(pages))
+    monkeypatch.setattr(sync_jobs, "persist_refreshed_token", lambda *args, **kwargs: None)
+    job = sync_jobs.run_sync_job(session_factory, job_id, attempt=first_attempt)
+
+    assert (job.status, job.attempts, job.pages) == ("running", second_attempt, 0)
+    assert db_session.query(Activity).filter(Activity.user_id == user.id).count() == 0
+
+    job = sync_jobs.run_sync_job(session_factory, job_id, attempt=second_attempt)
+    assert (job.status, job.inserted) == ("succeeded", 1)
+
+
+@pytest.mark.integration
+def test_quota_wait_beats_the_heartbeat_until_reclaimed(api_client, db_session, session_factory, authenticate_as):
+    user = _seed_user_with_token(db_session, athlete_id=900042, access_token="access-waiting")
+    authenticate_as(user.id)
+    job_id = api_client.post("/sync/activities").json()["job_id"]
+    _, attempt = sync_jobs.claim_next_job(session_factory, stale_after_s=60)
+    with session_factory() as db:
+        claimed_heartbeat = db.get(SyncJob, job_id).heartbeat_at
+
+    sleep = sync_jobs._heartbeat_sleep(session_factory, job_id, attempt, interval_s=0.01)
+    sleep(0.03)
+    with session_factory() as db:
+        assert db.get(SyncJob, job_id).heartbeat_at > claimed_heartbeat
+
+    _reclaim(session_factory, job_id)
+    with pytest.raises(sync_jobs.JobReclaimedError):
+        sleep(0.03)
+
+
+@pytest.mark.integration
+def test_full_resync_job_imports_history_in_date_windows(
+    api_client,
+    db_session,
+    session_factory,
+    monkeypatch,
+    authenticate_as,
+):
+    user = _seed_user_with_token(db_session, athlete_id=900051, access_token="access-sharded")
+    authenticate_as(user.id)
+    history = synthetic_activities(90, history_days=365)
+    fake = FakeStrava(history)
+    monkeypatch.setattr(settings, "SYNC_SHARD_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "SYNC_SHARD_WINDOWS", 6)
+
+    def build_client(token):
+        http_client = httpx.Client(transport=fake.transport())
+        return StravaClient(token.access_token, base_url="http://strava.test/api/v3", http_client=http_client)
+
+    job_id = api_client.post("/sync/activities", params={"per_page": 20, "full_resync": True}).json()["job_id"]
+    job = _run_queued_job(session_factory, monkeypatch, build_client)
+
+    assert (job.id, job.status, job.fetched, job.inserted) == (job_id, "succeeded", 90, 90)
+    # Paged in sequence this history is five requests; six windows need at least one each.
+    assert fake.stats.snapshot()["requests"]["activities"] >= 6
+    assert db_session.query(Activity).filter(Activity.user_id == user.id).count() == 90
+    # Windows finish in any order; the cursor lands on the newest activity only once all are done.
+    assert load_sync_cursor(db_session, user.id).last_strava_activity_id == history[-1]["id"]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.ml.migrate_track_storage import migrate_track_storage
+from app.models.activity import Activity
+from app.models.activity_point import ActivityPoint
+from app.models.activity_track import ActivityTrack
+from app.models.user import User
+from app.services.point_loader import store_track
+from app.services.quality import compute_track_quality
+from app.services.quality_metrics import upsert_quality_metric_from_points, upsert_quality_metrics_from_points_batch
+from app.services.track import TRACK_STORAGE_PACKED, TRACK_STORAGE_POINTS, Track, load_track
+
+
+def _track(offset: float = 0.0) -> Track:
+    return Track(
+        np.array([50.0, 50.0, 50.0001, 50.0002, 50.0002]) + offset,
+        np.array([19.0, 19.0, 19.0001, 19.0002, 19.0002]),
+        np.array([0, 6, 12, 20, 40], dtype=np.int32),
+        np.array([210.0, np.nan, 211.0, 212.0, 212.0]),
+    )
+
+
+def _seed_activities(db_session, count: int) -> list[Activity]:
+    user = User(strava_athlete_id=991001, firstname="Packed", lastname="Track")
+    db_session.add(user)
+    db_session.flush()
+    activities = [Activity(strava_activity_id=991100 + i, user_id=user.id, sport_type="Run") for i in range(count)]
+    db_session.add_all(activities)
+    db_session.flush()
+    return activities
+
+
+@pytest.mark.integration
+def test_packed_storage_replaces_points_and_reads_back(db_session):
+    (activity,) = _seed_activities(db_session, 1)
+    track = _track()
+
+    store_track(db_session, activity_id=activity.id, track=track, storage=TRACK_STORAGE_POINTS)
+    store_track(db_session, activity_id=activity.id, track=track, storage=TRACK_STORAGE_PACKED)
+    db_session.commit()
+
+    assert db_session.query(ActivityPoint).filter(ActivityPoint.activity_id == activity.id).count() == 0
+    assert db_session.query(ActivityTrack).filter(ActivityTrack.activity_id == activity.id).count() == 1
+    stored = load_track(db_session, activity_id=activity.id)
+    assert np.array_equal(stored.lat, track.lat)
+    assert np.array_equal(stored.time, track.time)
+
+    metric = upsert_quality_metric_from_points(db_session, activity_id=activity.id)
+    expected = compute_track_quality(track)
+    assert metric.point_count == expected.point_count
+    assert metric.stopped_time_s == expected.stopped_time_s
+
+
+@pytest.mark.integration
+def test_batch_reads_mixed_storage(db_session):
+    packed, points = _seed_activities(db_session, 2)
+    store_track(db_session, activity_id=packed.id, track=_track(), storage=TRACK_STORAGE_PACKED)
+    store_track(db_session, activity_id=points.id, track=_track(0.001), storage=TRACK_STORAGE_POINTS)
+    db_session.commit()
+
+    metrics = upsert_quality_metrics_from_points_batch(db_session, activity_ids=[points.id, packed.id])
+
+    assert set(metrics) == {packed.id, points.id}
+    for activity_id, offset in ((packed.id, 0.0), (points.id, 0.001)):
+        expected = compute_track_quality(_track(offset))
+        assert metrics[activity_id].distance_m_gps == pytest.approx(expected.distance_m, rel=1e-6)
+
+
+@pytest.mark.integration
+def test_migrate_track_storage_round_trip(db_session):
+    activities = _seed_activities(db_session, 3)
+    for i, activity in enumerate(activities):
+        store_track(db_session, activity_id=activity.id, track=_track(i * 0.01), storage=TRACK_STORAGE_POINTS)
+    db_session.commit()
+
+    packed = migrate_track_storage(db_session, target=TRACK_STORAGE_PACKED, chunk_size=2, output_path=None)
+    assert packed["ok"] is True
+    assert packed["migrated_activities"] == 3
+    assert packed["migrated_points"] == 15
+    assert db_session.query(ActivityPoint).count() == 0
+
+    reverted = migrate_track_storage(db_session, target=TRACK_STORAGE_POINTS, output_path=None)
+    assert reverted["migrated_activities"] == 3
+    assert db_session.query(ActivityTrack).count() == 0
+    restored = load_track(db_session, activity_id=activities[2].id)
+    assert np.allclose(restored.lat, _track(0.02).lat)
+    assert np.array_equal(np.isnan(restored.ele), np.isnan(_track().ele))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from app.integrations.strava import StravaClient
+from app.services import activity_sync
+from app.services.activity_sync import ShardPlan, SyncParams, SyncProgress, iter_window_pages, split_windows
+from benchmarks.activity_sync import run_benchmarks
+from benchmarks.fake_strava import HISTORY_END, FakeStrava, FakeStravaConfig, synthetic_activities
+
+HISTORY_START = int(HISTORY_END.timestamp()) - 400 * 86_400
+
+
+def _client(fake: FakeStrava) -> StravaClient:
+    return StravaClient(
+        "token",
+        base_url="http://strava.test/api/v3",
+        http_client=httpx.Client(transport=fake.transport()),
+        backoff_base_s=0.0,
+        max_retries=0,
+    )
+
+
+def _starts_in(window: tuple[int, int], ts: int) -> bool:
+    after, before = window
+    return after < ts < before
+
+
+def test_split_windows_assign_every_start_to_exactly_one_window():
+    windows = split_windows(1_000, 1_100, 7)
+
+    assert len(windows) == 7
+    assert windows == sorted(windows, reverse=True)
+    for ts in range(1_001, 1_100):
+        assert sum(_starts_in(window, ts) for window in windows) == 1
+    assert split_windows(10, 13, 8) == [(11, 13), (10, 12), (10, 11)]
+    assert split_windows(10, 10, 4) == []
+
+
+def test_window_pages_fetch_every_activity_once():
+    history = synthetic_activities(230, history_days=365)
+    fake = FakeStrava(history)
+    progress = SyncProgress()
+    plan = ShardPlan(windows=6, concurrency=3, queue_size=2, history_start=HISTORY_START)
+
+    pages = list(iter_window_pages(_client(fake), SyncParams(per_page=20), progress, plan))
+
+    ids = [item["id"] for page in pages for item in page]
+    assert sorted(ids) == [a["id"] for a in history]
+    assert progress.complete
+    assert progress.fetched == 230
+    assert progress.pages == fake.stats.snapshot()["requests"]["activities"]
+    assert all(0 < len(page) <= 20 for page in pages)
+
+
+def test_window_pages_respect_an_explicit_range():
+    history = synthetic_activities(100, history_days=100)
+    fake = FakeStrava(history)
+    after, before = int(fake._start_ts[9]), int(fake._start_ts[60])
+    plan = ShardPlan(windows=4, concurrency=2, history_start=HISTORY_START)
+
+    pages = iter_window_pages(_client(fake), SyncParams(per_page=7, after=after, before=before), SyncProgress(), plan)
+
+    assert sorted(item["id"] for page in pages for item in page) == [a["id"] for a in history[10:60]]
+
+
+def test_window_pages_raise_the_first_error_and_stop_fetching():
+    config = FakeStravaConfig(rate_limit=(5, 1_000))
+    fake = FakeStrava(synthetic_activities(300, history_days=365), config=config)
+    progress = SyncProgress()
+    plan = ShardPlan(windows=12, concurrency=4, queue_size=1, history_start=HISTORY_START)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        list(iter_window_pages(_client(fake), SyncParams(per_page=10), progress, plan))
+
+    assert not progress.complete
+    assert not [t for t in threading.enumerate() if t.name.startswith("sync-window-")]
+    # Each fetch thread makes at most one request after the quota ran out.
+    assert fake.stats.snapshot()["statuses"]["429"] <= plan.concurrency
+
+
+def test_window_pages_stop_when_the_consumer_does():
+    fake = FakeStrava(synthetic_activities(300, history_days=365))
+    plan = ShardPlan(windows=12, concurrency=4, queue_size=1, history_start=HISTORY_START)
+
+    pages = iter_window_pages(_client(fake), SyncParams(per_page=10), SyncProgress(), plan)
+    next(pages)
+    pages.close()
+
+    assert not [t for t in threading.enumerate() if t.name.startswith("sync-window-")]
+    assert fake.stats.snapshot()["requests"]["activities"] < 30
+
+
+def test_failed_write_stops_window_fetchers(monkeypatch):
+    fake = FakeStrava(synthetic_activities(300, history_days=365))
+    plan = ShardPlan(windows=12, concurrency=4, queue_size=1, history_start=HISTORY_START)
+
+    def _failing_upsert(db, rows):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(activity_sync, "upsert_activities", _failing_upsert)
+    with pytest.raises(RuntimeError, match="database is gone"):
+        activity_sync.sync_activity_pages(None, _client(fake), user_id=1, params=SyncParams(per_page=10), shard=plan)
+
+    assert not [t for t in threading.enumerate() if t.name.startswith("sync-window-")]
+    assert fake.stats.snapshot()["requests"]["activities"] < 30
+
+
+def test_activity_sync_benchmark_matches_sequential_results(tmp_path):
+    output = tmp_path / "activity_sync.json"
+
+    summary = run_benchmarks(
+        activities=120,
+        per_page=10,
+        latency_ms=0.0,
+        write_ms=0.0,
+        concurrency=(2,),
+        windows=4,
+        output_path=output,
+    )
+
+    written = json.loads(output.read_text(encoding="utf-8"))
+    assert [row["name"] for row in written["results"]] == ["sequential", "windows_x2"]
+    assert all(row["activities"] == 120 for row in written["results"])
+    assert summary["results"][0]["speedup"] == 1.0
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from benchmarks.hot_paths import run_benchmarks, synthetic_track
+
+
+def test_synthetic_track_is_seeded_and_ordered():
+    a = synthetic_track(500, seed=1)
+    b = synthetic_track(500, seed=1)
+
+    assert len(a) == 500
+    assert np.array_equal(a.lat, b.lat) and np.array_equal(a.time, b.time)
+    assert np.all(np.diff(a.time) > 0)
+
+
+def test_run_benchmarks_writes_json_results(tmp_path):
+    output = tmp_path / "hot_paths.json"
+
+    summary = run_benchmarks(sizes=(200,), repeats=1, output_path=output)
+
+    written = json.loads(output.read_text(encoding="utf-8"))
+    names = {row["name"] for row in written["results"]}
+    assert {
+        "compute_quality[numpy,ndarray]",
+        "ingest.build_activity_points[orm]",
+        "ingest.encode_points_copy_binary",
+        "streams.points_geojson_features",
+        "ml_features._build_feature_payload",
+        "bootstrap_labels.evaluate_weak_label",
+    } <= names
+    assert all(row["points"] == 200 and row["median_ms"] >= 0 for row in written["results"])
+    assert summary["sizes"] == [200]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.integrations.strava import AsyncStravaClient, StravaClient
+from benchmarks.fake_strava import FakeStrava, FakeStravaConfig, FakeStravaServer, synthetic_activities
+
+NOW = 1_800_000_000.0
+
+
+def _client(fake: FakeStrava, **kwargs) -> StravaClient:
+    return StravaClient(
+        kwargs.pop("access_token", "token"),
+        base_url="http://strava.test/api/v3",
+        token_url="http://strava.test/oauth/token",
+        http_client=httpx.Client(transport=fake.transport()),
+        backoff_base_s=0.0,
+        **kwargs,
+    )
+
+
+def test_activities_page_newest_first_and_oldest_first_after_cursor():
+    fake = FakeStrava(synthetic_activities(25, history_days=25), clock=lambda: NOW)
+    client = _client(fake)
+
+    pages = [client.list_activities(per_page=10, page=page) for page in (1, 2, 3, 4)]
+    assert [len(page) for page in pages] == [10, 10, 5, 0]
+    ids = [a["id"] for page in pages for a in page]
+    assert ids == sorted(ids, reverse=True)
+    assert "_points" not in pages[0][0]
+
+    after = int(fake._start_ts[19])
+    forward = client.list_activities(per_page=10, after=after)
+    assert [a["id"] for a in forward] == [a["id"] for a in fake.activities[20:]]
+
+    window = client.list_activities(per_page=200, after=int(fake._start_ts[4]), before=int(fake._start_ts[9]))
+    assert len(window) == 4
+
+
+def test_streams_are_seeded_and_honour_resolution():
+    fake = FakeStrava(synthetic_activities(2), points_per_activity=3_600, clock=lambda: NOW)
+    client = _client(fake)
+    activity_id = fake.activities[0]["id"]
+
+    full = client.get_activity_streams(activity_id)
+    assert set(full) == {"latlng", "time", "altitude"}
+    assert len(full["latlng"]["data"]) == 3_600
+    assert client.get_activity_streams(activity_id) == full
+
+    low = client.get_activity_streams(activity_id, keys="latlng,time", resolution="low")
+    assert set(low) == {"latlng", "time"}
+    assert len(low["time"]["data"]) == 100
+    assert low["time"]["original_size"] == 3_600
+
+    with pytest.raises(httpx.HTTPStatusError) as excinfo:
+        client.get_activity_streams(1)
+    assert excinfo.value.response.status_code == 404
+
+
+def test_recorded_streams_are_served_verbatim(tmp_path):
+    recorded = {"latlng": {"data": [[50.0, 19.0], [50.1, 19.1]]}, "time": {"data": [0, 5]}}
+    activity = {"id": 7, "name": "Recorded", "sport_type": "Run", "start_date": "2024-05-01T07:00:00Z"}
+    path = tmp_path / "recording.json"
+    path.write_text(json.dumps({"activities": [activity], "streams": {"7": recorded}}))
+    fake = FakeStrava.from_recording(path, clock=lambda: NOW)
+
+    streams = _client(fake).get_activity_streams(7, keys="latlng,time")
+
+    assert streams["latlng"]["data"] == recorded["latlng"]["data"]
+    assert streams["time"]["data"] == [0, 5]
+
+
+def test_rate_limit_headers_and_quota_enforcement():
+    fake = FakeStrava(synthetic_activities(3), config=FakeStravaConfig(rate_limit=(2, 10)), clock=lambda: NOW)
+    http_client = httpx.Client(transport=fake.transport())
+    url = "http://strava.test/api/v3/athlete/activities"
+    headers = {"Authorization": "Bearer token"}
+
+    responses = [http_client.get(url, headers=headers) for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2,10"
+    assert [r.headers["X-RateLimit-Usage"] for r in responses] == ["1,1", "2,2", "3,3"]
+    assert http_client.get(url).status_code == 401
+    assert fake.stats.snapshot()["statuses"] == {"200": 2, "401": 1, "429": 1}
+
+
+def test_injected_faults_are_retried_by_the_client():
+    config = FakeStravaConfig(server_error_rate=0.3, rate_limited_rate=0.2, rate_limit=(10_000, 100_000), seed=3)
+    fake = FakeStrava(synthetic_activities(5), config=config, clock=lambda: NOW)
+    client = _client(fake, max_retries=10)
+
+    for _ in range(20):
+        assert len(client.list_activities()) == 5
+
+    statuses = fake.stats.snapshot()["statuses"]
+    assert statuses["200"] == 20
+    assert statuses.get("429", 0) > 0
+    assert sum(count for status, count in statuses.items() if status.startswith("5")) > 0
+
+
+def test_strict_tokens_rotate_on_refresh():
+    fake = FakeStrava(synthetic_activities(1), config=FakeStravaConfig(strict_tokens=True), clock=lambda: NOW)
+    issued = fake.issue_token()
+    client = _client(
+        fake,
+        access_token="forged",
+        refresh_token=issued["refresh_token"],
+        client_id="id",
+        client_secret="secret",
+    )
+
+    assert len(client.list_activities()) == 1
+    assert client.access_token == "fake-access-2"
+    assert fake.stats.snapshot()["token_refreshes"] == 1
+
+    # The first refresh rotated the issued refresh token away.
+    stale = _client(fake, access_token="x", refresh_token=issued["refresh_token"], client_id="i", client_secret="s")
+    with pytest.raises(httpx.HTTPStatusError):
+        stale.list_activities()
+
+
+def test_server_serves_sync_and_async_clients_over_http():
+    fake = FakeStrava(synthetic_activities(4), config=FakeStravaConfig(latency_s=0.01))
+
+    with FakeStravaServer(fake) as server:
+        client = StravaClient("token", base_url=server.api_base_url, token_url=server.token_url)
+        assert len(client.list_activities()) == 4
+
+        async def _fetch_streams() -> list:
+            in_process = httpx.AsyncClient(transport=fake.async_transport())
+            async with in_process, httpx.AsyncClient() as remote:
+                local = AsyncStravaClient("token", http_client=in_process, base_url="http://strava.test/api/v3")
+                over_http = AsyncStravaClient("token", http_client=remote, base_url=server.api_base_url)
+                activity_id = fake.activities[0]["id"]
+                return await asyncio.gather(
+                    local.aget_activity_streams(activity_id, resolution="low"),
+                    over_http.aget_activity_streams(activity_id, resolution="low"),
+                )
+
+        local, over_http = asyncio.run(_fetch_streams())
+
+    assert local == over_http
+    assert fake.stats.snapshot()["requests"] == {"activities": 1, "streams": 2}
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services.ingest_pipeline import IngestItem, PipelineStage, StreamFetchJob, run_ingest_pipeline
+
+
+def _jobs(n: int) -> list[StreamFetchJob]:
+    return [StreamFetchJob(activity_id=i, strava_activity_id=1000 + i, user_id=1) for i in range(n)]
+
+
+def test_pipeline_runs_stages_concurrently_and_routes_errors_to_last_stage() -> None:
+    written: dict[int, IngestItem] = {}
+    parse_threads: set[int] = set()
+
+    async def fetch(item: IngestItem) -> None:
+        await asyncio.sleep(0.002)
+        if item.job.activity_id == 3:
+            raise httpx.ConnectError("boom")
+        item.streams = {"id": item.job.strava_activity_id}
+
+    def parse(item: IngestItem) -> None:
+        parse_threads.add(threading.get_ident())
+        time.sleep(0.002)
+        if item.job.activity_id == 5:
+            raise ValueError("bad payload")
+        item.parsed = item.streams["id"] * 2
+
+    def write(item: IngestItem) -> None:
+        written[item.job.activity_id] = item
+
+    stats = asyncio.run(
+        run_ingest_pipeline(
+            _jobs(24),
+            [
+                PipelineStage("fetch", fetch, workers=4),
+                PipelineStage("parse", parse, workers=2, blocking=True),
+                PipelineStage("write", write, workers=1, blocking=True),
+            ],
+            queue_size=2,
+        )
+    )
+    fetch_stats, parse_stats, write_stats = stats
+
+    assert sorted(written) == list(range(24))
+    assert isinstance(written[3].error, httpx.ConnectError) and written[3].parsed is None
+    assert isinstance(written[5].error, ValueError)
+    assert written[7].parsed == 2 * 1007
+    assert (fetch_stats.processed, fetch_stats.errors) == (23, 1)
+    assert (parse_stats.processed, parse_stats.errors, parse_stats.passed_through) == (22, 1, 1)
+    assert write_stats.processed == 24
+    assert 1 < fetch_stats.max_in_flight <= 4
+    assert parse_stats.max_in_flight <= 2
+    assert parse_stats.max_queue_depth <= 2 and write_stats.max_queue_depth <= 2
+    assert threading.get_ident() not in parse_threads
+
+    summary = parse_stats.to_summary(elapsed_s=1.0)
+    assert summary["throughput_per_s"] == 22.0
+    assert summary["queue_size"] == 2
+    assert 0 < summary["utilization"] <= 1
+
+
+def test_pipeline_aborts_when_last_stage_raises() -> None:
+    async def fetch(item: IngestItem) -> None:
+        item.streams = {}
+
+    def write(item: IngestItem) -> None:
+        raise RuntimeError("db down")
+
+    stages = [PipelineStage("fetch", fetch, workers=2), PipelineStage("write", write, blocking=True)]
+    with pytest.raises(RuntimeError, match="db down"):
+        asyncio.run(run_ingest_pipeline(_jobs(50), stages, queue_size=1))
+
+
+def test_pipeline_rejects_invalid_configuration() -> None:
+    async def noop(item: IngestItem) -> None:
+        return None
+
+    with pytest.raises(ValueError, match="worker"):
+        asyncio.run(run_ingest_pipeline([], [PipelineStage("fetch", noop, workers=0)], queue_size=1))
+    with pytest.raises(ValueError, match="queue_size"):
+        asyncio.run(run_ingest_pipeline([], [PipelineStage("fetch", noop)], queue_size=0))
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import pytest
+
+from app.ml.recompute_metrics import shard_activity_ids
+
+
+def test_shard_activity_ids_splits_into_fixed_size_chunks():
+    assert shard_activity_ids([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert shard_activity_ids([], 3) == []
+
+
+def test_shard_activity_ids_rejects_non_positive_chunk_size():
+    with pytest.raises(ValueError):
+        shard_activity_ids([1], 0)
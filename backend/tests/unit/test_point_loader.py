@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+from shapely import wkb
+
+from app.services.point_loader import encode_points_copy_binary
+from app.services.track import Track
+
+
+def _decode_copy_binary(payload: bytes) -> list[tuple]:
+    assert payload.startswith(b"PGCOPY\n\xff\r\n\x00")
+    pos = 11 + 8
+    rows = []
+    while True:
+        (nfields,) = struct.unpack_from(">h", payload, pos)
+        pos += 2
+        if nfields == -1:
+            break
+        fields = []
+        for _ in range(nfields):
+            (length,) = struct.unpack_from(">i", payload, pos)
+            pos += 4
+            if length == -1:
+                fields.append(None)
+                continue
+            fields.append(payload[pos : pos + length])
+            pos += length
+        rows.append(tuple(fields))
+    assert pos == len(payload)
+    return rows
+
+
+def test_encode_points_copy_binary_round_trips_fields():
+    track = Track(
+        np.array([50.0, 50.0001, 50.0002]),
+        np.array([19.0, 19.0001, -179.5]),
+        np.array([0, 1, 4], dtype=np.int32),
+        np.array([210.4, np.nan, 212.6]),
+    )
+
+    rows = _decode_copy_binary(encode_points_copy_binary(42, track))
+
+    decoded = {}
+    for activity_id, seq, time_s, geom, ele in rows:
+        point = wkb.loads(geom)
+        decoded[struct.unpack(">i", seq)[0]] = (
+            struct.unpack(">i", activity_id)[0],
+            struct.unpack(">i", time_s)[0],
+            point.x,
+            point.y,
+            None if ele is None else struct.unpack(">i", ele)[0],
+        )
+        assert geom[1:9] == struct.pack("<II", 0x20000001, 4326)
+
+    assert decoded == {
+        0: (42, 0, 19.0, 50.0, 210),
+        1: (42, 1, 19.0001, 50.0001, None),
+        2: (42, 4, -179.5, 50.0002, 213),
+    }
+
+
+def test_encode_points_copy_binary_empty_track_is_header_and_trailer():
+    assert _decode_copy_binary(encode_points_copy_binary(1, Track.empty())) == []
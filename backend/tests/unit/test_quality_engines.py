@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import random
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from app.services.quality import (
+    DISTANCE_EQUIRECTANGULAR,
+    DISTANCE_HAVERSINE,
+    ENGINE_NUMPY,
+    ENGINE_PYTHON,
+    EVENT_SPIKE,
+    EVENT_STOP,
+    EQUIRECTANGULAR_MAX_RELATIVE_ERROR,
+    QualityAccumulator,
+    _pair_distances_m,
+    build_pair_series,
+    compute_quality,
+    compute_quality_batch,
+    detect_quality_events,
+    detect_quality_events_batch,
+    haversine_m,
+    haversine_m_np,
+)
+
+
+def _synthetic_track(n: int, *, seed: int) -> tuple[list[tuple[float, float]], list[int]]:
+    """Random-walk track with stops, spikes and duplicate/backwards timestamps."""
+    rng = random.Random(seed)
+    lat, lon, t = 50.06, 19.94, 0
+    latlons: list[tuple[float, float]] = []
+    times: list[int] = []
+    for _ in range(n):
+        latlons.append((lat, lon))
+        times.append(t)
+        roll = rng.random()
+        if roll < 0.10:
+            pass  # stationary sample -> stop candidate
+        elif roll < 0.13:
+            lat += rng.uniform(-0.003, 0.003)  # GPS jump -> spike
+            lon += rng.uniform(-0.003, 0.003)
+        else:
+            lat += rng.uniform(-0.00003, 0.00003)
+            lon += rng.uniform(-0.00003, 0.00003)
+        step = rng.random()
+        if step < 0.02:
+            t += 0
+        elif step < 0.03:
+            t -= 1
+        else:
+            t += rng.choice((1, 1, 1, 2, 5))
+    return latlons, times
+
+
+def _assert_reports_match(left, right) -> None:
+    a, b = asdict(left), asdict(right)
+    for key in ("point_count", "duration_s", "spike_count", "stopped_time_s", "stop_segments"):
+        assert a[key] == b[key], key
+    for key in ("distance_m", "max_speed_mps", "jitter_score"):
+        assert a[key] == pytest.approx(b[key], rel=1e-9, abs=1e-9), key
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 50, 2_000])
+def test_numpy_engine_matches_python_engine(n: int, seed: int):
+    latlons, times = _synthetic_track(n, seed=seed)
+
+    expected = compute_quality(latlons, times, engine=ENGINE_PYTHON)
+    actual = compute_quality(latlons, times, engine=ENGINE_NUMPY)
+
+    _assert_reports_match(actual, expected)
+
+
+@pytest.mark.parametrize(
+    "thresholds",
+    [
+        {"spike_speed_mps": 3.0, "stop_speed_mps": 0.1, "stop_min_duration_s": 1},
+        {"spike_speed_mps": 8.0, "stop_speed_mps": 2.0, "stop_min_duration_s": 30},
+        {"spike_speed_mps": 50.0, "stop_speed_mps": 0.0, "stop_min_duration_s": 0},
+    ],
+)
+def test_numpy_engine_matches_python_engine_for_custom_thresholds(thresholds):
+    latlons, times = _synthetic_track(3_000, seed=42)
+
+    expected = compute_quality(latlons, times, engine=ENGINE_PYTHON, **thresholds)
+    actual = compute_quality(latlons, times, engine=ENGINE_NUMPY, **thresholds)
+
+    _assert_reports_match(actual, expected)
+
+
+def test_numpy_engine_accepts_arrays():
+    latlons, times = _synthetic_track(500, seed=7)
+
+    expected = compute_quality(latlons, times, engine=ENGINE_PYTHON)
+    actual = compute_quality(np.asarray(latlons), np.asarray(times), engine=ENGINE_NUMPY)
+
+    _assert_reports_match(actual, expected)
+
+
+def test_numpy_engine_with_only_non_increasing_timestamps():
+    latlons = [(0.0, 0.0), (0.001, 0.0), (0.002, 0.0)]
+    times = [10, 10, 5]
+
+    expected = compute_quality(latlons, times, engine=ENGINE_PYTHON)
+    actual = compute_quality(latlons, times, engine=ENGINE_NUMPY)
+
+    _assert_reports_match(actual, expected)
+    assert actual.duration_s == 5
+
+
+def test_haversine_np_matches_scalar():
+    lat1 = np.array([50.0, 0.0, -33.9, 89.9])
+    lon1 = np.array([19.0, 0.0, 151.2, 0.0])
+    lat2 = np.array([50.0001, 0.001, -33.91, 89.9])
+    lon2 = np.array([19.0001, 0.0, 151.21, 180.0])
+
+    result = haversine_m_np(lat1, lon1, lat2, lon2)
+
+    for i in range(lat1.size):
+        assert result[i] == pytest.approx(haversine_m(lat1[i], lon1[i], lat2[i], lon2[i]), rel=1e-12)
+
+
+@pytest.mark.parametrize("hop_deg", [0.0, 1e-5, 0.3, 5.0])
+def test_haversine_pair_distances_match_scalar_for_short_and_long_hops(hop_deg: float):
+    # Short hops use the small-angle series; the hop at index 99 goes through the trig fallback.
+    rng = np.random.default_rng(3)
+    lat = 50.06 + np.cumsum(rng.normal(0.0, 3e-5, 200))
+    lon = 19.94 + np.cumsum(rng.normal(0.0, 3e-5, 200))
+    lat[100:] += hop_deg
+    lon[100:] -= hop_deg
+
+    result = _pair_distances_m(lat, lon, DISTANCE_HAVERSINE)
+
+    expected = [haversine_m(lat[i], lon[i], lat[i + 1], lon[i + 1]) for i in range(lat.size - 1)]
+    assert result == pytest.approx(expected, rel=1e-12)
+
+
+def test_numpy_engine_rejects_ragged_lists():
+    with pytest.raises(ValueError):
+        compute_quality([(0.0, 0.0), (0.0,)], [0, 1], engine=ENGINE_NUMPY)
+
+
+def test_compute_quality_rejects_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown quality engine"):
+        compute_quality([(0.0, 0.0), (0.0, 0.001)], [0, 1], engine="fortran")
+
+
+def _concat(tracks):
+    lat = [p[0] for latlons, _ in tracks for p in latlons]
+    lon = [p[1] for latlons, _ in tracks for p in latlons]
+    times = [t for _, ts in tracks for t in ts]
+    offsets = [0]
+    for latlons, _ in tracks:
+        offsets.append(offsets[-1] + len(latlons))
+    return lat, lon, times, offsets
+
+
+def test_batch_matches_per_activity_reports():
+    tracks = [_synthetic_track(n, seed=seed) for seed, n in enumerate([0, 1, 2, 40, 1_500, 3, 800])]
+    lat, lon, times, offsets = _concat(tracks)
+
+    reports = compute_quality_batch(lat, lon, times, offsets)
+
+    assert len(reports) == len(tracks)
+    for report, (latlons, ts) in zip(reports, tracks):
+        _assert_reports_match(report, compute_quality(latlons, ts, engine=ENGINE_PYTHON))
+
+
+def test_batch_masks_pairs_across_activity_boundaries():
+    # Second activity starts far away and "later": a cross-boundary pair would be a huge spike.
+    first = ([(0.0, 0.0), (0.0, 0.0), (0.0, 0.0)], [0, 10, 20])
+    second = ([(10.0, 10.0), (10.0, 10.0)], [21, 31])
+    lat, lon, times, offsets = _concat([first, second])
+
+    reports = compute_quality_batch(lat, lon, times, offsets, stop_min_duration_s=10)
+
+    assert [r.spike_count for r in reports] == [0, 0]
+    assert [r.distance_m for r in reports] == [0.0, 0.0]
+    # Stops at the end of one activity and the start of the next stay separate segments.
+    assert [r.stop_segments for r in reports] == [1, 1]
+    assert [r.stopped_time_s for r in reports] == [20, 10]
+
+
+def test_batch_rejects_inconsistent_offsets():
+    with pytest.raises(ValueError, match="offsets"):
+        compute_quality_batch([0.0, 0.0], [0.0, 0.0], [0, 1], [0, 3])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 10_000])
+@pytest.mark.parametrize("seed", range(4))
+def test_accumulator_matches_python_engine_for_any_chunking(chunk_size: int, seed: int):
+    latlons, times = _synthetic_track(1_200, seed=seed)
+    lat = [p[0] for p in latlons]
+    lon = [p[1] for p in latlons]
+
+    acc = QualityAccumulator(spike_speed_mps=8.0, stop_speed_mps=0.6, stop_min_duration_s=3)
+    for start in range(0, len(times), chunk_size):
+        end = start + chunk_size
+        acc.add_chunk(lat[start:end], lon[start:end], times[start:end])
+
+    expected = compute_quality(
+        latlons,
+        times,
+        spike_speed_mps=8.0,
+        stop_speed_mps=0.6,
+        stop_min_duration_s=3,
+        engine=ENGINE_PYTHON,
+    )
+    _assert_reports_match(acc.report(), expected)
+
+
+def test_accumulator_carries_stop_across_chunks():
+    acc = QualityAccumulator(stop_min_duration_s=10)
+    acc.add_chunk([0.0, 0.0], [0.0, 0.0], [0, 6])
+    acc.add_chunk([0.0], [0.0], [12])
+    acc.add_chunk([0.01], [0.0], [13])
+
+    report = acc.report()
+
+    assert report.stop_segments == 1
+    assert report.stopped_time_s == 12
+
+
+def test_accumulator_with_fewer_than_two_points():
+    acc = QualityAccumulator()
+    acc.add_chunk([], [], [])
+    acc.add_chunk([50.0], [19.0], [0])
+
+    assert acc.report().point_count == 1
+    assert acc.report().distance_m == 0.0
+
+
+def test_detect_quality_events_matches_report_counts():
+    latlons, times = _synthetic_track(2_000, seed=3)
+    coords = np.asarray(latlons)
+    pairs = build_pair_series(coords[:, 0], coords[:, 1], times, [0, len(times)])
+
+    events = detect_quality_events(pairs, times, spike_speed_mps=8.0, stop_min_duration_s=3)
+    report = compute_quality(latlons, times, spike_speed_mps=8.0, stop_min_duration_s=3)
+
+    stops = [e for e in events if e.event_type == EVENT_STOP]
+    spikes = [e for e in events if e.event_type == EVENT_SPIKE]
+    assert len(stops) == report.stop_segments
+    assert spikes and len(spikes) <= report.spike_count
+    assert all(e.peak_speed_mps >= 8.0 for e in spikes)
+
+
+def test_detect_quality_events_locates_segments_by_point_index():
+    latlons = [(0.0, 0.0), (0.0, 0.0), (0.0, 0.0), (0.01, 0.0), (0.02, 0.0), (0.02001, 0.0)]
+    times = [0, 10, 20, 30, 40, 50]
+    coords = np.asarray(latlons)
+    pairs = build_pair_series(coords[:, 0], coords[:, 1], times, [0, len(times)])
+
+    events = detect_quality_events(pairs, times)
+
+    assert [(e.event_type, e.start_index, e.end_index) for e in events] == [
+        (EVENT_STOP, 0, 2),
+        (EVENT_SPIKE, 2, 4),
+        (EVENT_STOP, 4, 5),
+    ]
+    assert events[0].end_time_s - events[0].start_time_s == 20
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 10_000])
+@pytest.mark.parametrize("seed", range(4))
+def test_accumulator_events_match_detect_quality_events_for_any_chunking(chunk_size: int, seed: int):
+    latlons, times = _synthetic_track(1_200, seed=seed)
+    coords = np.asarray(latlons)
+    pairs = build_pair_series(coords[:, 0], coords[:, 1], times, [0, len(times)])
+    expected = detect_quality_events(pairs, times, spike_speed_mps=8.0, stop_min_duration_s=3)
+
+    acc = QualityAccumulator(spike_speed_mps=8.0, stop_speed_mps=0.6, stop_min_duration_s=3, record_events=True)
+    for start in range(0, len(times), chunk_size):
+        end = start + chunk_size
+        acc.add_chunk(coords[start:end, 0], coords[start:end, 1], times[start:end])
+
+    assert acc.events() == expected
+
+
+def test_batch_events_are_per_activity_and_never_span_activities():
+    tracks = [_synthetic_track(n, seed=seed) for n, seed in ((300, 1), (2, 2), (450, 3))]
+    lat = np.concatenate([np.asarray(latlons)[:, 0] for latlons, _ in tracks])
+    lon = np.concatenate([np.asarray(latlons)[:, 1] for latlons, _ in tracks])
+    times = np.concatenate([times for _, times in tracks])
+    offsets = np.cumsum([0] + [len(times) for _, times in tracks])
+
+    batch = detect_quality_events_batch(build_pair_series(lat, lon, times, offsets), times, offsets)
+
+    for (latlons, track_times), events in zip(tracks, batch):
+        coords = np.asarray(latlons)
+        pairs = build_pair_series(coords[:, 0], coords[:, 1], track_times, [0, len(track_times)])
+        assert events == detect_quality_events(pairs, track_times)
+
+
+def test_event_peak_speed_covers_only_the_event():
+    latlons = [(0.0, 0.0), (0.0, 0.0), (0.0, 0.0), (0.01, 0.0), (0.02, 0.0), (0.02001, 0.0)]
+    times = [0, 10, 20, 30, 40, 50]
+    coords = np.asarray(latlons)
+    pairs = build_pair_series(coords[:, 0], coords[:, 1], times, [0, len(times)])
+
+    stops = [e for e in detect_quality_events(pairs, times) if e.event_type == EVENT_STOP]
+
+    assert stops[0].peak_speed_mps == 0.0
+    assert stops[1].peak_speed_mps < 0.6
+
+
+@pytest.mark.parametrize("base_lat", [0.0, 30.0, 50.06, 65.0, 79.9, -45.0])
+def test_equirectangular_distances_stay_within_documented_error(base_lat: float):
+    rng = np.random.default_rng(7)
+    n = 20_000
+    # Mostly short hops, some multi-kilometre jumps that must fall back to haversine.
+    step = rng.normal(0.0, 0.0002, size=(n, 2))
+    step[rng.random(n) < 0.01] *= 200.0
+    lat = np.clip(base_lat + np.cumsum(step[:, 0]), -89.0, 89.0)
+    lon = 19.94 + np.cumsum(step[:, 1])
+
+    fast = _pair_distances_m(lat, lon, DISTANCE_EQUIRECTANGULAR)
+    exact = _pair_distances_m(lat, lon, DISTANCE_HAVERSINE)
+
+    moving = exact > 0
+    rel_error = np.abs(fast[moving] - exact[moving]) / exact[moving]
+    assert rel_error.max() <= EQUIRECTANGULAR_MAX_RELATIVE_ERROR
+    assert np.all(fast[~moving] == 0.0)
+
+
+def test_equirectangular_handles_antimeridian_crossing():
+    lat = np.array([10.0, 10.0001, 10.0002])
+    lon = np.array([179.9999, -179.9999, -179.9998])
+
+    fast = _pair_distances_m(lat, lon, DISTANCE_EQUIRECTANGULAR)
+    exact = _pair_distances_m(lat, lon, DISTANCE_HAVERSINE)
+
+    assert fast == pytest.approx(exact, rel=EQUIRECTANGULAR_MAX_RELATIVE_ERROR)
+
+
+def test_equirectangular_report_records_mode_and_matches_haversine():
+    latlons, times = _synthetic_track(3_000, seed=11)
+
+    fast = compute_quality(latlons, times, distance_mode=DISTANCE_EQUIRECTANGULAR)
+    exact = compute_quality(latlons, times)
+
+    assert fast.distance_mode == DISTANCE_EQUIRECTANGULAR
+    assert exact.distance_mode == DISTANCE_HAVERSINE
+    assert fast.distance_m == pytest.approx(exact.distance_m, rel=EQUIRECTANGULAR_MAX_RELATIVE_ERROR)
+    batch = compute_quality_batch(
+        [p[0] for p in latlons],
+        [p[1] for p in latlons],
+        times,
+        [0, len(times)],
+        distance_mode=DISTANCE_EQUIRECTANGULAR,
+    )[0]
+    assert batch.distance_mode == DISTANCE_EQUIRECTANGULAR
+    assert batch.distance_m == pytest.approx(fast.distance_m, rel=1e-9)
+
+
+def test_compute_quality_rejects_unsupported_distance_modes():
+    with pytest.raises(ValueError, match="Unknown distance mode"):
+        compute_quality([(0.0, 0.0), (0.0, 0.001)], [0, 1], distance_mode="vincenty")
+    with pytest.raises(ValueError, match="python"):
+        compute_quality(
+            [(0.0, 0.0), (0.0, 0.001)],
+            [0, 1],
+            engine=ENGINE_PYTHON,
+            distance_mode=DISTANCE_EQUIRECTANGULAR,
+        )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.quality import ENGINE_PYTHON, build_pair_series, compute_quality
+from app.services.quality_sweep import ThresholdGrid, sweep_pair_series
+
+
+def _tracks():
+    return {
+        11: (
+            [(0.0, 0.0), (0.0, 0.0), (0.001, 0.0), (0.001, 0.0), (0.0011, 0.0), (0.0011, 0.0)],
+            [0, 15, 20, 35, 40, 47],
+        ),
+        12: ([(50.0, 19.0)], [0]),
+        13: (
+            [(50.0, 19.0), (50.0001, 19.0001), (50.0001, 19.0001), (50.001, 19.001)],
+            [0, 10, 25, 30],
+        ),
+    }
+
+
+def _pair_series(tracks):
+    lat, lon, times, offsets = [], [], [], [0]
+    for latlons, ts in tracks.values():
+        lat.extend(p[0] for p in latlons)
+        lon.extend(p[1] for p in latlons)
+        times.extend(ts)
+        offsets.append(len(times))
+    return build_pair_series(lat, lon, times, offsets)
+
+
+def test_sweep_matches_compute_quality_for_every_combination():
+    tracks = _tracks()
+    grid = ThresholdGrid(
+        spike_speeds_mps=(5.0, 12.0),
+        stop_speeds_mps=(0.3, 0.6, 2.0),
+        stop_min_durations_s=(5, 10, 20),
+    )
+
+    rows = sweep_pair_series(_pair_series(tracks), grid, activity_ids=list(tracks))
+
+    # Activity 12 has a single point and is skipped.
+    assert len(rows) == 2 * grid.size
+    for row in rows:
+        expected = compute_quality(
+            *tracks[row["activity_id"]],
+            spike_speed_mps=row["spike_speed_mps"],
+            stop_speed_mps=row["stop_speed_mps"],
+            stop_min_duration_s=row["stop_min_duration_s"],
+            engine=ENGINE_PYTHON,
+        )
+        assert row["spike_count"] == expected.spike_count
+        assert row["stopped_time_s"] == expected.stopped_time_s
+        assert row["stop_segments"] == expected.stop_segments
+        assert row["distance_m"] == pytest.approx(expected.distance_m, rel=1e-9)
+        assert row["jitter_score"] == pytest.approx(expected.jitter_score, rel=1e-9)
+
+
+def test_threshold_grid_requires_values_on_every_axis():
+    with pytest.raises(ValueError):
+        ThresholdGrid(spike_speeds_mps=(12.0,), stop_speeds_mps=(), stop_min_durations_s=(10,))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.services.quality import compute_quality
+from app.services.quality_timeline import TimelineCache, compute_quality_timeline
+
+
+def _arrays(latlons, times):
+    coords = np.asarray(latlons, dtype=np.float64)
+    return coords[:, 0], coords[:, 1], np.asarray(times, dtype=np.int64)
+
+
+def test_timeline_windows_sum_to_whole_activity_metrics():
+    latlons = [(0.0, 0.0), (0.0, 0.0), (0.001, 0.0), (0.001, 0.0), (0.0011, 0.0), (0.0012, 0.0)]
+    times = [0, 15, 20, 35, 50, 65]
+
+    windows = compute_quality_timeline(*_arrays(latlons, times), window_s=30)
+    report = compute_quality(latlons, times)
+
+    assert [w["start_s"] for w in windows] == [0, 30, 60]
+    assert sum(w["pair_count"] for w in windows) == len(times) - 1
+    assert sum(w["spike_count"] for w in windows) == report.spike_count
+    assert sum(w["stopped_time_s"] for w in windows) == report.stopped_time_s
+    assert sum(w["distance_m"] for w in windows) == pytest.approx(report.distance_m)
+
+
+def test_timeline_localizes_spike_and_stop():
+    latlons = [(0.0, 0.0)] * 4 + [(0.01, 0.0), (0.01001, 0.0)]
+    times = [0, 10, 20, 30, 40, 50]
+
+    windows = compute_quality_timeline(*_arrays(latlons, times), window_s=30)
+
+    assert windows[0]["stopped_fraction"] == pytest.approx(1.0)
+    assert windows[0]["spike_count"] == 0
+    assert windows[1]["spike_count"] == 1
+    assert windows[1]["spike_density"] is not None
+
+
+def test_timeline_requires_positive_window():
+    with pytest.raises(ValueError):
+        compute_quality_timeline(*_arrays([(0.0, 0.0), (0.0, 0.0)], [0, 1]), window_s=0)
+
+
+def test_timeline_cache_evicts_least_recently_used():
+    cache = TimelineCache(maxsize=2)
+    cache.put(("a",), [{"w": 1}])
+    cache.put(("b",), [{"w": 2}])
+    assert cache.get(("a",)) == [{"w": 1}]
+    cache.put(("c",), [{"w": 3}])
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    assert cache.hits == 2
+    assert cache.misses == 1
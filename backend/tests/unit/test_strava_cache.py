@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.integrations.strava import StravaClient
+from app.integrations.strava_cache import CODEC_GZIP, StreamCache
+
+PARAMS = {"keys": "latlng,time,altitude", "key_by_type": "true"}
+
+
+def _payload(n: int) -> dict:
+    return {"time": {"data": list(range(n))}, "latlng": {"data": [[50.0 + i * 1e-5, 19.0] for i in range(n)]}}
+
+
+def test_round_trip_is_compressed_and_keyed_by_params(tmp_path):
+    cache = StreamCache(tmp_path, max_bytes=10**7, codec=CODEC_GZIP)
+    payload = _payload(2000)
+
+    assert cache.get(1, PARAMS) is None
+    cache.put(1, PARAMS, payload)
+
+    assert cache.get(1, PARAMS) == payload
+    assert cache.get(1, {**PARAMS, "resolution": "low"}) is None
+    assert cache.get(2, PARAMS) is None
+    (entry,) = tmp_path.iterdir()
+    assert entry.name.startswith("1-") and entry.name.endswith(".json.gz")
+    assert entry.stat().st_size < len(str(payload)) / 3
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 3, 1)
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = StreamCache(tmp_path, max_bytes=10**7, codec=CODEC_GZIP)
+    for activity_id in range(3):
+        cache.put(activity_id, PARAMS, _payload(500 + activity_id))
+        path = next(tmp_path.glob(f"{activity_id}-*"))
+        os.utime(path, (1_000 + activity_id, 1_000 + activity_id))
+    entry_size = max(p.stat().st_size for p in tmp_path.iterdir())
+
+    # Reading 0 makes 1 the least recently used entry.
+    assert cache.get(0, PARAMS) is not None
+    cache.max_bytes = 3 * entry_size
+    cache.put(3, PARAMS, _payload(503))
+
+    assert cache.get(1, PARAMS) is None
+    assert all(cache.get(i, PARAMS) is not None for i in (0, 2, 3))
+    assert cache.stats.evictions == 1
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = StreamCache(tmp_path, max_bytes=10**7, codec=CODEC_GZIP)
+    cache.put(7, PARAMS, _payload(10))
+    next(tmp_path.iterdir()).write_bytes(b"not gzip")
+
+    assert cache.get(7, PARAMS) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_unknown_codec(tmp_path):
+    with pytest.raises(ValueError, match="codec"):
+        StreamCache(tmp_path, max_bytes=1, codec="lz4")
+
+
+def test_client_reads_cache_first_unless_refresh(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_request(**kwargs):
+        calls.append(kwargs["url"])
+        return httpx.Response(200, json=_payload(len(calls)), request=httpx.Request("GET", kwargs["url"]))
+
+    monkeypatch.setattr("app.integrations.strava.httpx.request", fake_request)
+    client = StravaClient("token", stream_cache=StreamCache(tmp_path, max_bytes=10**7, codec=CODEC_GZIP))
+
+    first = client.get_activity_streams(42)
+    assert client.get_activity_streams(42) == first
+    assert len(calls) == 1
+
+    refreshed = client.get_activity_streams(42, refresh=True)
+    assert len(calls) == 2
+    assert refreshed != first
+    assert client.get_activity_streams(42) == refreshed
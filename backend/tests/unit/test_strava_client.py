@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.integrations.strava import AsyncStravaClient, StravaClient
+
+
+def test_get_activity_streams_requests_reduced_resolution(monkeypatch):
+    seen = []
+
+    def fake_request(**kwargs):
+        seen.append(kwargs["params"])
+        return httpx.Response(200, json={}, request=httpx.Request("GET", kwargs["url"]))
+
+    monkeypatch.setattr("app.integrations.strava.httpx.request", fake_request)
+    client = StravaClient("token")
+
+    client.get_activity_streams(42)
+    client.get_activity_streams(42, resolution="low", series_type="time")
+
+    assert "resolution" not in seen[0] and "series_type" not in seen[0]
+    assert seen[1]["resolution"] == "low"
+    assert seen[1]["series_type"] == "time"
+
+
+@pytest.mark.parametrize("kwargs", [{"resolution": "ultra"}, {"series_type": "heartrate"}])
+def test_get_activity_streams_rejects_unknown_options(kwargs):
+    with pytest.raises(ValueError):
+        StravaClient("token").get_activity_streams(42, **kwargs)
+
+
+def _async_client(handler, **kwargs) -> tuple[AsyncStravaClient, httpx.AsyncClient]:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = AsyncStravaClient(
+        "old-token",
+        http_client=http_client,
+        refresh_token="refresh",
+        client_id="id",
+        client_secret="secret",
+        base_url="http://strava.test/api/v3",
+        token_url="http://strava.test/oauth/token",
+        backoff_base_s=0.0,
+        **kwargs,
+    )
+    return client, http_client
+
+
+def test_async_client_refreshes_once_for_concurrent_401s() -> None:
+    refreshes = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal refreshes
+        if request.url.path == "/oauth/token":
+            refreshes += 1
+            return httpx.Response(200, json={"access_token": "new-token", "refresh_token": "r2", "expires_at": 2**31})
+        if request.headers["Authorization"] != "Bearer new-token":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"time": {"data": [0, 1]}})
+
+    async def run():
+        client, http_client = _async_client(handler)
+        async with http_client:
+            results = await asyncio.gather(*(client.aget_activity_streams(i) for i in range(8)))
+        return client, results
+
+    client, results = asyncio.run(run())
+
+    assert refreshes == 1
+    assert all(r == {"time": {"data": [0, 1]}} for r in results)
+    assert client.token_was_refreshed
+    assert client.access_token == "new-token"
+
+
+def test_async_client_retries_rate_limited_requests() -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        assert request.url.path == "/api/v3/activities/42/streams"
+        assert request.url.params["key_by_type"] == "true"
+        return httpx.Response(200, json={"latlng": {"data": []}})
+
+    async def run():
+        client, http_client = _async_client(handler)
+        async with http_client:
+            return await client.aget_activity_streams(42)
+
+    assert asyncio.run(run()) == {"latlng": {"data": []}}
+    assert calls == 2
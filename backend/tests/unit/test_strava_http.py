@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.integrations.strava import AsyncStravaClient, StravaClient
+from app.integrations.strava_http import HttpPoolMetrics, build_async_http_client, build_http_client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def local_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pooled_client_reuses_one_connection(local_api):
+    metrics = HttpPoolMetrics()
+    with build_http_client(metrics=metrics) as http_client:
+        clients = [StravaClient(f"token-{i}", base_url=local_api, http_client=http_client) for i in range(2)]
+        for i in range(5):
+            payload = clients[i % 2].get_activity_streams(i)
+            assert payload["path"].startswith(f"/api/v3/activities/{i}/streams?")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 5
+    assert snapshot["connections_opened"] == 1
+    assert snapshot["reused_requests"] == 4
+    assert snapshot["tls_handshakes"] == 0
+
+
+def test_async_pooled_client_bounds_connections(local_api):
+    metrics = HttpPoolMetrics()
+
+    async def run():
+        async with build_async_http_client(max_connections=2, metrics=metrics) as http_client:
+            client = AsyncStravaClient("token", http_client=http_client, base_url=local_api)
+            await asyncio.gather(*(client.aget_activity_streams(i) for i in range(10)))
+
+    asyncio.run(run())
+
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 10
+    assert 1 <= snapshot["connections_opened"] <= 2
+
+
+def test_http2_falls_back_without_h2(monkeypatch, caplog):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "h2":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+    with build_http_client(http2=True):
+        pass
+    assert "h2 package is not installed" in caplog.text
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.integrations.strava import StravaClient
+from app.integrations.strava_rate_limit import (
+    InMemoryRateLimitStore,
+    RateLimitExhaustedError,
+    RateLimitPolicy,
+    RateLimitState,
+    StravaRateLimiter,
+    apply_response,
+    parse_rate_limit_headers,
+    plan_request,
+)
+
+START = datetime(2026, 10, 17, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+def test_parse_headers_prefers_tighter_read_limit():
+    headers = {
+        "X-RateLimit-Limit": "600,6000",
+        "X-RateLimit-Usage": "10,100",
+        "X-ReadRateLimit-Limit": "300,3000",
+        "X-ReadRateLimit-Usage": "10,100",
+    }
+    assert parse_rate_limit_headers(headers) == ((300, 3000), (10, 100))
+    assert parse_rate_limit_headers({"X-RateLimit-Limit": "garbage"}) is None
+
+
+def test_windows_align_to_strava_boundaries():
+    state = RateLimitState.fresh(START + timedelta(minutes=22, seconds=5))
+    assert state.window_15m_start == START + timedelta(minutes=15)
+    assert state.day_start == START.replace(hour=0)
+
+
+def test_paced_requests_use_whole_window_without_exceeding_it():
+    clock = FakeClock(START)
+    state = RateLimitState.fresh(START)
+    state.limit_15m, state.limit_day = 40, 10_000
+    limiter = StravaRateLimiter(
+        InMemoryRateLimitStore(state),
+        policy=RateLimitPolicy(headroom=2, burst_fraction=0.5),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    sent_at = []
+    window_end = START + timedelta(minutes=15)
+    while clock.now < window_end:
+        limiter.acquire()
+        sent_at.append(clock.now)
+
+    in_first_window = [t for t in sent_at if t < window_end]
+    assert len(in_first_window) == 38
+    # Half the quota bursts immediately, the rest is spread over the window.
+    assert sum(t == START for t in in_first_window) == 19
+    assert in_first_window[-1] > START + timedelta(minutes=10)
+    assert sent_at[-1] >= window_end
+
+
+def test_simultaneous_reservations_are_spaced_from_the_last_granted_slot():
+    state = RateLimitState.fresh(START)
+    state.limit_15m, state.limit_day = 10, 10_000
+    policy = RateLimitPolicy(headroom=0, burst_fraction=1.0)
+
+    waits = [plan_request(state, START, policy) for _ in range(10)]
+
+    assert all(reserved for reserved, _ in waits)
+    assert [wait_s for _, wait_s in waits] == pytest.approx([90.0 * i for i in range(10)])
+
+
+def test_exhausted_window_waits_until_reset_and_429_marks_exhaustion():
+    state = RateLimitState.fresh(START)
+    policy = RateLimitPolicy(headroom=0)
+    apply_response(state, START, {}, 429)
+
+    reserved, wait_s = plan_request(state, START + timedelta(minutes=5), policy)
+    assert not reserved and wait_s == pytest.approx(600)
+
+    reserved, wait_s = plan_request(state, START + timedelta(minutes=15), policy)
+    assert reserved and wait_s == 0 and state.usage_15m == 1
+
+
+def test_response_headers_never_lower_local_reservations():
+    state = RateLimitState.fresh(START)
+    state.usage_15m = 30
+    apply_response(state, START, {"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "20,900"}, 200)
+    assert (state.limit_15m, state.limit_day) == (100, 1000)
+    assert (state.usage_15m, state.usage_day) == (30, 900)
+
+
+def test_limiter_raises_when_wait_exceeds_max():
+    state = RateLimitState.fresh(START)
+    state.usage_day = state.limit_day
+    limiter = StravaRateLimiter(InMemoryRateLimitStore(state), max_wait_s=30, clock=lambda: START)
+    with pytest.raises(RateLimitExhaustedError):
+        limiter.acquire()
+
+
+def test_client_reports_response_headers_to_limiter():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={}, headers={"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "7,70"})
+
+    store = InMemoryRateLimitStore(RateLimitState.fresh(datetime.now(timezone.utc)))
+    client = StravaClient(
+        "token",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        rate_limiter=StravaRateLimiter(store),
+    )
+    client.get_activity_streams(1)
+
+    assert (store.state.limit_15m, store.state.usage_15m, store.state.usage_day) == (100, 7, 70)
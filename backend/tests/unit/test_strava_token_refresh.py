@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.integrations.strava import AsyncStravaClient, StravaClient
+from app.integrations.strava_token_refresh import InMemoryTokenStore, StoredToken, TokenRefreshCoordinator
+
+EXPIRED = 1_000
+
+
+class FakeTokenEndpoint:
+    """Strava stand-in that rotates both tokens on every refresh and only accepts the latest ones."""
+
+    def __init__(self, latency_s: float = 0.05):
+        self.latency_s = latency_s
+        self.refreshes = 0
+        self.access_token = "access-0"
+        self.refresh_token = "refresh-0"
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/oauth/token":
+            time.sleep(self.latency_s)
+            with self._lock:
+                if f"refresh_token={self.refresh_token}" not in request.content.decode():
+                    return httpx.Response(400, json={"message": "Bad Request"})
+                self.refreshes += 1
+                self.access_token = f"access-{self.refreshes}"
+                self.refresh_token = f"refresh-{self.refreshes}"
+                body = {"access_token": self.access_token, "refresh_token": self.refresh_token, "expires_at": 2**31}
+            return httpx.Response(200, json=body)
+        if request.headers["Authorization"] != f"Bearer {self.access_token}":
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+
+def _client(endpoint: FakeTokenEndpoint, store: InMemoryTokenStore, **kwargs) -> StravaClient:
+    return StravaClient(
+        kwargs.pop("access_token", "access-0"),
+        refresh_token="refresh-0",
+        expires_at=kwargs.pop("expires_at", EXPIRED),
+        client_id="id",
+        client_secret="secret",
+        base_url="http://strava.test/api/v3",
+        token_url="http://strava.test/oauth/token",
+        http_client=httpx.Client(transport=httpx.MockTransport(endpoint)),
+        token_refresh=TokenRefreshCoordinator(store, user_id=7),
+        **kwargs,
+    )
+
+
+def test_concurrent_refreshers_share_one_token_request() -> None:
+    endpoint = FakeTokenEndpoint()
+    store = InMemoryTokenStore()
+    # One client per simulated worker, all holding the same expired token.
+    clients = [_client(endpoint, store) for _ in range(8)]
+    barrier = threading.Barrier(len(clients))
+    errors = []
+
+    def _run(client: StravaClient) -> None:
+        barrier.wait()
+        try:
+            client.list_activities()
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_run, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert endpoint.refreshes == 1
+    assert {client.access_token for client in clients} == {"access-1"}
+    assert {client.refresh_token for client in clients} == {"refresh-1"}
+    # The coordinator stored the token, so nobody persists it again.
+    assert not any(client.token_was_refreshed for client in clients)
+
+
+def test_refresh_after_401_starts_from_stored_refresh_token() -> None:
+    endpoint = FakeTokenEndpoint(latency_s=0.0)
+    store = InMemoryTokenStore()
+    first = _client(endpoint, store)
+    first.list_activities()
+    # A worker whose token was revoked holds a refresh token Strava already rotated away.
+    endpoint.access_token = "revoked"
+    late = _client(endpoint, store, access_token="access-1", expires_at=2**31)
+
+    late.list_activities()
+
+    assert endpoint.refreshes == 2
+    assert late.access_token == "access-2"
+    assert store._tokens[7] == StoredToken("access-2", "refresh-2", 2**31)
+
+
+def test_async_client_refreshes_through_coordinator() -> None:
+    endpoint = FakeTokenEndpoint(latency_s=0.0)
+    store = InMemoryTokenStore()
+    store._tokens[7] = StoredToken("access-0", "refresh-0", EXPIRED)
+
+    async def _run() -> AsyncStravaClient:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(endpoint)) as http_client:
+            client = AsyncStravaClient(
+                "access-0",
+                http_client=http_client,
+                refresh_token="refresh-0",
+                expires_at=EXPIRED,
+                client_id="id",
+                client_secret="secret",
+                base_url="http://strava.test/api/v3",
+                token_url="http://strava.test/oauth/token",
+                token_refresh=TokenRefreshCoordinator(store, user_id=7),
+            )
+            await asyncio.gather(*(client.aget_activity_streams(activity_id) for activity_id in range(4)))
+            return client
+
+    client = asyncio.run(_run())
+
+    assert endpoint.refreshes == 1
+    assert client.access_token == "access-1"
+    assert store._tokens[7].access_token == "access-1"
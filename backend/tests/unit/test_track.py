@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.quality import compute_quality, compute_track_quality
+from app.services.track import TRACK_BYTES_PER_POINT, Track
+
+
+def test_from_streams_builds_contiguous_columns():
+    track = Track.from_streams(
+        [[50.0, 19.0], [50.0001, 19.0001], [50.0002, 19.0002]],
+        [0, 1, 3],
+        [210.0, 211.5, 212.0],
+    )
+
+    assert len(track) == 3
+    assert track.lat.dtype == np.float64 and track.lat.flags.c_contiguous
+    assert track.time.dtype == np.int32
+    assert track.lon.tolist() == [19.0, 19.0001, 19.0002]
+    assert track.ele.tolist() == [210.0, 211.5, 212.0]
+    assert track.nbytes == 3 * TRACK_BYTES_PER_POINT
+
+
+def test_from_streams_pads_missing_or_short_altitude_with_nan():
+    latlng = [[0.0, 0.0], [0.0, 0.001], [0.0, 0.002]]
+
+    assert np.isnan(Track.from_streams(latlng, [0, 1, 2]).ele).all()
+    short = Track.from_streams(latlng, [0, 1, 2], [5.0])
+    assert short.ele[0] == 5.0
+    assert np.isnan(short.ele[1:]).all()
+
+
+def test_from_streams_truncates_to_shorter_stream():
+    track = Track.from_streams([[0.0, 0.0], [0.0, 0.001], [0.0, 0.002]], [0, 1])
+
+    assert len(track) == 2
+
+
+def test_from_rows_maps_missing_elevation_to_nan():
+    track = Track.from_rows([(50.0, 19.0, 0, 200), (50.0001, 19.0, 5, None)])
+
+    assert track.time.tolist() == [0, 5]
+    assert track.ele[0] == 200.0
+    assert np.isnan(track.ele[1])
+    assert len(Track.from_rows([])) == 0
+
+
+def test_track_does_not_copy_arrays_with_matching_dtype():
+    lat = np.array([0.0, 0.001])
+    lon = np.array([0.0, 0.0])
+    time = np.array([0, 1], dtype=np.int32)
+
+    track = Track(lat, lon, time)
+
+    assert track.lat is lat and track.lon is lon and track.time is time
+
+
+def test_track_rejects_ragged_columns():
+    with pytest.raises(ValueError, match="same length"):
+        Track(np.zeros(2), np.zeros(3), np.zeros(2, dtype=np.int32))
+
+
+def test_compute_track_quality_matches_compute_quality():
+    rng = np.random.default_rng(3)
+    lat = 50 + np.cumsum(rng.normal(0, 3e-5, 500))
+    lon = 19 + np.cumsum(rng.normal(0, 3e-5, 500))
+    times = np.cumsum(rng.integers(0, 4, 500))
+    track = Track(lat, lon, times)
+
+    assert compute_track_quality(track) == compute_quality(np.column_stack([lat, lon]), times)
+
+
+def test_packed_columns_round_trip_without_copy():
+    track = Track(
+        np.array([50.0, 50.0001, 50.0002]),
+        np.array([19.0, 19.0001, 19.0002]),
+        np.array([0, 1, 3], dtype=np.int32),
+        np.array([210.0, np.nan, 212.0]),
+    )
+    columns = track.packed_columns()
+
+    assert columns["point_count"] == 3
+    assert len(columns["lat"]) == 24 and len(columns["time_s"]) == 12
+
+    restored = Track.from_packed(SimpleNamespace(**columns))
+    assert np.array_equal(restored.lat, track.lat)
+    assert np.array_equal(restored.time, track.time)
+    assert np.array_equal(np.isnan(restored.ele), np.isnan(track.ele))
+    assert np.shares_memory(restored.lat, np.frombuffer(columns["lat"], dtype="<f8"))
+
+
+def test_content_hash_tracks_stream_content():
+    latlng = [[50.0, 19.0], [50.0001, 19.0001], [50.0002, 19.0002]]
+    track = Track.from_streams(latlng, [0, 1, 3], [210.0, None, 212.0])
+
+    assert track.content_hash() == Track.from_streams(latlng, [0, 1, 3], [210.0, None, 212.0]).content_hash()
+    assert len(track.content_hash()) == 64
+    assert track.content_hash() != Track.from_streams(latlng, [0, 1, 4], [210.0, None, 212.0]).content_hash()
+    assert track.content_hash() != Track.from_streams(latlng, [0, 1, 3]).content_hash()
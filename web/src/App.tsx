@@ -41,16 +41,20 @@ type QualityReport = {
   jitter_score: number
 }
 
-type SyncResult = {
-  ok: boolean
+type SyncJob = {
+  job_id: number
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
   count: number
   fetched: number
   inserted: number
   updated: number
   skipped: number
   pages: number
+  error: string | null
 }
 
+const SYNC_POLL_INTERVAL_MS = 1500
+
 type AuthenticatedUser = {
   id: number
   strava_athlete_id: number
@@ -344,10 +348,20 @@ function App() {
       if (afterIso) params.set('after', afterIso)
       if (beforeIso) params.set('before', beforeIso)
 
-      const result = await apiFetch<SyncResult>(
+      let result = await apiFetch<SyncJob>(
         `/sync/activities?${params.toString()}`,
         { method: 'POST' },
       )
+      while (result.status === 'queued' || result.status === 'running') {
+        setMessage(
+          `Sync ${result.status}: ${result.fetched} fetched across ${result.pages} page(s) so far.`,
+        )
+        await new Promise((resolve) => setTimeout(resolve, SYNC_POLL_INTERVAL_MS))
+        result = await apiFetch<SyncJob>(`/sync/jobs/${result.job_id}`)
+      }
+      if (result.status === 'failed') {
+        throw new Error(result.error ?? 'Sync job failed')
+      }
       setMessage(
         `Synced ${result.count} activities (${result.inserted} inserted, ${result.updated} updated, ${result.skipped} skipped) from ${result.fetched} fetched across ${result.pages} page(s).`,
       )